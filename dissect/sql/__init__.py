@@ -1,3 +1,4 @@
+from dissect.sql.cache import PageCache
 from dissect.sql.exceptions import (
     Error,
     InvalidDatabase,
@@ -18,5 +19,6 @@ __all__ = [
     "InvalidSQL",
     "NoCellData",
     "NoWriteAheadLog",
+    "PageCache",
     "SQLite3",
 ]
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from dissect.sql.cache import OpenDatabases, PageCache
+from dissect.sql.sqlite3 import SQLite3
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from dissect.sql.sqlite3 import Table
+
+# The page cache budget of every worker, shared by the databases it has open
+DEFAULT_CACHE_SIZE = 4 * 1024 * 1024
+# The maximum number of rows per result
+DEFAULT_BATCH_SIZE = 10_000
+# The maximum number of databases a worker keeps open between the batches of a database. process() continues
+# with the next batch of a database before starting a new one, so a worker rarely alternates between more than
+# a few databases, and every open database also holds on to file handles
+MAX_OPEN_DATABASES = 4
+
+
+class BatchResult:
+    """A batch of rows of a table, or an error, of a single database.
+
+    Large tables are split over multiple results, the results of a table are always yielded in rowid order.
+
+    Args:
+        path: The path of the database.
+        table: The name of the table, or ``None`` if the database itself could not be opened.
+        columns: The names of the columns of the values in ``rows``.
+        rows: The rows as tuples of values.
+        error: The exception that occurred while reading the database or table, if any.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        table: str | None,
+        columns: list[str] | None = None,
+        rows: list[tuple[Any, ...]] | None = None,
+        error: Exception | None = None,
+    ):
+        self.path = path
+        self.table = table
+        self.columns = columns or []
+        self.rows = rows or []
+        self.error = error
+
+    def __repr__(self) -> str:
+        if self.error is not None:
+            return f"<BatchResult path={self.path} table={self.table} error={self.error!r}>"
+        return f"<BatchResult path={self.path} table={self.table} rows={len(self.rows)}>"
+
+
+def process(
+    paths: Iterable[str | Path],
+    tables: dict[str, list[str] | None] | None = None,
+    workers: int | None = None,
+    executor: Executor | None = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_pending: int | None = None,
+    wal: bool = True,
+) -> Iterator[BatchResult]:
+    """Read the rows of the given tables from many databases in a pool of worker processes.
+
+    Every database is read in batches of at most ``batch_size`` rows, and the next batch of a database is only
+    requested once the previous batch is done. Together with a limit on the number of batches that are in
+    flight at the same time, this bounds the memory used by the results that are not consumed yet. Results of
+    different databases are yielded in the order they complete.
+
+    Errors do not stop the batch, they are returned as a :class:`BatchResult` with an ``error`` for the database
+    or table that failed.
+
+    Args:
+        paths: The paths of the databases. The paths are consumed lazily.
+        tables: The tables to read, mapped to the names of the columns to read or ``None`` for all columns.
+                Tables that do not exist in a database result in an error for that table. By default, all
+                columns of all tables are read.
+        workers: The number of worker processes of the default executor.
+        executor: The executor to run the workers in, by default a new :class:`ProcessPoolExecutor`.
+        cache_size: The page cache budget in bytes of every worker, shared by the databases it has open.
+        batch_size: The maximum number of rows per result, at least 1. ``WITHOUT ROWID`` tables are not split.
+        max_pending: The maximum number of batches in flight, by default twice the number of workers.
+        wal: Also read the WAL of a database, if there is a ``-wal`` file next to it.
+    """
+    if batch_size < 1:
+        raise ValueError(f"Invalid batch size {batch_size!r}, a batch holds at least one row")
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    table_spec = list(tables.items()) if tables is not None else None
+    tasks = ((Path(path), table_spec, None, cache_size, batch_size, wal) for path in paths)
+
+    try:
+        pending = set()
+        for task in tasks:
+            pending.add(executor.submit(_process_batch, task))
+            if len(pending) >= max_pending:
+                break
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                result, next_task = future.result()
+
+                # Continue with the same database before starting a new one, to keep the number of open
+                # databases in the workers low
+                if next_task is not None:
+                    pending.add(executor.submit(_process_batch, next_task))
+                elif (task := next(tasks, None)) is not None:
+                    pending.add(executor.submit(_process_batch, task))
+
+                yield result
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+# The databases opened by a worker, every thread of a thread based executor is a separate worker
+_databases = OpenDatabases(MAX_OPEN_DATABASES, per_thread=True)
+# The page cache of a worker, shared by the databases it has open
+_worker = threading.local()
+
+
+def _open_database(path: Path, wal: bool, cache_size: int) -> SQLite3:
+    # The pages of the databases in the shared cache are kept apart by the cache token of every database
+    if getattr(_worker, "cache", None) is None or _worker.cache.max_size != cache_size:
+        _worker.cache = PageCache(cache_size)
+
+    wal_path = path.with_name(path.name + "-wal")
+    wal_path = wal_path if wal and wal_path.is_file() else None
+
+    return SQLite3.from_path(path, wal_path, cache=_worker.cache)
+
+
+def _process_batch(
+    task: tuple[Path, list[tuple[str, list[str] | None]] | None, int | None, int, int, bool],
+) -> tuple[BatchResult, tuple | None]:
+    """Read one batch of rows of the first of the remaining tables of a database.
+
+    Returns the result and the task for the next batch of the database, if there is one. The database stays
+    open for the next batch, and is closed after the last one.
+    """
+    path, _, _, cache_size, _, wal = task
+    key = (path, wal)
+
+    try:
+        with _databases.open(key, lambda: _open_database(path, wal, cache_size)) as sqlite:
+            result, next_task = _read_database(sqlite, task)
+    except Exception as e:
+        _databases.close(key)
+        return BatchResult(path, None, error=e), None
+
+    if next_task is None:
+        _databases.close(key)
+    return result, next_task
+
+
+def _read_database(
+    sqlite: SQLite3, task: tuple[Path, list[tuple[str, list[str] | None]] | None, int | None, int, int, bool]
+) -> tuple[BatchResult, tuple | None]:
+    path, tables, min_rowid, cache_size, batch_size, wal = task
+
+    if tables is None:
+        tables = [(table.name, None) for table in sqlite.tables()]
+
+    if not tables:
+        return BatchResult(path, None), None
+
+    (table_name, columns), *remaining = tables
+    result = BatchResult(path, table_name)
+    next_rowid = None
+
+    try:
+        if (table := sqlite.table(table_name)) is None:
+            result.error = ValueError(f"Unknown table {table_name!r}")
+        else:
+            next_rowid = _read_batch(table, result, columns, min_rowid, batch_size)
+    except Exception as e:
+        result.error = e
+        next_rowid = None
+
+    if next_rowid is not None:
+        return result, (path, tables, next_rowid, cache_size, batch_size, wal)
+
+    if remaining:
+        return result, (path, remaining, None, cache_size, batch_size, wal)
+
+    return result, None
+
+
+def _read_batch(
+    table: Table, result: BatchResult, columns: list[str] | None, min_rowid: int | None, batch_size: int
+) -> int | None:
+    """Read at most ``batch_size`` rows from ``min_rowid`` into ``result``, return the rowid to continue from."""
+    result.columns = [column.name for _, column in table._projection(columns or [c.name for c in table.columns])]
+
+    for row in table.rows(min_rowid=min_rowid, columns=columns):
+        if len(result.rows) == batch_size and row._cell.key is not None:
+            return row._cell.key
+
+        result.rows.append(row._values)
+
+    return None
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import struct
+
 from dissect.cstruct import cstruct
 
 # Resource: https://www.sqlite.org/fileformat.html
@@ -85,6 +87,7 @@ PAGE_TYPES = {
 }
 
 # See https://www.sqlite.org/fileformat.html -- Record format
+# Reference implementation of the fixed size serial types, reading from a file-like object
 SERIAL_TYPES = {
     0: lambda fh: None,
     1: c_sqlite3.int8,
@@ -98,6 +101,53 @@ SERIAL_TYPES = {
     9: lambda fh: 1,
 }
 
+# Size in bytes of the fixed size serial types
+SERIAL_TYPE_SIZES = {
+    0: 0,
+    1: 1,
+    2: 2,
+    3: 3,
+    4: 4,
+    5: 6,
+    6: 8,
+    7: 8,
+    8: 0,
+    9: 0,
+}
+
+_int8 = struct.Struct(">b").unpack_from
+_int16 = struct.Struct(">h").unpack_from
+_int24 = struct.Struct(">bH").unpack_from
+_int32 = struct.Struct(">i").unpack_from
+_int48 = struct.Struct(">hI").unpack_from
+_int64 = struct.Struct(">q").unpack_from
+_double = struct.Struct(">d").unpack_from
+
+
+def _decode_int24(buf: bytes | memoryview, offset: int) -> int:
+    high, low = _int24(buf, offset)
+    return (high << 16) | low
+
+
+def _decode_int48(buf: bytes | memoryview, offset: int) -> int:
+    high, low = _int48(buf, offset)
+    return (high << 32) | low
+
+
+# Decoders of the fixed size serial types, decoding the value at an offset in a buffer
+SERIAL_TYPE_DECODERS = {
+    0: lambda buf, offset: None,
+    1: lambda buf, offset: _int8(buf, offset)[0],
+    2: lambda buf, offset: _int16(buf, offset)[0],
+    3: _decode_int24,
+    4: lambda buf, offset: _int32(buf, offset)[0],
+    5: _decode_int48,
+    6: lambda buf, offset: _int64(buf, offset)[0],
+    7: lambda buf, offset: _double(buf, offset)[0],
+    8: lambda buf, offset: 0,
+    9: lambda buf, offset: 1,
+}
+
 SQLITE3_HEADER_MAGIC = b"SQLite format 3\x00"
 
 WAL_HEADER_MAGIC_LE = 0x377F0682
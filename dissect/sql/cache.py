@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterator
+
+    from dissect.sql.sqlite3 import SQLite3
+
+_tokens = itertools.count()
+
+
+def cache_token() -> int:
+    """Return a process wide unique token, used to distinguish the entries of different owners in a cache."""
+    return next(_tokens)
+
+
+class PageCache:
+    """A least recently used cache with a budget in bytes.
+
+    A single cache can be shared between multiple :class:`~dissect.sql.sqlite3.SQLite3` instances, as long as
+    every owner uses keys that are unique to it (e.g. by including a :func:`cache_token`). The cache is
+    thread-safe.
+
+    Args:
+        max_size: The maximum total size in bytes of the cached values.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: OrderedDict[Any, tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"<PageCache size={self.size} max_size={self.max_size} entries={len(self)} hits={self.hits} "
+            f"misses={self.misses} evictions={self.evictions}>"
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._entries
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value for ``key`` and mark it as most recently used, or ``default`` on a miss."""
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any, size: int) -> None:
+        """Cache ``value`` of ``size`` bytes under ``key``, evicting the least recently used values if needed.
+
+        Values that are larger than the budget of the cache are not cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                _, old_size = self._entries.pop(key)
+                self.size -= old_size
+
+            if size > self.max_size:
+                return
+
+            self._entries[key] = (value, size)
+            self.size += size
+
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached values. The statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the statistics of this cache."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_size": self.max_size,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class OpenDatabases:
+    """A least recently used cache of open databases, for workers that read the same databases in many tasks.
+
+    At most ``size`` databases stay open between uses. An evicted database is closed once the last use of it
+    has finished, so a database is never closed while another thread is still reading it. The databases are
+    shared by all threads, or if ``per_thread`` is set, every thread has its own open databases.
+
+    Args:
+        size: The maximum number of databases that stay open between uses.
+        per_thread: Whether every thread has its own open databases.
+    """
+
+    def __init__(self, size: int, per_thread: bool = False):
+        self.size = size
+        self.per_thread = per_thread
+
+        self._shared = _OpenDatabasesState()
+        self._local = _ThreadOpenDatabasesState()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state.databases)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._state.databases
+
+    def keys(self) -> list[Hashable]:
+        """Return the keys of the open databases, from least to most recently used."""
+        with self._lock:
+            return list(self._state.databases)
+
+    @property
+    def _state(self) -> _OpenDatabasesState:
+        return self._local if self.per_thread else self._shared
+
+    @contextmanager
+    def open(self, key: Hashable, opener: Callable[[], SQLite3]) -> Iterator[SQLite3]:
+        """Use the database of ``key``, opening it with ``opener`` if it is not open already."""
+        state = self._state
+        evicted = []
+        with self._lock:
+            if (sqlite := state.databases.pop(key, None)) is None:
+                sqlite = opener()
+            state.databases[key] = sqlite
+            state.users[sqlite] = state.users.get(sqlite, 0) + 1
+
+            while len(state.databases) > self.size:
+                _, old = state.databases.popitem(last=False)
+                if old not in state.users:
+                    evicted.append(old)
+
+        for old in evicted:
+            old.close()
+
+        try:
+            yield sqlite
+        finally:
+            with self._lock:
+                if users := state.users.pop(sqlite) - 1:
+                    state.users[sqlite] = users
+                unused = not users and state.databases.get(key) is not sqlite
+
+            if unused:
+                sqlite.close()
+
+    def close(self, key: Hashable) -> None:
+        """Close the database of ``key``, once the last use of it has finished."""
+        state = self._state
+        with self._lock:
+            sqlite = state.databases.pop(key, None)
+            unused = sqlite is not None and sqlite not in state.users
+
+        if unused:
+            sqlite.close()
+
+
+class _OpenDatabasesState:
+    def __init__(self):
+        # The open databases in least recently used order, and the number of uses of the databases in use
+        self.databases: OrderedDict[Hashable, SQLite3] = OrderedDict()
+        self.users: dict[SQLite3, int] = {}
+
+
+class _ThreadOpenDatabasesState(_OpenDatabasesState, threading.local):
+    pass
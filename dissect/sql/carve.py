@@ -0,0 +1,425 @@
+from __future__ import annotations
+
+import math
+import re
+from typing import TYPE_CHECKING, Any
+
+from dissect.sql.c_sqlite3 import c_sqlite3
+from dissect.sql.sqlite3 import Table, _tree_pages, decode_value, decode_varint, serial_type_size
+from dissect.sql.utils import parse_column_description
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from dissect.sql.sqlite3 import SQLite3
+
+SQLITE_MASTER_SQL = "CREATE TABLE sqlite_master (type text, name text, tbl_name text, rootpage integer, sql text)"
+
+AFFINITY_INTEGER = "INTEGER"
+AFFINITY_TEXT = "TEXT"
+AFFINITY_BLOB = "BLOB"
+AFFINITY_REAL = "REAL"
+AFFINITY_NUMERIC = "NUMERIC"
+
+SOURCE_FREELIST = "freelist"
+SOURCE_FREEBLOCK = "freeblock"
+SOURCE_UNALLOCATED = "unallocated"
+
+# The serial types, other than TEXT, of the values that fit a column of the given affinity. TEXT values only fit
+# TEXT columns, values of any type fit BLOB columns
+INTEGER_TYPES = frozenset((0, 1, 2, 3, 4, 5, 6, 8, 9))
+NUMERIC_TYPES = INTEGER_TYPES | {7}
+AFFINITY_TYPES = {
+    AFFINITY_INTEGER: INTEGER_TYPES,
+    # REAL values without a fractional part are stored as an integer
+    AFFINITY_REAL: NUMERIC_TYPES,
+    AFFINITY_NUMERIC: NUMERIC_TYPES,
+    AFFINITY_TEXT: frozenset((0,)),
+}
+
+SQLITE_MASTER_TYPES = ("table", "index", "view", "trigger")
+
+# Control characters other than tab, newline and carriage return are taken as a sign of random data
+CONTROL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+
+
+class CarvedRecord:
+    """A record recovered from unused space in a database.
+
+    Args:
+        table: The table the record was matched against.
+        page: The number of the page the record was found on.
+        offset: The offset of the record in the page.
+        source: Where the record was found, one of ``freelist``, ``freeblock`` or ``unallocated``.
+        rowid: The rowid of the record, if the cell header preceding the record was intact.
+        values: The values of the record by column name.
+    """
+
+    def __init__(self, table: Table, page: int, offset: int, source: str, rowid: int | None, values: dict[str, Any]):
+        self.table = table
+        self.page = page
+        self.offset = offset
+        self.source = source
+        self.rowid = rowid
+        self.values = values
+
+    def __repr__(self) -> str:
+        values = " ".join([f"{key}={value!r}" for key, value in self.values.items()])
+        return (
+            f"<CarvedRecord table={self.table.name} page={self.page} offset=0x{self.offset:x} "
+            f"source={self.source} rowid={self.rowid} {values}>"
+        )
+
+
+class _Schema:
+    def __init__(self, table: Table):
+        self.table = table
+
+        self.affinities = [column_affinity(column.description) for column in table.columns]
+        self.without_rowid = table.without_rowid
+        # sqlite_master is the table at page 1
+        self.master = table.page == 1
+
+        # The value of an INTEGER PRIMARY KEY column is the rowid, the record holds a NULL for it
+        self.rowid_idx = None
+        if table.primary_key and not self.without_rowid:
+            for idx, column in enumerate(table.columns):
+                if column.name.lower() == table.primary_key.lower() and column.type.upper() == "INTEGER":
+                    self.rowid_idx = idx
+
+    def match(self, types: list[int]) -> int | None:
+        """Return how many of the serial types fit the affinity of their column, or ``None`` if the serial types
+        can not be those of a record of this table.
+        """
+        if len(types) != len(self.affinities):
+            return None
+
+        if self.rowid_idx is not None and types[self.rowid_idx] != 0:
+            return None
+
+        score = 0
+        for type_, affinity in zip(types, self.affinities, strict=True):
+            is_text = type_ >= 13 and type_ & 1
+            is_blob = type_ >= 12 and not type_ & 1
+
+            # Numeric values in a TEXT column are stored as text, and blobs are only stored by applications that
+            # do not use the declared types of their columns at all
+            if (affinity == AFFINITY_TEXT and 0 < type_ < 12) or (is_blob and affinity != AFFINITY_BLOB):
+                return None
+
+            if (
+                affinity == AFFINITY_BLOB
+                or type_ in AFFINITY_TYPES[affinity]
+                or (is_text and affinity == AFFINITY_TEXT)
+            ):
+                score += 1
+
+        if self.master and score != len(types):
+            # The type, name and table name are always text and the root page is always an integer
+            return None
+
+        return score
+
+    def accept(self, values: list[Any]) -> bool:
+        """Return whether the decoded ``values`` are plausible for a record of this table."""
+        if not self.master:
+            return True
+
+        type_, name, _, rootpage, sql = values
+        if type_ not in SQLITE_MASTER_TYPES or not name or rootpage is None or rootpage < 0:
+            return False
+
+        if type_ in ("view", "trigger"):
+            return rootpage == 0 and sql is not None
+        # Virtual tables do not have a B-tree
+        return rootpage > 0 or (type_ == "table" and sql is not None and "VIRTUAL" in sql[:32].upper())
+
+
+def carve(sqlite: SQLite3) -> Iterator[CarvedRecord]:
+    """Carve the records of deleted rows from the unused space in the database.
+
+    The pages on the freelist, and the freeblocks and unallocated space between the cell pointer array and
+    the cell content area of all B-tree pages are scanned for records that match the schema of one of the
+    tables, including ``sqlite_master``. Records on the pages of a table are only matched against the
+    schema of that table. Records that continue on an overflow page are not recovered.
+
+    Pages are read one at a time through the page cache of ``sqlite``, so carving can be combined with
+    other reads of the same database without reading pages twice.
+    """
+    master = Table(sqlite, "table", "sqlite_master", "sqlite_master", 1, SQLITE_MASTER_SQL)
+    schemas = [_Schema(master)] + [_Schema(table) for table in sqlite.tables()]
+
+    for num, data, start in _freelist_pages(sqlite):
+        yield from carve_region(sqlite, num, data, start, sqlite.usable_page_size, schemas, SOURCE_FREELIST)
+
+    for schema in schemas:
+        if not schema.table.page:
+            continue
+
+        for num in sorted(_tree_pages(sqlite, schema.table.page)[1]):
+            yield from carve_page(sqlite, num, [schema])
+
+
+def carve_page(sqlite: SQLite3, num: int, schemas: list[_Schema]) -> Iterator[CarvedRecord]:
+    """Carve the records from the freeblocks and the unallocated space of the B-tree page ``num``."""
+    page = sqlite.page(num)
+    data = page.data
+    # The data of page 1 starts after the database header, but the offsets in the page are relative to the start
+    base = len(c_sqlite3.header) if num == 1 else 0
+
+    header_size = len(c_sqlite3.page_header)
+    if page.right_page is not None:
+        header_size += 4
+
+    start = header_size + 2 * page.header.cell_count
+    end = (page.header.cell_start or 65536) - base
+    yield from carve_region(sqlite, num, data, start, end, schemas, SOURCE_UNALLOCATED)
+
+    # Freeblocks are chained in ascending order, each starting with the offset of the next one and its size.
+    # These 4 bytes overwrite the start of the cell that was there.
+    offset = page.header.first_freeblock
+    while offset:
+        next_offset = int.from_bytes(data[offset - base : offset - base + 2], "big")
+        size = int.from_bytes(data[offset - base + 2 : offset - base + 4], "big")
+
+        start = offset - base + 4
+        end = min(offset - base + size, len(data))
+        yield from carve_region(sqlite, num, data, start, end, schemas, SOURCE_FREEBLOCK)
+
+        if next_offset <= offset:
+            break
+        offset = next_offset
+
+
+def carve_region(
+    sqlite: SQLite3,
+    num: int,
+    data: bytes | memoryview,
+    start: int,
+    end: int,
+    schemas: list[_Schema],
+    source: str,
+) -> Iterator[CarvedRecord]:
+    """Carve the records between ``start`` and ``end`` in the ``data`` of page ``num``.
+
+    Every offset is tried as the start of a record header. Matched records do not overlap, and must be preceded
+    by the header of the cell they were part of.
+
+    The first 4 bytes of a freeblock overwrite the cell header and the start of the record header of the
+    cell that was there. For freeblocks, a record with a lost record header size and rowid is therefore
+    tried first, see :func:`_match_overwritten_record`.
+    """
+    buf = memoryview(data)
+    base = len(c_sqlite3.header) if num == 1 else 0
+
+    offset = start
+    if source == SOURCE_FREEBLOCK and (match := _match_overwritten_record(sqlite, buf, start, end, schemas)):
+        schema, values, offset = match
+        columns = [column.name for column in schema.table.columns]
+        yield CarvedRecord(schema.table, num, start + base, source, None, dict(zip(columns, values, strict=True)))
+
+    while offset < end:
+        if (match := _match_record(sqlite, buf, offset, end, schemas)) is None:
+            offset += 1
+            continue
+
+        schema, _, values, record_end = match
+        # The cell header before the record is intact, unless it was overwritten by a freeblock header
+        if schema.without_rowid:
+            rowid = None
+            found = _find_payload_size(buf, start, offset, record_end - offset)
+        else:
+            rowid = _find_rowid(buf, start, offset, record_end - offset)
+            found = rowid is not None
+
+        if not found:
+            offset += 1
+            continue
+
+        columns = [column.name for column in schema.table.columns]
+        if schema.rowid_idx is not None:
+            values[schema.rowid_idx] = rowid
+
+        yield CarvedRecord(schema.table, num, offset + base, source, rowid, dict(zip(columns, values, strict=True)))
+        offset = record_end
+
+
+def _match_record(
+    sqlite: SQLite3, buf: memoryview, offset: int, end: int, schemas: list[_Schema]
+) -> tuple[_Schema, list[int], list[Any], int] | None:
+    """Try to decode a record at ``offset`` that ends before ``end`` and matches one of ``schemas``."""
+    header_size = buf[offset]
+    if header_size < 2 or header_size >= 0x80:
+        # Record headers of more than 127 bytes are rare enough to not be worth the false positives
+        return None
+
+    header_end = offset + header_size
+    if header_end > end:
+        return None
+
+    types = _decode_types(buf, offset + 1, header_end)
+    if types is None or not any(types):
+        return None
+
+    # Prefer the schemas of which the most serial types fit the affinity of their column
+    matches = [(score, schema) for schema in schemas if (score := schema.match(types)) is not None]
+    if not matches:
+        return None
+
+    if (result := _decode_values(sqlite, buf, header_end, end, types)) is None:
+        return None
+
+    values, record_end = result
+    for _, schema in sorted(matches, key=lambda match: match[0], reverse=True):
+        if schema.accept(values):
+            return schema, types, values, record_end
+    return None
+
+
+def _match_overwritten_record(
+    sqlite: SQLite3, buf: memoryview, offset: int, end: int, schemas: list[_Schema]
+) -> tuple[_Schema, list[Any], int] | None:
+    """Try to decode a record of which the start was overwritten by a freeblock header.
+
+    For a small cell, the 4 overwritten bytes are the payload size (1 byte), the rowid (1 or 2 bytes), the
+    record header size (1 byte) and, for a 1 byte rowid, the serial type of the first column. The first
+    serial type can only be recovered if the first column is an ``INTEGER PRIMARY KEY``, which is always
+    stored as a NULL. The remaining serial types start at ``offset``, directly followed by the values.
+    """
+    for schema in schemas:
+        num_columns = len(schema.affinities)
+
+        for lost in (0, 1) if schema.rowid_idx == 0 else (0,):
+            header_end = offset
+            types = [0] * lost
+            while len(types) < num_columns and header_end < end:
+                try:
+                    type_, header_end = decode_varint(buf, header_end)
+                except IndexError:
+                    break
+                types.append(type_)
+
+            if len(types) != num_columns or 10 in types or 11 in types or not any(types):
+                continue
+
+            if schema.match(types) is None:
+                continue
+
+            if (result := _decode_values(sqlite, buf, header_end, end, types)) is not None:
+                values, record_end = result
+                if schema.accept(values):
+                    return schema, values, record_end
+
+    return None
+
+
+def _decode_types(buf: memoryview, offset: int, end: int) -> list[int] | None:
+    """Decode the serial types of a record header from ``offset`` up to exactly ``end``."""
+    types = []
+    try:
+        while offset < end:
+            type_, offset = decode_varint(buf, offset)
+            if type_ in (10, 11):
+                return None
+            types.append(type_)
+    except IndexError:
+        return None
+
+    return types if offset == end else None
+
+
+def _decode_values(
+    sqlite: SQLite3, buf: memoryview, offset: int, end: int, types: list[int]
+) -> tuple[list[Any], int] | None:
+    """Decode the values of the given serial types at ``offset``, if they end before ``end``."""
+    record_end = offset + sum(serial_type_size(type_) for type_ in types)
+    if record_end > end:
+        return None
+
+    values = []
+    for type_ in types:
+        value = decode_value(buf, offset, type_, sqlite.encoding)
+        if type_ >= 13 and type_ & 1 and (not isinstance(value, str) or CONTROL_CHARACTERS.search(value)):
+            # Text that can not be decoded is most likely not a record
+            return None
+
+        if type_ == 7 and math.isnan(value):
+            # SQLite stores NaN as NULL
+            return None
+
+        values.append(value)
+        offset += serial_type_size(type_)
+
+    return values, record_end
+
+
+def _find_rowid(buf: memoryview, start: int, offset: int, size: int) -> int | None:
+    """Find the rowid in the header of the table leaf cell that contains the record of ``size`` bytes at ``offset``.
+
+    The cell header is the payload size followed by the rowid, both varints.
+    """
+    for cell_offset in range(offset - 2, max(start, offset - 18) - 1, -1):
+        payload_size, rowid_offset = decode_varint(buf, cell_offset)
+        if payload_size != size:
+            continue
+
+        rowid, record_offset = decode_varint(buf, rowid_offset)
+        if record_offset == offset:
+            return rowid - 0x10000000000000000 if rowid & 0x8000000000000000 else rowid
+
+    return None
+
+
+def _find_payload_size(buf: memoryview, start: int, offset: int, size: int) -> bool:
+    """Return whether the record of ``size`` bytes at ``offset`` is preceded by its payload size, as in the
+    header of an index cell.
+    """
+    for cell_offset in range(offset - 1, max(start, offset - 9) - 1, -1):
+        if decode_varint(buf, cell_offset) == (size, offset):
+            return True
+    return False
+
+
+def _freelist_pages(sqlite: SQLite3) -> Iterator[tuple[int, bytes | memoryview, int]]:
+    """Yield the number, data and the offset of the unused space of the pages on the freelist."""
+    seen = set()
+
+    trunk = sqlite.header.first_freelist_page
+    while trunk and trunk not in seen and trunk <= sqlite.page_count:
+        seen.add(trunk)
+        data = sqlite.page_data(trunk)
+
+        next_trunk = int.from_bytes(data[0:4], "big")
+        leaf_count = int.from_bytes(data[4:8], "big")
+        leaf_count = min(leaf_count, (sqlite.usable_page_size - 8) // 4)
+
+        for idx in range(leaf_count):
+            leaf = int.from_bytes(data[8 + idx * 4 : 12 + idx * 4], "big")
+            if leaf in seen or not 1 < leaf <= sqlite.page_count:
+                continue
+
+            seen.add(leaf)
+            yield leaf, sqlite.page_data(leaf), 0
+
+        # The space after the leaf array of a trunk page is unused as well
+        yield trunk, data, 8 + leaf_count * 4
+
+        trunk = next_trunk
+
+
+def column_affinity(description: str) -> str:
+    """Return the type affinity of a column from the column definition without its name.
+
+    See https://www.sqlite.org/datatype3.html#determination_of_column_affinity
+    """
+    type_ = parse_column_description(description)[0].upper()
+
+    if "INT" in type_:
+        return AFFINITY_INTEGER
+    if "CHAR" in type_ or "CLOB" in type_ or "TEXT" in type_:
+        return AFFINITY_TEXT
+    if "BLOB" in type_ or not type_:
+        return AFFINITY_BLOB
+    if "REAL" in type_ or "FLOA" in type_ or "DOUB" in type_:
+        return AFFINITY_REAL
+    return AFFINITY_NUMERIC
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import io
+import os
+import threading
+from typing import BinaryIO
+
+
+class PositionalReader:
+    """Thread-safe reads at an offset of a file-like object.
+
+    Real files are read with ``os.pread``, which does not use or change the file position, so concurrent reads
+    do not need any locking. Other file-like objects are read with a ``seek()`` and ``read()`` while holding a
+    lock. Either way, reads never depend on or interfere with the current position of other readers.
+
+    Args:
+        fh: The file-like object to read from.
+    """
+
+    def __init__(self, fh: BinaryIO):
+        self.fh = fh
+        self.fileno = None
+        self._lock = threading.Lock()
+
+        if hasattr(os, "pread"):
+            try:
+                self.fileno = fh.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                pass
+
+    def __repr__(self) -> str:
+        return f"<PositionalReader fh={self.fh!r} pread={self.fileno is not None}>"
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Read up to ``size`` bytes at ``offset``, fewer bytes are only returned at the end of the file."""
+        if self.fileno is not None:
+            buf = os.pread(self.fileno, size, offset)
+            if len(buf) == size or not buf:
+                return buf
+
+            # Short reads are allowed for some types of files, read the rest
+            parts = [buf]
+            read = len(buf)
+            while read < size and (buf := os.pread(self.fileno, size - read, offset + read)):
+                parts.append(buf)
+                read += len(buf)
+            return b"".join(parts)
+
+        with self._lock:
+            self.fh.seek(offset)
+            return self.fh.read(size)
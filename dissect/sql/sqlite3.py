@@ -1,41 +1,114 @@
 from __future__ import annotations
 
+import copy
 import itertools
+import mmap
+import os
 import re
 import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, wait
 from functools import lru_cache
 from io import BytesIO
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, BinaryIO
 
+from dissect.util.stream import AlignedStream
+
 from dissect.sql.c_sqlite3 import (
     ENCODING,
     PAGE_TYPES,
+    SERIAL_TYPE_DECODERS,
+    SERIAL_TYPE_SIZES,
     SERIAL_TYPES,
     SQLITE3_HEADER_MAGIC,
     WAL_HEADER_MAGIC,
     WAL_HEADER_MAGIC_LE,
     c_sqlite3,
 )
+from dissect.sql.cache import OpenDatabases, PageCache, cache_token
 from dissect.sql.exceptions import (
     InvalidDatabase,
     InvalidPageNumber,
     InvalidPageType,
     NoCellData,
+    NoWriteAheadLog,
 )
-from dissect.sql.utils import parse_table_columns_constraints
+from dissect.sql.reader import PositionalReader
+from dissect.sql.utils import parse_column_description, parse_create_index, parse_create_table
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
 
 if TYPE_CHECKING:
-    from collections.abc import Iterator
+    from collections.abc import Callable, Iterable, Iterator
+
+    from typing_extensions import Self
+
+# The number of consecutive overflow pages to read at once
+OVERFLOW_READAHEAD = 16
+# The maximum number of overflow pages to read at once for a large read, larger reads are slower
+OVERFLOW_MAX_RUN = 128
+# The maximum number of child pages walk_tree() reads at once
+WALK_BATCH_SIZE = 64
+# The maximum number of databases a worker of Table.scan keeps open between its tasks. The tasks of a scan all
+# read the same database, but a worker of a process pool serves every scan that uses the pool, which may
+# interleave the scans of several databases
+SCAN_MAX_OPEN_DATABASES = 8
+
+# The built-in collations, as a function that returns the bytes to compare a TEXT value on. Only BINARY compares
+# the text in the database encoding, the others are defined on UTF-8
+COLLATIONS: dict[str, Callable[[str, str], bytes]] = {
+    "BINARY": lambda value, encoding: value.encode(encoding),
+    "NOCASE": lambda value, encoding: value.encode("utf-8").lower(),
+    "RTRIM": lambda value, encoding: value.encode("utf-8").rstrip(b" "),
+}
 
 
 class SQLite3:
-    def __init__(self, fh: BinaryIO, wal_fh: BinaryIO | None = None):
+    """SQLite3 database.
+
+    Args:
+        fh: The file-like object of the database.
+        wal_fh: The file-like object of the write-ahead log (WAL) of the database.
+        mmap: Memory map the database file, ``fh`` must be a real file (have a ``fileno()``). Pages are then
+              returned as zero-copy ``memoryview`` slices of the mapping instead of being read from ``fh``.
+        cache: The cache for B-tree pages, which can be shared between databases. By default, every database
+               gets its own cache with room for 256 pages. Memory mapped databases only cache pages from the WAL.
+    """
+
+    def __init__(
+        self,
+        fh: BinaryIO,
+        wal_fh: BinaryIO | None = None,
+        mmap: bool = False,
+        cache: PageCache | None = None,
+    ):
         self.fh = fh
-        self.wal = WAL(wal_fh) if wal_fh else None
-
-        self.header = c_sqlite3.header(fh)
+        self.reader = PositionalReader(fh)
+        self.wal = None
+        self.checkpoint = None
+        self._schema = None
+        # The paths the database was opened from, see from_path
+        self.path = None
+        self.wal_path = None
+        # The index of the WAL commit frame to read pages up to, or None to only read the database file
+        self._commit_idx = None
+
+        self._map = None
+        self._map_view = None
+        self._owned_fhs = []
+
+        self.header = self.db_header = c_sqlite3.header(fh)
         if self.header.magic != SQLITE3_HEADER_MAGIC:
             raise InvalidDatabase("Invalid header magic")
+        self.page_count = self.header.page_count
 
         self.encoding = ENCODING.get(self.header.text_encoding, "utf-8")
         self.page_size = self.header.page_size
@@ -46,57 +119,303 @@ class SQLite3:
         if self.usable_page_size < 480:
             raise InvalidDatabase("Usable page size is too small")
 
-        self.page = lru_cache(256)(self.page)
+        if mmap:
+            self._map = _map_file(fh)
+            self._map_view = memoryview(self._map)
+
+        self.cache = cache if cache is not None else PageCache(256 * self.page_size)
+        self._cache_token = cache_token()
+
+        if wal_fh:
+            self.open_wal(wal_fh)
+
+    @classmethod
+    def from_path(
+        cls,
+        path: str | Path,
+        wal_path: str | Path | None = None,
+        mmap: bool = False,
+        cache: PageCache | None = None,
+    ) -> SQLite3:
+        """Open the database at ``path``, and optionally the WAL at ``wal_path``.
+
+        The opened files are closed when the database is closed.
+        """
+        fh = Path(path).open("rb")  # noqa: SIM115
+        wal_fh = Path(wal_path).open("rb") if wal_path else None  # noqa: SIM115
+
+        try:
+            sqlite = cls(fh, wal_fh, mmap=mmap, cache=cache)
+        except Exception:
+            fh.close()
+            if wal_fh:
+                wal_fh.close()
+            raise
+
+        sqlite._owned_fhs = [fh] + ([wal_fh] if wal_fh else [])
+        sqlite.path = Path(path)
+        sqlite.wal_path = Path(wal_path) if wal_path else None
+        return sqlite
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map, if any, and close the files opened by :meth:`from_path`."""
+        if self._map is not None:
+            self._map_view.release()
+            try:
+                self._map.close()
+            except BufferError:
+                # Pages or values referencing the mapping are still alive, the mapping is closed when they are
+                pass
+            self._map = self._map_view = None
+
+        for fh in self._owned_fhs:
+            fh.close()
+        self._owned_fhs = []
 
     def open_wal(self, fh: BinaryIO) -> None:
-        self.wal = WAL(fh)
+        """Open the write-ahead log (WAL) of this database.
+
+        Pages are then read from the most recent valid commit in the WAL, and from the database file if
+        the WAL does not contain them.
+        """
+        wal = WAL(fh)
+        if wal.page_map and wal.header.page_size != self.page_size:
+            raise InvalidDatabase("WAL page size does not match the database page size")
+
+        self.wal = wal
+        self.checkpoint = None
+        self._set_commit(wal.commit_idx)
+
+    def _set_commit(self, commit_idx: int | None) -> None:
+        self._commit_idx = commit_idx
+
+        self.header = self.db_header
+        self.page_count = self.db_header.page_count
+
+        if commit_idx is not None:
+            self.page_count = self.wal.index.commit_sizes[commit_idx]
+            if (frame_idx := self.wal.find_frame(1, commit_idx)) is not None:
+                self.header = c_sqlite3.header(self.wal.frame(frame_idx).read_data()[: len(c_sqlite3.header)])
+
+    def at_checkpoint(self, checkpoint: int | WALCheckpoint | None) -> SQLite3:
+        """Return a read-only view of the database as of the given checkpoint (commit) in the WAL.
+
+        Pages are read from the most recent frame of the page up to and including the commit of the
+        checkpoint, and from the database file otherwise. The view shares the files and page cache of this
+        database and remains usable for as long as this database is open.
+
+        Note that the frames of the checkpoints after the last valid commit (see :attr:`WAL.page_map`) did
+        not pass salt or checksum validation and may be left over from a previous generation of the WAL.
+
+        Args:
+            checkpoint: The index of the checkpoint in :meth:`WAL.checkpoints`, the checkpoint itself, or
+                        ``None`` for the database file without any of the WAL.
+        """
+        if self.wal is None:
+            raise NoWriteAheadLog("Database has no WAL")
+
+        if isinstance(checkpoint, int):
+            checkpoint = self.wal.checkpoints()[checkpoint]
+
+        view = self._view(checkpoint.commit_idx if checkpoint is not None else None)
+        view.checkpoint = checkpoint
+        return view
+
+    def _view(self, commit_idx: int | None) -> SQLite3:
+        view = copy.copy(self)
+        # Only this database owns the files and the memory map
+        view._map = None
+        view._owned_fhs = []
+        view._schema = None
+        view._set_commit(commit_idx)
+        return view
+
+    def checkpoints(self) -> Iterator[SQLite3]:
+        """Iterate over read-only views of the database as of every checkpoint in the WAL, oldest first.
+
+        See :meth:`at_checkpoint`.
+        """
+        if self.wal is None:
+            return
+
+        for checkpoint in self.wal.checkpoints():
+            yield self.at_checkpoint(checkpoint)
+
+    def diff(self, other: SQLite3) -> Iterator[RowChange]:
+        """Yield the rows that are inserted, updated or deleted going from this database to ``other``.
+
+        Both databases must be views of the same database and WAL, see :meth:`at_checkpoint`. Tables are
+        matched by name. Only the pages of the B-trees that were written by the commits between the two
+        views are decoded, see :meth:`Table.diff`.
+        """
+        context = _DiffContext(self, other)
+
+        old_tables = {table.name.lower(): table for table in self.tables()}
+        new_tables = {table.name.lower(): table for table in other.tables()}
+
+        for name, old_table in old_tables.items():
+            yield from old_table._diff(new_tables.get(name), context)
+
+        for name, new_table in new_tables.items():
+            if name not in old_tables:
+                yield from new_table._diff(None, context, reverse=True)
+
+    def _touched_pages(self, other: SQLite3) -> set[int]:
+        """Return the numbers of the pages that are written by the commits between this view and ``other``."""
+        if self.fh is not other.fh or self.wal is not other.wal:
+            raise ValueError("Databases are not views of the same database")
+
+        if self._commit_idx == other._commit_idx:
+            return set()
+
+        lo, hi = sorted(-1 if idx is None else idx for idx in (self._commit_idx, other._commit_idx))
+        return set(self.wal.index.page_numbers[lo + 1 : hi + 1])
+
+    @property
+    def schema(self) -> Schema:
+        """The catalog of the tables and indices in this database.
+
+        The catalog is read once, and read again if the schema cookie in the database header changes, e.g.
+        when a WAL with a newer schema is opened.
+        """
+        schema = self._schema
+        if schema is None or schema.commit_idx != self._commit_idx or schema.cookie != self.header.schema_cookie:
+            schema = self._schema = Schema(self)
+        return schema
 
     def table(self, name: str) -> Table | None:
-        name = name.lower()
-        for table in self.tables():
-            if table.name.lower() == name:
-                return table
-        return None
+        return self.schema.table(name)
 
     def tables(self) -> Iterator[Table]:
-        # Page 1 contains sqlite_master table
-        for cell in walk_tree(self, self.page(1)):
-            if cell.values[0] != "table":
-                continue
-
-            yield Table(self, *cell.values)
+        yield from self.schema.tables()
 
     def index(self, name: str) -> Index | None:
-        name = name.lower()
-        for index in self.indices():
-            if index.name.lower() == name:
-                return index
-        return None
+        return self.schema.index(name)
 
     def indices(self) -> Iterator[Index]:
-        # Page 1 contains sqlite_master table
-        for cell in walk_tree(self, self.page(1)):
-            if cell.values[0] != "index":
-                continue
+        yield from self.schema.indices()
 
-            yield Index(self, *cell.values)
-
-    def raw_page(self, num: int) -> bytes:
+    def raw_page(self, num: int) -> bytes | memoryview:
         # Only throw an out of bounds exception if the header contains a page_count.
         # Some old versions of SQLite3 do not set/update the page_count correctly.
-        if (num < 1 or num > self.header.page_count) and self.header.page_count > 0:
+        if (num < 1 or num > self.page_count) and self.page_count > 0:
             raise InvalidPageNumber("Page number exceeds boundaries")
-        if num == 1:  # Page 1 is root
-            self.fh.seek(len(c_sqlite3.header))
-        else:
-            self.fh.seek((num - 1) * self.page_size)
-        return self.fh.read(self.header.page_size)
+
+        # Page 1 is root
+        offset = len(c_sqlite3.header) if num == 1 else (num - 1) * self.page_size
+
+        if (frame_idx := self._frame_idx(num)) is not None:
+            data = self.wal.frame(frame_idx).read_data()
+            return data[len(c_sqlite3.header) :] if num == 1 else data
+
+        if self._map_view is not None:
+            return self._map_view[offset : offset + self.page_size]
+
+        return self.reader.read(offset, self.page_size)
+
+    def raw_pages(self, num: int, count: int) -> list[bytes | memoryview]:
+        """Return the data of ``count`` consecutive pages starting at page ``num``, like :meth:`raw_page`.
+
+        Runs of pages that are read from the database file are read with a single read, pages in the WAL are
+        read from their frame. Fewer pages are returned if the range extends beyond the end of the database.
+        """
+        if self.page_count > 0:
+            if num < 1 or num > self.page_count:
+                raise InvalidPageNumber("Page number exceeds boundaries")
+            count = min(count, self.page_count - num + 1)
+
+        if num == 1 or count <= 1:
+            return [self.raw_page(num + i) for i in range(count)]
+
+        result = []
+        run_start = num
+        for page in range(num, num + count + 1):
+            if page < num + count and self._frame_idx(page) is None:
+                continue
+
+            # Read the run of pages that are not in the WAL before this page with a single read
+            if run_start < page:
+                offset = (run_start - 1) * self.page_size
+                size = (page - run_start) * self.page_size
+                if self._map_view is not None:
+                    buf = self._map_view[offset : offset + size]
+                else:
+                    buf = memoryview(self.reader.read(offset, size))
+                result.extend(buf[i : i + self.page_size] for i in range(0, len(buf), self.page_size))
+
+            if page < num + count:
+                result.append(self.raw_page(page))
+            run_start = page + 1
+
+        return result
 
     def page(self, num: int) -> Page:
-        return Page(self, num)
+        return Page(self, num, self.page_data(num))
+
+    def page_data(self, num: int) -> bytes | memoryview:
+        """Return the data of the given page like :meth:`raw_page`, but through the page cache."""
+        if (key := self._cache_key(num)) is None:
+            return self.raw_page(num)
+
+        if (data := self.cache.get(key)) is None:
+            data = self.raw_page(num)
+            self.cache.put(key, data, len(data))
+
+        return data
+
+    def read_pages(self, nums: Iterable[int]) -> dict[int, bytes | memoryview]:
+        """Return the data of the given pages like :meth:`page_data`, by page number.
+
+        The pages that are not cached are read in file offset order, and runs of consecutive pages are read
+        with a single read.
+        """
+        result = {}
+        missing = []
+        for num in sorted(set(nums)):
+            if (key := self._cache_key(num)) is None or (data := self.cache.get(key)) is None:
+                missing.append(num)
+            else:
+                result[num] = data
+
+        idx = 0
+        while idx < len(missing):
+            end = idx + 1
+            while end < len(missing) and missing[end] == missing[end - 1] + 1:
+                end += 1
+
+            for num, data in zip(missing[idx:end], self.raw_pages(missing[idx], end - idx), strict=False):
+                if (key := self._cache_key(num)) is not None:
+                    # Do not keep the buffer of the whole run alive in the cache
+                    data = bytes(data)
+                    self.cache.put(key, data, len(data))
+                result[num] = data
+            idx = end
+
+        return result
+
+    def _cache_key(self, num: int) -> tuple[object, int] | None:
+        """Return the key of a page in the page cache, or ``None`` if the page is not cached."""
+        if (frame_idx := self._frame_idx(num)) is not None:
+            # Frames are immutable, so all views of the WAL can share the cached pages
+            return (self.wal.cache_token, frame_idx)
+        if self._map_view is not None:
+            # Pages of a memory mapped database are not cached
+            return None
+        return (self._cache_token, num)
+
+    def _frame_idx(self, num: int) -> int | None:
+        if self._commit_idx is None:
+            return None
+        return self.wal.find_frame(num, self._commit_idx)
 
     def pages(self) -> Iterator[Page]:
-        for i in range(self.header.page_count):
+        for i in range(self.page_count):
             yield self.page(i + 1)
 
     def cells(self) -> Iterator[Cell]:
@@ -104,75 +423,72 @@ class SQLite3:
             yield from page.cells()
 
 
-class Column:
-    """Describes a column of a sqlite table."""
+def _map_file(fh: BinaryIO) -> mmap.mmap:
+    return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
 
-    SPACE = r"\s"
-    EXPRESSION = r"\(.+?\)"
-    STRING = r"['\"].+?['\"]"
-    TOKENIZER_EXPRESSION = re.compile(f"({SPACE}|{EXPRESSION}|{STRING})")
 
-    def __init__(self, name: str, description: str):
-        self.name = name
-        self.default_value = self._parse_default_value_from_description(description)
+class Schema:
+    """The tables and indices of a database, read once from the ``sqlite_master`` table.
 
-    def _parse_default_value_from_description(self, description: str) -> bool | str | int | float | None:
-        """Find the default from the description string"""
-        if "DEFAULT" not in description.upper():
-            return None
+    Lookups by name are case-insensitive. The :class:`Table` and :class:`Index` objects are created on first
+    use, so the SQL of a table is only parsed when that table is used.
+    """
 
-        tokens = self._tokenize(description)
-        value = self._get_default_value(tokens)
+    def __init__(self, sqlite: SQLite3):
+        self.sqlite = sqlite
+        self.commit_idx = sqlite._commit_idx
+        self.cookie = sqlite.header.schema_cookie
 
-        return self._parse_default_value(value)
+        self._tables: dict[str, Table | list[Any]] = {}
+        self._indices: dict[str, Index | list[Any]] = {}
 
-    def _tokenize(self, description: str) -> list[str]:
-        """Tokenize the description string."""
-        tokens = self.TOKENIZER_EXPRESSION.split(description)
-        # Remove spaces and empty tokens from the list
-        return [x for x in tokens if x and x != " "]
+        # Page 1 contains sqlite_master table
+        for cell in walk_tree(sqlite, sqlite.page(1)):
+            values = cell.values
+            if values[0] == "table":
+                self._tables[values[1].lower()] = values
+            elif values[0] == "index":
+                self._indices[values[1].lower()] = values
 
-    def _get_default_value(self, tokens: list[str]) -> str:
-        """Retrieve the default from the tokens"""
+    def __repr__(self) -> str:
+        return f"<Schema tables={len(self._tables)} indices={len(self._indices)}>"
 
-        # The +1 is to account for the space after the default
-        value_index = [x.upper() for x in tokens].index("DEFAULT") + 1
-        return tokens[value_index]
+    def table(self, name: str) -> Table | None:
+        return self._get(self._tables, Table, name.lower())
 
-    def _parse_default_value(self, value: str) -> bool | str | int | float | None:
-        """Parses the default value
+    def tables(self) -> Iterator[Table]:
+        for name in list(self._tables):
+            yield self._get(self._tables, Table, name)
 
-        The value can hold an expression surrounded by ().
-        This can be a literal, so these values get stripped.
-        """
-        try:
-            return self._parse_literal(value.strip("()"))
-        except ValueError:
-            return None
+    def index(self, name: str) -> Index | None:
+        return self._get(self._indices, Index, name.lower())
 
-    def _parse_literal(self, value: str) -> bool | str | int | float:
-        """Tries to convert a literal from a string to any type
+    def indices(self) -> Iterator[Index]:
+        for name in list(self._indices):
+            yield self._get(self._indices, Index, name)
 
-        CURRENT_(TIME|DATE|TIMESTAMP) isn't being taken into account.
-        """
-        try:
-            return int(value)
-        except ValueError:
-            pass
+    def _get(self, entries: dict[str, Any], cls: type[Table | Index], key: str) -> Table | Index | None:
+        if (entry := entries.get(key)) is None or isinstance(entry, cls):
+            return entry
 
-        try:
-            return float(value)
-        except ValueError:
-            pass
+        obj = entries[key] = cls(self.sqlite, *entry)
+        return obj
 
-        if value.upper() in ["TRUE", "FALSE"]:
-            return value.upper() == "TRUE"
 
-        # Convert the string literal
-        if set(value) & {"'", '"'}:
-            return value.strip("'\"")
+class Column:
+    """Describes a column of a sqlite table."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.type, self.default_value, self.primary_key = parse_column_description(description)
+
+    def _parse_default_value_from_description(self, description: str) -> bool | str | int | float | bytes | None:
+        """Find the default from the description string
 
-        raise ValueError("Unknown literal")
+        Only literal defaults are returned, expressions and CURRENT_(TIME|DATE|TIMESTAMP) result in ``None``.
+        """
+        return parse_column_description(description)[1]
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Column):
@@ -191,11 +507,18 @@ class Table:
         self.table_name = table_name
         self.page = page
         self.sql = sql
-        self.columns = []
-        self.primary_key = None
 
-        self.primary_key, columns, _ = parse_table_columns_constraints(sql)
-        self.columns = [Column(name, description) for name, description in columns]
+        definition = parse_create_table(sql)
+        self.columns = [Column(column.name, column.description) for column in definition.columns]
+        self.constraints = list(definition.constraints)
+        # The names of all primary key columns, ``primary_key`` is only set for a single column primary key
+        self.primary_keys = definition.primary_key
+        self.primary_key = self.primary_keys[0] if len(self.primary_keys) == 1 else None
+        self.without_rowid = definition.without_rowid
+
+        # The positions of the values of all columns in a row, shared by all rows of this table
+        self._column_map = _map_columns(self.columns)
+        self._all_columns = list(enumerate(self.columns))
 
     def __repr__(self) -> str:
         return f"<Table name={self.name} page={self.page}>"
@@ -203,12 +526,384 @@ class Table:
     def __iter__(self) -> Iterator[Row]:
         return self.rows()
 
+    def __contains__(self, rowid: int) -> bool:
+        return find_rowid(self.sqlite, self.sqlite.page(self.page), rowid) is not None
+
     def row(self, idx: int) -> Row:
         return list(self.rows())[idx]
 
-    def rows(self) -> Iterator[Row]:
-        for cell in walk_tree(self.sqlite, self.sqlite.page(self.page)):
-            yield Row(self, cell)
+    def get_by_rowid(self, rowid: int, lazy: bool = False) -> Row | None:
+        """Return the row with the given rowid, or ``None`` if it does not exist.
+
+        Only the pages on the path from the root page to the leaf page containing the rowid are read. A lazy
+        row only decodes its values on first access, see :class:`Row`.
+        """
+        cell = find_rowid(self.sqlite, self.sqlite.page(self.page), rowid)
+        if cell is None:
+            return None
+        return Row(self, cell, lazy=lazy)
+
+    def rows(
+        self,
+        min_rowid: int | None = None,
+        max_rowid: int | None = None,
+        reverse: bool = False,
+        columns: list[str] | None = None,
+        where: tuple | list[tuple] | None = None,
+        workers: int | None = None,
+        raw: bool = False,
+        lazy: bool = False,
+    ) -> Iterator[Row | tuple[Any, ...]]:
+        """Yield the rows of this table in rowid order.
+
+        Args:
+            min_rowid: Only yield rows with a rowid greater than or equal to this value.
+            max_rowid: Only yield rows with a rowid less than or equal to this value.
+            reverse: Yield the rows in descending rowid order.
+            columns: Only decode the values of these columns, the other values are skipped.
+            where: Only yield rows matching a predicate, or all predicates in a list. A predicate is a tuple
+                   of ``(column, operator, value)`` or ``(column, operator)``, see :class:`Predicate`.
+            workers: Decode the rows in a pool of this many processes, see :meth:`scan_parallel`.
+            raw: Yield plain tuples of the values instead of :class:`Row` objects, in the order of the table
+                 columns or of ``columns``.
+            lazy: Yield lazy rows, which only decode their values on first access, see :class:`Row`. Rows of a
+                  parallel scan are always decoded by the workers.
+        """
+        if workers is not None:
+            rows = self.scan_parallel(
+                workers=workers,
+                min_rowid=min_rowid,
+                max_rowid=max_rowid,
+                reverse=reverse,
+                columns=columns,
+                where=where,
+            )
+            if raw:
+                yield from rows
+                return
+
+            column_map = None
+            if columns is not None:
+                column_map = _map_columns([column for _, column in self._projection(columns)])
+
+            for values in rows:
+                yield Row.from_values(self, values, column_map)
+            return
+
+        yield from self._rows(self.page, min_rowid, max_rowid, reverse, columns, where, raw, lazy)
+
+    def _rows(
+        self,
+        page: int,
+        min_rowid: int | None = None,
+        max_rowid: int | None = None,
+        reverse: bool = False,
+        columns: list[str] | None = None,
+        where: tuple | list[tuple] | None = None,
+        raw: bool = False,
+        lazy: bool = False,
+    ) -> Iterator[Row | tuple[Any, ...]]:
+        projection = self._projection(columns) if columns is not None else None
+        column_map = _map_columns([column for _, column in projection]) if projection is not None else None
+        predicates = self._predicates(where) if where is not None else None
+        decode = self._values_decoder(projection) if raw else None
+
+        for cell in walk_tree(self.sqlite, self.sqlite.page(page), min_rowid, max_rowid, reverse):
+            if predicates and not all(predicate.match(cell) for predicate in predicates):
+                continue
+
+            if raw:
+                yield decode(cell)
+            else:
+                yield Row(self, cell, projection, column_map, lazy)
+
+    def _values_decoder(self, projection: list[tuple[int, Column]] | None) -> Callable[[Cell], tuple[Any, ...]]:
+        """Return a function that decodes the values of a cell to the tuple of values of its :class:`Row`.
+
+        The values are the same as those of a row, but no row is created. Everything that is the same for all
+        cells, like the default values and the position of the primary key, is only looked up once.
+        """
+        primary_key = self.primary_key
+
+        if projection is None:
+            num_columns = len(self.columns)
+            defaults = [column.default_value for column in self.columns]
+            key_idx = self._column_map.get(primary_key) if primary_key else None
+
+            def decode(cell: Cell) -> tuple[Any, ...]:
+                values = cell.values
+                values = values[:num_columns] if len(values) >= num_columns else values + defaults[len(values) :]
+
+                if key_idx is not None and values[key_idx] is None and cell.key is not None:
+                    values[key_idx] = cell.key
+                return tuple(values)
+
+        else:
+            key_idx = _map_columns([column for _, column in projection]).get(primary_key) if primary_key else None
+
+            def decode(cell: Cell) -> tuple[Any, ...]:
+                num_values = len(cell.types)
+                values = [cell.value(idx) if idx < num_values else column.default_value for idx, column in projection]
+
+                if key_idx is not None and values[key_idx] is None and cell.key is not None:
+                    values[key_idx] = cell.key
+                return tuple(values)
+
+        return decode
+
+    def scan_parallel(
+        self,
+        executor: Executor | None = None,
+        workers: int | None = None,
+        min_rowid: int | None = None,
+        max_rowid: int | None = None,
+        reverse: bool = False,
+        columns: list[str] | None = None,
+        where: tuple | list[tuple] | None = None,
+        ordered: bool = True,
+    ) -> Iterator[tuple[Any, ...]]:
+        """Decode the rows of this table in parallel and yield them as tuples of values.
+
+        The B-tree is split at the child pointers of the root page, or of a deeper level, into independent
+        subtrees. Every subtree is decoded by a worker, which opens the database by its path and returns the
+        rows as a batch of tuples. The database must therefore have been opened with :meth:`SQLite3.from_path`.
+        Views of a checkpoint are supported, the workers then read the same checkpoint.
+
+        The values in the tuples are in the order of ``columns``, or of all columns of the table.
+
+        Args:
+            executor: The executor to run the workers in, by default a new :class:`ProcessPoolExecutor`. A
+                      thread based executor works as well, the threads then share a single open database.
+            workers: The number of workers of the default executor, and a hint for the number of subtrees.
+            min_rowid: See :meth:`rows`.
+            max_rowid: See :meth:`rows`.
+            reverse: See :meth:`rows`.
+            columns: See :meth:`rows`.
+            where: See :meth:`rows`, :class:`Predicate` objects are sent to the workers as tuples.
+            ordered: Yield the rows in rowid order. Otherwise, batches are yielded as soon as they are done.
+        """
+        sqlite = self.sqlite
+        if sqlite.path is None:
+            raise ValueError("Parallel scans require a database opened with SQLite3.from_path()")
+
+        if columns is not None:
+            # Validate the column names before starting any workers
+            self._projection(columns)
+
+        if where is not None:
+            where = [
+                (predicate.column.name, predicate.operator, predicate.value)
+                if isinstance(predicate, Predicate)
+                else predicate
+                for predicate in self._predicates(where)
+            ]
+
+        workers = workers or os.cpu_count() or 1
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+
+        # Multiple subtrees per worker balance the load when the subtrees differ in size
+        subtrees = partition_tree(sqlite, self.page, workers * 4)
+        if reverse:
+            subtrees.reverse()
+
+        database = (str(sqlite.path), str(sqlite.wal_path) if sqlite.wal_path else None, sqlite._map_view is not None)
+        tasks = (
+            (database, sqlite._commit_idx, self.name, page, min_rowid, max_rowid, reverse, columns, where)
+            for page in subtrees
+        )
+
+        try:
+            # Limit the number of pending batches, to bound the memory used by results that are not consumed yet
+            max_pending = workers * 2
+            pending = deque(executor.submit(_scan_subtree, task) for task in itertools.islice(tasks, max_pending))
+
+            while pending:
+                if ordered:
+                    done = [pending.popleft()]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+
+                for future in done:
+                    pending.extend(executor.submit(_scan_subtree, task) for task in itertools.islice(tasks, 1))
+                    yield from future.result()
+        finally:
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+
+    def diff(self, other: Table | None) -> Iterator[RowChange]:
+        """Yield the rows that are inserted, updated or deleted going from this table to ``other``.
+
+        Both tables must belong to views of the same database, see :meth:`SQLite3.at_checkpoint`. Rows are
+        aligned by their rowid (:attr:`Cell.key`), or by their complete record for ``WITHOUT ROWID`` tables.
+        Only the pages that were written by the commits between the two views are decoded, the pages both
+        B-trees have in common and that were not written are skipped.
+
+        If ``other`` is ``None``, the table is dropped and all rows are deleted.
+        """
+        context = _DiffContext(self.sqlite, other.sqlite) if other is not None else None
+        yield from self._diff(other, context)
+
+    def _diff(
+        self,
+        other: Table | None,
+        context: _DiffContext | None,
+        reverse: bool = False,
+    ) -> Iterator[RowChange]:
+        old, new = (other, self) if reverse else (self, other)
+
+        changes = diff_tree(
+            old.sqlite if old else None,
+            old.page if old else None,
+            new.sqlite if new else None,
+            new.page if new else None,
+            context,
+        )
+        for old_cell, new_cell in changes:
+            yield RowChange(
+                old.name if old else new.name,
+                Row(old, old_cell) if old_cell else None,
+                Row(new, new_cell) if new_cell else None,
+            )
+
+    def _predicates(self, where: tuple | Predicate | list[tuple | Predicate]) -> list[Predicate]:
+        if isinstance(where, (tuple, Predicate)):
+            where = [where]
+
+        return [predicate if isinstance(predicate, Predicate) else Predicate(self, *predicate) for predicate in where]
+
+    def _projection(self, columns: list[str]) -> list[tuple[int, Column]]:
+        """Resolve column names to a list of ``(index, column)`` pairs."""
+        lookup = {column.name.lower(): (idx, column) for idx, column in enumerate(self.columns)}
+
+        projection = []
+        for name in columns:
+            if (entry := lookup.get(name.lower())) is None:
+                raise ValueError(f"Unknown column {name!r} in table {self.name!r}")
+            projection.append(entry)
+
+        return projection
+
+
+class Predicate:
+    """A simple predicate on a column of a table, evaluated on the undecoded record of a cell.
+
+    Supported operators are ``=``, ``!=``, ``<``, ``<=``, ``>``, ``>=``, ``IN``, ``NOT IN``, ``IS NULL``,
+    ``IS NOT NULL`` and ``PREFIX``. ``PREFIX`` matches TEXT or BLOB values starting with the given value.
+    Values are compared using the SQLite sort order and the ``BINARY`` collation, and as in SQL, comparisons
+    with ``NULL`` never match.
+
+    TEXT and BLOB values are compared on their raw bytes, using the sizes in the record header to reject
+    values before reading them. Only the bytes needed for the comparison are read, so overflow pages are
+    often not read at all.
+    """
+
+    OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "IN", "NOT IN", "IS NULL", "IS NOT NULL", "PREFIX")
+
+    def __init__(self, table: Table, column: str, operator: str, value: Any = None):
+        self.table = table
+        (self.idx, self.column), *_ = table._projection([column])
+
+        operator = " ".join(operator.upper().split())
+        self.operator = {"==": "=", "<>": "!="}.get(operator, operator)
+        if self.operator not in self.OPERATORS:
+            raise ValueError(f"Unsupported operator {operator!r}")
+
+        self.value = value
+        self.values = list(value) if self.operator in ("IN", "NOT IN") else [value]
+        if self.operator == "PREFIX" and not isinstance(value, (str, bytes)):
+            raise ValueError("PREFIX requires a str or bytes value")
+
+        # The undecoded representation of TEXT and BLOB operands
+        encoding = table.sqlite.encoding
+        self._raw = [
+            (_sort_class(val), val.encode(encoding) if isinstance(val, str) else val)
+            for val in self.values
+            if isinstance(val, (str, bytes))
+        ]
+        self._rowid_alias = self.column.name == table.primary_key
+
+    def __repr__(self) -> str:
+        return f"<Predicate {self.column.name} {self.operator} {self.value!r}>"
+
+    def match(self, cell: Cell) -> bool:
+        """Return whether the record of the given cell matches this predicate."""
+        types = cell.types
+        if self.idx >= len(types):
+            return self._match_value(self.column.default_value, cell)
+
+        type_ = types[self.idx]
+        if type_ < 12:
+            if type_ == 0 and self._rowid_alias and cell.key is not None:
+                return self._match_value(cell.key, cell)
+            # Decoding a numeric value is cheap, compare the decoded value
+            return self._match_value(cell.value(self.idx), cell)
+
+        operator = self.operator
+        if operator in ("IS NULL", "IS NOT NULL"):
+            return operator == "IS NOT NULL"
+
+        sort_class = 2 if type_ & 1 else 3
+        size = (type_ - 12) >> 1
+
+        if operator == "PREFIX":
+            prefix_class, prefix = self._raw[0]
+            return (
+                sort_class == prefix_class and size >= len(prefix) and cell.raw_value(self.idx, len(prefix)) == prefix
+            )
+
+        if operator in ("=", "!=", "IN", "NOT IN"):
+            # Only read the value if there is an operand with a matching type and size
+            candidates = [raw for raw_class, raw in self._raw if raw_class == sort_class and len(raw) == size]
+            found = bool(candidates) and cell.raw_value(self.idx) in candidates
+            return found if operator in ("=", "IN") else not found
+
+        operand = self.value
+        if operand is None:
+            return False
+
+        operand_class = _sort_class(operand)
+        if operand_class != sort_class:
+            return self._test(sort_class - operand_class)
+
+        raw = bytes(cell.raw_value(self.idx))
+        operand = self._raw[0][1]
+        return self._test((raw > operand) - (raw < operand))
+
+    def _match_value(self, value: Any, cell: Cell) -> bool:
+        operator = self.operator
+        if operator == "IS NULL":
+            return value is None
+        if operator == "IS NOT NULL":
+            return value is not None
+        if value is None:
+            return False
+
+        encoding = cell.page.sqlite.encoding
+        if operator == "PREFIX":
+            prefix = self.value
+            return _sort_class(value) == _sort_class(prefix) and value.startswith(prefix)
+        if operator in ("=", "!=", "IN", "NOT IN"):
+            found = any(operand is not None and compare_value(value, operand, encoding) == 0 for operand in self.values)
+            return found if operator in ("=", "IN") else not found
+
+        if self.value is None:
+            return False
+        return self._test(compare_value(value, self.value, encoding))
+
+    def _test(self, result: int) -> bool:
+        """Test the result of a comparison of the column value with the operand."""
+        operator = self.operator
+        if operator == "<":
+            return result < 0
+        if operator == "<=":
+            return result <= 0
+        if operator == ">":
+            return result > 0
+        return result >= 0
 
 
 class Index:
@@ -220,75 +915,327 @@ class Index:
         self.page = page
         self.sql = sql
 
+        # Indices created for UNIQUE and PRIMARY KEY constraints do not have any SQL
+        definition = parse_create_index(sql) if sql else None
+        self.columns = list(definition.columns) if definition else []
+        self.unique = definition.unique if definition else None
+        self.where = definition.where if definition else None
+        # The explicit collations (``None`` if the column has none) and sort orders of the indexed columns
+        self.collations = list(definition.collations) if definition else []
+        self.descending = list(definition.descending) if definition else []
+        self._key_order = None
+
     def __repr__(self) -> str:
         return f"<Index name={self.name} page={self.page}>"
 
+    def seek(self, key: Any) -> Iterator[tuple[list[Any], int]]:
+        """Yield all index records of which the leading values are equal to ``key``.
+
+        ``key`` is either a single value or a list/tuple of values for the leading columns of the index.
+        Records are yielded in index order as a tuple of the indexed values and the rowid.
+        """
+        return self.range(key, key)
+
+    def range(self, lo: Any = None, hi: Any = None) -> Iterator[tuple[list[Any], int]]:
+        """Yield all index records of which the leading values are between ``lo`` and ``hi`` (inclusive).
+
+        ``lo`` and ``hi`` are either a single value or a list/tuple of values for the leading columns of the
+        index. A bound of ``None`` means the range is unbounded on that side. Values are compared using the
+        SQLite sort order (``NULL`` < numeric < TEXT < BLOB) and the collation of every indexed column, which
+        must be one of the built-in ``BINARY``, ``NOCASE`` or ``RTRIM`` collations. The bounds are in ascending
+        order, also for columns that are sorted in descending order. Records are yielded in index order as a
+        tuple of the indexed values and the rowid.
+        """
+        lo = _normalize_key(lo)
+        hi = _normalize_key(hi)
+        collations, descending = self._get_key_order()
+
+        width = max(len(lo) if lo is not None else 0, len(hi) if hi is not None else 0)
+        if not any(descending[:width]):
+            # The bounds are in index order
+            for cell in walk_index(self.sqlite, self.sqlite.page(self.page), lo, hi, collations, descending):
+                values = cell.values
+                yield values[:-1], values[-1]
+            return
+
+        if all(descending[:width]):
+            # The bounds are in reverse index order
+            start, end, filtered = hi, lo, False
+        else:
+            # The records between the bounds are only contiguous in the index up to the first column that has a
+            # different value in both bounds, the records in that part of the index are filtered on the bounds
+            encoding = self.sqlite.encoding
+            prefix = 0
+            if lo is not None and hi is not None:
+                while (
+                    prefix < min(len(lo), len(hi))
+                    and compare_record(lo[prefix : prefix + 1], hi[prefix : prefix + 1], encoding, collations[prefix:])
+                    == 0
+                ):
+                    prefix += 1
+
+            start, end = (hi, lo) if prefix < len(descending) and descending[prefix] else (lo, hi)
+            start = start[: prefix + 1] if start is not None else None
+            end = end[: prefix + 1] if end is not None else None
+            filtered = True
+
+        encoding = self.sqlite.encoding
+        for cell in walk_index(self.sqlite, self.sqlite.page(self.page), start, end, collations, descending):
+            values = cell.values
+            if filtered and (
+                (lo is not None and compare_record(values, lo, encoding, collations) < 0)
+                or (hi is not None and compare_record(values, hi, encoding, collations) > 0)
+            ):
+                continue
+            yield values[:-1], values[-1]
+
+    def _get_key_order(self) -> tuple[list[str], list[bool]]:
+        """Return the collation and whether the sort order is descending of every indexed column.
+
+        Columns without an explicit collation in the index use the collation of the table column, or
+        ``BINARY``. Raises a :class:`ValueError` if the collation of a column is not supported, or if the sort
+        order of an index without SQL (created for a ``UNIQUE`` or ``PRIMARY KEY`` constraint) cannot be
+        determined.
+        """
+        if self._key_order is None:
+            table = self.sqlite.table(self.table_name)
+            definition = parse_create_table(table.sql) if table is not None and table.sql else None
+            table_collations = {
+                column.name.lower(): column.collation for column in (definition.columns if definition else ())
+            }
+
+            # The indexed columns of indices without SQL are not recorded, they are only known to sort in ascending
+            # order using the BINARY collation if the table declares nothing else
+            if (
+                not self.sql
+                and definition is not None
+                and (
+                    any((collation or "BINARY").upper() != "BINARY" for collation in table_collations.values())
+                    or any(
+                        re.search(r"\bDESC\b", text, re.IGNORECASE)
+                        for text in itertools.chain(definition.constraints, (c.description for c in definition.columns))
+                    )
+                )
+            ):
+                raise ValueError(f"Cannot determine the collations and sort order of index {self.name!r}")
+
+            collations = []
+            for column, collation in zip(self.columns, self.collations, strict=True):
+                collation = (collation or table_collations.get(column.lower()) or "BINARY").upper()
+                if collation not in COLLATIONS:
+                    raise ValueError(f"Unsupported collation {collation!r} of index {self.name!r}")
+                collations.append(collation)
+
+            self._key_order = collations, list(self.descending)
+
+        return self._key_order
+
 
 class Row:
-    def __init__(self, table: Table, cell: Cell):
+    """A row of a table.
+
+    The values are stored in a tuple, in the order of the columns of the table or of the projected columns.
+    The mapping of column names to positions in the tuple is shared by all rows of a table or scan. Values
+    can be accessed by attribute (``row.name``), by key (``row["name"]``) or by position (``row[0]``).
+
+    A lazy row only parses the record header of the cell, every value is decoded on first access. Overflow
+    pages are only read once a value that is stored on them is accessed.
+    """
+
+    __slots__ = ("_cell", "_columns", "_lazy", "_table", "_unknowns", "_values")
+
+    def __init__(
+        self,
+        table: Table,
+        cell: Cell,
+        projection: list[tuple[int, Column]] | None = None,
+        columns: dict[str, int] | None = None,
+        lazy: bool = False,
+    ):
         self._table = table
         self._cell = cell
-        self._values, self._unknowns = self._match_columns_to_values(table.columns, cell.values)
+        self._unknowns = ()
+        self._lazy = None
+
+        if projection is None:
+            self._columns = table._column_map
+        else:
+            self._columns = _map_columns([column for _, column in projection]) if columns is None else columns
+
+        if lazy:
+            # The values are decoded by _load(), the positions of the values that are not decoded yet are Empty
+            self._lazy = table._all_columns if projection is None else projection
+            self._values = [Empty] * len(self._lazy)
+
+            num_columns = len(table.columns)
+            if projection is None and len(cell.types) > num_columns:
+                self._unknowns = tuple(cell.value(idx) for idx in range(num_columns, len(cell.types)))
+            return
+
+        if projection is None:
+            values, self._unknowns = self._match_columns_to_values(table.columns, cell.values)
+        else:
+            values = self._read_projected_values(projection)
 
         # If there is no primary key or the primary key is a compound key,
         # primary_key will be None, but then all (primary key) columns will
         # already have a value assigned.
         primary_key = table.primary_key
-        if primary_key and self._values.get(primary_key, None) is None and self._cell.key is not None:
-            self._values[primary_key] = self._cell.key
+        if primary_key and self._cell.key is not None:
+            idx = self._columns.get(primary_key)
+            if idx is not None and values[idx] is None:
+                values[idx] = self._cell.key
 
-    def _match_columns_to_values(self, columns: list[Column], values: list[Any]) -> tuple[dict[str, Any], list[Any]]:
+        self._values = tuple(values)
+
+    @classmethod
+    def from_values(cls, table: Table, values: tuple[Any, ...], columns: dict[str, int] | None = None) -> Row:
+        """Create a row of ``table`` from already decoded values, e.g. from :meth:`Table.scan_parallel`.
+
+        ``columns`` maps the column names to the positions in ``values``, by default all columns of the table.
+        """
+        row = cls.__new__(cls)
+        row._table = table
+        row._cell = None
+        row._columns = table._column_map if columns is None else columns
+        row._values = tuple(values)
+        row._unknowns = ()
+        row._lazy = None
+        return row
+
+    def _match_columns_to_values(self, columns: list[Column], values: list[Any]) -> tuple[list[Any], tuple[Any]]:
         """Match all table columns to the cell values in this row.
 
-        If there are any cell values with unknown column names
-        they get added to the unknown list.
+        Columns without a cell value get their default value. If there are any cell values with unknown
+        column names they are returned separately.
         """
+        num_columns = len(columns)
+        if len(values) >= num_columns:
+            return values[:num_columns], tuple(values[num_columns:])
 
-        row_values = {}
-        unknowns = []
+        return values + [column.default_value for column in columns[len(values) :]], ()
 
-        for column, value in itertools.zip_longest(columns, values, fillvalue=Empty):
-            column_value = column.default_value if value is Empty else value
-            if column is Empty:
-                unknowns.append(column_value)
-            else:
-                row_values.update({column.name: column_value})
+    def _read_projected_values(self, projection: list[tuple[int, Column]]) -> list[Any]:
+        """Decode only the values of the given ``(index, column)`` pairs in this row.
+
+        The other values in the record are skipped, and overflow pages are only read when needed.
+        """
+        cell = self._cell
+        num_values = len(cell.types)
 
-        return row_values, unknowns
+        return [cell.value(idx) if idx < num_values else column.default_value for idx, column in projection]
+
+    def _load(self, pos: int) -> Any:
+        """Decode the value at position ``pos`` of a lazy row."""
+        idx, column = self._lazy[pos]
+        cell = self._cell
+
+        value = cell.value(idx) if idx < len(cell.types) else column.default_value
+        if value is None and cell.key is not None and column.name == self._table.primary_key:
+            value = cell.key
+
+        self._values[pos] = value
+        return value
 
     def __iter__(self) -> Iterator[tuple[str, Any]]:
-        for col in self._table.columns:
-            yield col.name, self[col.name]
+        for name, idx in self._columns.items():
+            yield name, self[idx]
 
-    def __getitem__(self, key: str) -> Any:
+    def __getitem__(self, key: str | int) -> Any:
+        if isinstance(key, int):
+            value = self._values[key]
+            return self._load(key % len(self._values)) if value is Empty else value
         return self.get(key)
 
     def __getattr__(self, key: str) -> Any:
-        try:
-            return self[key]
-        except KeyError:
-            return object.__getattribute__(self, key)
+        # Only called for names that are not a slot or method, so unknown columns are None like get()
+        if key.startswith("__"):
+            raise AttributeError(key)
+        return self.get(key)
 
     def __repr__(self) -> str:
-        values = " ".join([f"{key}={value!r}" for key, value in self._values.items()])
+        values = " ".join([f"{key}={value!r}" for key, value in self])
         return f"<Row table={self._table.name} {values}>"
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self._values.get(key, default)
+        idx = self._columns.get(key)
+        if idx is None:
+            return default
+
+        value = self._values[idx]
+        return self._load(idx) if value is Empty else value
+
+    def open(self, column: str) -> BinaryIO:
+        """Return a file-like object of the undecoded bytes of the value of ``column``.
+
+        TEXT values are not decoded, so the bytes are in the text encoding of the database. The value is read
+        on demand, so large TEXT and BLOB values stored on overflow pages can be read in constant memory.
+        """
+        if self._cell is None:
+            raise ValueError("Row has no cell to read the value from")
+
+        (idx, column), *_ = self._table._projection([column])
+        if idx < len(self._cell.types):
+            return self._cell.open_value(idx)
+
+        # The value is not stored in the record, so it is the default value of the column
+        value = column.default_value
+        if isinstance(value, str):
+            value = value.encode(self._table.sqlite.encoding)
+        return BytesIO(value if isinstance(value, bytes) else b"")
+
+
+class RowChange:
+    """A row that is inserted, updated or deleted between two views of a database.
+
+    Args:
+        table: The name of the table of the row.
+        old: The row before the change, or ``None`` if it is inserted.
+        new: The row after the change, or ``None`` if it is deleted.
+    """
+
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+    def __init__(self, table: str, old: Row | None, new: Row | None):
+        self.table = table
+        self.old = old
+        self.new = new
+
+        if old is None:
+            self.type = self.INSERT
+        elif new is None:
+            self.type = self.DELETE
+        else:
+            self.type = self.UPDATE
+
+    def __repr__(self) -> str:
+        return f"<RowChange table={self.table} type={self.type} key={self.key!r}>"
+
+    @property
+    def key(self) -> int | None:
+        """The rowid of the changed row, or ``None`` for ``WITHOUT ROWID`` tables."""
+        return (self.new or self.old)._cell.key
 
 
 class Empty:
     pass
 
 
+def _map_columns(columns: list[Column]) -> dict[str, int]:
+    """Map the names of ``columns`` to their position in the values of a row."""
+    return {column.name: idx for idx, column in enumerate(columns)}
+
+
 class Page:
-    def __init__(self, sqlite: SQLite3, num: int):
+    def __init__(self, sqlite: SQLite3, num: int, data: bytes | memoryview | None = None):
         self.sqlite = sqlite
         self.num = num
 
-        self.data = sqlite.raw_page(num)
+        self.data = sqlite.raw_page(num) if data is None else data
         self.offset = (num - 1) * sqlite.page_size
-        buf = memoryview(self.data)
+        self.buf = buf = memoryview(self.data)
 
         header_len = len(c_sqlite3.page_header)
         self.header = c_sqlite3.page_header(buf[:header_len])
@@ -302,12 +1249,10 @@ class Page:
             c_sqlite3.PAGE_TYPE_INTERIOR_INDEX,
             c_sqlite3.PAGE_TYPE_INTERIOR_TABLE,
         ):
-            self.right_page = c_sqlite3.uint32(buf[fp : fp + 4])
+            self.right_page = int.from_bytes(buf[fp : fp + 4], "big")
             fp += 4
 
-        self.cell_pointers = c_sqlite3.uint16[self.header.cell_count](buf[fp : fp + (self.header.cell_count * 2)])
-
-        self.cell = lru_cache(256)(self.cell)
+        self.cell_pointers = list(struct.unpack_from(f">{self.header.cell_count}H", buf, fp))
 
     def __repr__(self) -> str:
         page_type = PAGE_TYPES[self.header.flags]
@@ -340,34 +1285,63 @@ class Cell:
 
         self._data = None
         self._types = None
+        self._offsets = None
         self._values = None
 
         sqlite = page.sqlite
-        cell_buf = BytesIO(page.data[self._offset :])
+        buf = page.buf
+        offset = self._offset
 
         self.max_payload_size = (sqlite.usable_page_size - 12) * 64 // 255 - 23
         self.min_payload_size = (sqlite.usable_page_size - 12) * 32 // 255 - 23
 
-        if page.header.flags == c_sqlite3.PAGE_TYPE_LEAF_TABLE:
-            self.size = varint(cell_buf)
-            self.key = varint(cell_buf)
+        flags = page.header.flags
+        if flags == c_sqlite3.PAGE_TYPE_LEAF_TABLE:
+            self.size, offset = decode_varint(buf, offset)
+            self.key, offset = decode_varint(buf, offset)
             self.max_payload_size = sqlite.usable_page_size - 35
-        elif page.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE:
-            self.left_page = c_sqlite3.uint32(cell_buf)
-            self.key = varint(cell_buf)
-        elif page.header.flags == c_sqlite3.PAGE_TYPE_LEAF_INDEX:
-            self.size = varint(cell_buf)
-        elif page.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_INDEX:
-            self.left_page = c_sqlite3.uint32(cell_buf)
-            self.size = varint(cell_buf)
+        elif flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE:
+            self.left_page = int.from_bytes(buf[offset : offset + 4], "big")
+            self.key, offset = decode_varint(buf, offset + 4)
+        elif flags == c_sqlite3.PAGE_TYPE_LEAF_INDEX:
+            self.size, offset = decode_varint(buf, offset)
+        elif flags == c_sqlite3.PAGE_TYPE_INTERIOR_INDEX:
+            self.left_page = int.from_bytes(buf[offset : offset + 4], "big")
+            self.size, offset = decode_varint(buf, offset + 4)
         else:
             raise InvalidPageType("Unknown page type")
 
-        self._record_offset = cell_buf.tell()
+        # Rowids are signed 64-bit integers
+        if self.key is not None and self.key & 0x8000000000000000:
+            self.key -= 0x10000000000000000
+
+        self._record_offset = offset - self._offset
+
+        # The number of payload bytes stored on the page itself and the first overflow page for the rest
+        self.local_size = self.size
+        self.overflow_page = None
+
+        if self.size is not None and self.size > self.max_payload_size:
+            min_local = self.min_payload_size
+            surplus = min_local + (self.size - min_local) % (sqlite.usable_page_size - 4)
+            self.local_size = surplus if surplus <= self.max_payload_size else min_local
+            self.overflow_page = int.from_bytes(buf[offset + self.local_size : offset + self.local_size + 4], "big")
 
     def __repr__(self) -> str:
         return f"<Cell page={self.page.num} offset=0x{self.offset:x}>"
 
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Cell):
+            return (
+                other.page.sqlite is self.page.sqlite
+                and other.page.num == self.page.num
+                and other.offset == self.offset
+            )
+        return False
+
+    def __hash__(self) -> int:
+        return hash((self.page.num, self.offset))
+
     @property
     def data(self) -> bytes:
         if self.size is None:
@@ -376,58 +1350,73 @@ class Cell:
         if not self._data:
             offset = self._offset + self._record_offset
             page_data = self.page.data
-            page_size = self.page.sqlite.page_size
 
-            if self.size <= self.max_payload_size:
+            if self.overflow_page is None:
                 size = max(self.size, 4)
 
-                buf = page_data[offset : offset + size]
+                buf = bytes(page_data[offset : offset + size])
             else:
                 # If the data does not fit in a single page, there is an
-                # overflow. The last 4 bytes of the first page will contain the
-                # next (overflow) page number. Each subsequent overflow page
-                # will have the next overflow page in the first 4 bytes (which
-                # are 0 if there is no next overflow page), followed by the
-                # page data.
-                result = []
+                # overflow. The rest of the data is stored in a chain of
+                # overflow pages, see OverflowStream.
+                buf = self.open().read()
 
-                min_local = self.min_payload_size
-                max_local = self.max_payload_size
-                surplus = min_local + (self.size - min_local) % (self.page.sqlite.usable_page_size - 4)
+            self._data = buf
 
-                local_size = surplus if surplus <= max_local else min_local
+        return self._data
 
-                local_buf = page_data[offset : offset + local_size + 4]
-                result.append(local_buf[:-4])
+    def open(self, readahead: int = OVERFLOW_READAHEAD) -> OverflowStream:
+        """Return a file-like object of the payload of this cell.
 
-                overflow_page = c_sqlite3.uint32(local_buf[-4:])
-                overflow_size = self.size - local_size
+        Overflow pages are read on demand, so large payloads can be read in constant memory. Up to
+        ``readahead`` consecutive overflow pages are read at once, see :class:`OverflowStream`.
+        """
+        if self.size is None:
+            raise NoCellData("Cell has no data")
+        return OverflowStream(self, readahead=readahead)
 
-                while overflow_page:
-                    # page_size is the total page size, including the 4 bytes
-                    # for the next overflow page in front of the page data.
-                    # overflow_size is the size of the page data without the
-                    # extra 4 bytes for the next overflow page, so it needs to
-                    # be added.
-                    data_size = min(overflow_size + 4, page_size)
-                    page_buf = self.page.sqlite.raw_page(overflow_page)[:data_size]
+    def open_value(self, idx: int) -> OverflowStream:
+        """Return a file-like object of the undecoded bytes of a single value of the record.
 
-                    overflow_page = c_sqlite3.uint32(page_buf[:4])
-                    result.append(page_buf[4:])
+        Only the overflow pages holding the bytes that are actually read are read.
+        """
+        if self._offsets is None:
+            self._read_header()
 
-                buf = b"".join(result)
+        return OverflowStream(self, self._offsets[idx], serial_type_size(self._types[idx]))
 
-            self._data = buf
+    def _read_record(self) -> None:
+        buf, offset = self._payload(self.size)
+        self._types, self._values = decode_record(buf, offset, self.page.sqlite.encoding)
 
-        return self._data
+    def _read_header(self) -> None:
+        if self.size is None:
+            raise NoCellData("Cell has no data")
 
-    def _read_record(self) -> None:
-        self._types, self._values = read_record(BytesIO(self.data), self.page.sqlite.encoding)
+        offset = self._offset + self._record_offset
+        header_size, _ = decode_varint(self.page.buf, offset)
+
+        buf, offset = self._payload(header_size)
+        self._types, offsets, _ = decode_record_header(buf, offset)
+        self._offsets = [value_offset - offset for value_offset in offsets]
+
+    def _payload(self, size: int) -> tuple[memoryview, int]:
+        """Return a buffer and offset of the payload that holds at least the first ``size`` bytes.
+
+        Only if those bytes are not all stored on the page itself, the overflow pages are read.
+        """
+        if self.size is None:
+            raise NoCellData("Cell has no data")
+
+        if size <= self.local_size:
+            # Decode in place from the page buffer
+            return self.page.buf, self._offset + self._record_offset
+        return memoryview(self.data), 0
 
     @property
     def types(self) -> list[int]:
         if not self._types:
-            self._read_record()
+            self._read_header()
 
         return self._types
 
@@ -438,10 +1427,161 @@ class Cell:
 
         return self._values
 
+    def value(self, idx: int) -> int | float | str | bytes | None:
+        """Decode a single value of the record.
+
+        Overflow pages are only read if (part of) the value is not stored on the page itself.
+        """
+        if self._values:
+            return self._values[idx]
+
+        if self._offsets is None:
+            self._read_header()
+
+        type_ = self._types[idx]
+        offset = self._offsets[idx]
+
+        buf, payload_offset = self._payload(offset + serial_type_size(type_))
+        return decode_value(buf, payload_offset + offset, type_, self.page.sqlite.encoding)
+
+    def raw_value(self, idx: int, length: int | None = None) -> memoryview:
+        """Return the undecoded bytes of a single value of the record.
+
+        If ``length`` is given, at most that many bytes are returned. Overflow pages are only read if the
+        requested bytes are not all stored on the page itself.
+        """
+        if self._offsets is None:
+            self._read_header()
+
+        offset = self._offsets[idx]
+        size = serial_type_size(self._types[idx])
+        if length is not None:
+            size = min(size, length)
+
+        buf, payload_offset = self._payload(offset + size)
+        offset += payload_offset
+        return buf[offset : offset + size]
+
+
+class OverflowStream(AlignedStream):
+    """A file-like object of the payload of a cell, including the part stored on overflow pages.
+
+    The payload starts with the bytes stored on the page of the cell itself, followed by the data of the
+    overflow pages. Every overflow page starts with the number of the next overflow page, followed by
+    ``usable_page_size - 4`` bytes of payload. The position of any byte in the chain can therefore be
+    computed, only the page numbers have to be discovered by following the chain.
+
+    The numbers of the overflow pages are remembered while reading, so seeking back does not follow the chain
+    again. Seeking forward beyond the pages that were read so far only reads the pages in between for their
+    next page number.
+
+    Overflow chains are often stored on consecutive pages, e.g. after a ``VACUUM``. Pages are therefore read
+    in runs of consecutive pages with a single read, covering the requested range (up to ``OVERFLOW_MAX_RUN``
+    pages) or at least ``readahead`` pages. Pages of a run that turn out not to be the next pages of the chain
+    are discarded.
+
+    Args:
+        cell: The cell of which to read the payload.
+        offset: The offset in the payload the stream starts at.
+        size: The size of the stream, by default the rest of the payload.
+        readahead: The number of overflow pages to read at once, if they are consecutive in the database.
+    """
+
+    def __init__(self, cell: Cell, offset: int = 0, size: int | None = None, readahead: int = OVERFLOW_READAHEAD):
+        self.cell = cell
+        self.sqlite = cell.page.sqlite
+        self.offset = offset
+        self.readahead = max(readahead, 1)
+
+        local_offset = cell._offset + cell._record_offset
+        self.local = cell.page.buf[local_offset : local_offset + cell.local_size]
+        self.chunk_size = self.sqlite.usable_page_size - 4
+        # The number of overflow pages the payload needs
+        self.num_pages = -(-(cell.size - len(self.local)) // self.chunk_size)
+
+        # The overflow page numbers discovered so far
+        self.chain = [cell.overflow_page] if cell.overflow_page else []
+        # The overflow pages of the last run that was read, by their index in the chain
+        self._pages = {}
+
+        super().__init__(cell.size - offset if size is None else size, self.chunk_size)
+
+    def _read(self, offset: int, length: int) -> bytes:
+        local_size = len(self.local)
+        chunk_size = self.chunk_size
+
+        end = self.offset + min(offset + length, self.size)
+        offset += self.offset
+        result = []
+
+        if offset < local_size:
+            result.append(self.local[offset : min(end, local_size)])
+            offset += len(result[-1])
+
+        last_idx = (end - 1 - local_size) // chunk_size
+        while offset < end:
+            idx, chunk_offset = divmod(offset - local_size, chunk_size)
+            data = self._overflow_page(idx, last_idx)
+
+            chunk = data[4 + chunk_offset : 4 + min(chunk_size, chunk_offset + end - offset)]
+            result.append(chunk)
+            offset += len(chunk)
+
+        return b"".join(result)
+
+    def _overflow_page(self, idx: int, last_idx: int) -> bytes | memoryview:
+        """Return the data of the ``idx``-th overflow page, following the chain as far as necessary.
+
+        ``last_idx`` is the index of the last overflow page the current read needs.
+        """
+        if (data := self._pages.get(idx)) is not None:
+            return data
+
+        if not self.chain:
+            raise InvalidDatabase(f"{self.cell!r} has no overflow pages")
+
+        while len(self.chain) <= idx:
+            self._read_run(len(self.chain) - 1, last_idx)
+
+        return self._read_run(idx, last_idx)
+
+    def _read_run(self, idx: int, last_idx: int) -> bytes | memoryview:
+        """Read the ``idx``-th overflow page and the following pages, if they are consecutive pages."""
+        if (data := self._pages.get(idx)) is not None:
+            return data
+
+        chain = self.chain
+        count = min(max(min(last_idx - idx + 1, OVERFLOW_MAX_RUN), self.readahead), self.num_pages - idx)
+
+        self._pages = {}
+        for i, data in enumerate(self.sqlite.raw_pages(chain[idx], count)):
+            self._pages[idx + i] = data
+            if idx + i == len(chain) - 1:
+                self._follow(data)
+
+            # Only continue with the run while the chain continues on the next page
+            if idx + i + 1 >= len(chain) or chain[idx + i + 1] != chain[idx] + i + 1:
+                break
+
+        if idx not in self._pages:
+            raise InvalidDatabase(f"Overflow page {chain[idx]} of {self.cell!r} is beyond the end of the database")
+        return self._pages[idx]
+
+    def _follow(self, data: bytes | memoryview) -> None:
+        """Add the next page number in ``data`` to the chain, if the payload continues after it."""
+        if len(self.chain) >= self.num_pages:
+            return
+
+        next_page = int.from_bytes(data[:4], "big")
+        if next_page == 0:
+            raise InvalidDatabase(f"Overflow chain of {self.cell!r} ends after {len(self.chain)} pages")
+        self.chain.append(next_page)
+
 
 class WAL:
     def __init__(self, fh: BinaryIO):
         self.fh = fh
+        self.reader = PositionalReader(fh)
         self.header = c_sqlite3.wal_header(fh)
 
         if self.header.magic not in WAL_HEADER_MAGIC:
@@ -449,33 +1589,129 @@ class WAL:
 
         self.checksum_endian = "<" if self.header.magic == WAL_HEADER_MAGIC_LE else ">"
         self._checkpoints = None
+        self._index = None
+        self._page_map = None
+        self._page_count = None
+        self._commit_idx = None
+        self._page_frames = None
 
+        self.cache_token = cache_token()
         self.frame = lru_cache(1024)(self.frame)
 
-    def frame(self, frame_idx: int) -> WALFrame:
+    @property
+    def valid(self) -> bool:
+        """Whether the checksum of the WAL header is valid."""
+        header = c_sqlite3.wal_header.dumps(self.header)[:24]
+        return wal_checksum(header, self.checksum_endian) == (self.header.checksum1, self.header.checksum2)
+
+    @property
+    def page_map(self) -> dict[int, WALFrame]:
+        """The most recent committed frame for every page in the WAL.
+
+        Only frames up to and including the last valid commit frame are used. Frames are valid if their
+        salts match the WAL header and the cumulative checksum over the WAL header and all preceding frames
+        matches. Like SQLite, the first invalid frame ends the WAL.
+        """
+        if self._page_map is None:
+            self._build_page_map()
+        return self._page_map
+
+    @property
+    def page_count(self) -> int | None:
+        """The size of the database in pages after the last valid commit, or ``None`` if there is none."""
+        if self._page_map is None:
+            self._build_page_map()
+        return self._page_count
+
+    @property
+    def commit_idx(self) -> int | None:
+        """The index of the last valid commit frame, or ``None`` if there is none."""
+        if self._page_map is None:
+            self._build_page_map()
+        return self._commit_idx
+
+    @property
+    def index(self) -> WALIndex:
+        """The index of all frame headers in the WAL."""
+        if self._index is None:
+            self._index = WALIndex(self)
+        return self._index
+
+    def _build_page_map(self) -> None:
+        index = self.index
+        page_numbers = index.page_numbers
+        commit_sizes = index.commit_sizes
+
+        page_map = {}
+        page_count = None
+        commit_idx = None
+        pending = {}
+
+        for frame_idx in range(index.valid_count):
+            pending[page_numbers[frame_idx]] = frame_idx
+
+            if commit_sizes[frame_idx] != 0:
+                # Commit frame
+                page_map.update(pending)
+                page_count = commit_sizes[frame_idx]
+                commit_idx = frame_idx
+                pending = {}
+
+        self._page_count = page_count
+        self._commit_idx = commit_idx
+        # Assigned last, other threads only use the results once this is set
+        self._page_map = {page: self.frame(frame_idx) for page, frame_idx in page_map.items()}
+
+    def find_frame(self, page: int, commit_idx: int) -> int | None:
+        """Return the index of the most recent frame of ``page`` up to and including frame ``commit_idx``.
+
+        Returns ``None`` if the page is not in any of those frames.
+        """
+        if self._page_frames is None:
+            page_frames = {}
+            for frame_idx, page_number in enumerate(self.index.page_numbers):
+                if page_number not in page_frames:
+                    page_frames[page_number] = array("I")
+                page_frames[page_number].append(frame_idx)
+            self._page_frames = page_frames
+
+        if (frames := self._page_frames.get(page)) is None:
+            return None
+
+        if (i := bisect_right(frames, commit_idx)) == 0:
+            return None
+        return frames[i - 1]
+
+    def frame_offset(self, frame_idx: int) -> int:
+        """Return the offset of the frame with the given index in the WAL."""
         frame_size = len(c_sqlite3.wal_frame) + self.header.page_size
-        offset = len(c_sqlite3.wal_header) + frame_idx * frame_size
-        return WALFrame(self, offset)
+        return len(c_sqlite3.wal_header) + frame_idx * frame_size
+
+    def frame_idx(self, offset: int) -> int:
+        """Return the index of the frame at the given offset in the WAL."""
+        frame_size = len(c_sqlite3.wal_frame) + self.header.page_size
+        return (offset - len(c_sqlite3.wal_header)) // frame_size
+
+    def frame(self, frame_idx: int) -> WALFrame:
+        header = None
+        if self._index is not None and frame_idx < len(self._index):
+            header = self._index.frame_header(frame_idx)
+        return WALFrame(self, self.frame_offset(frame_idx), header)
 
     def frames(self) -> Iterator[WALFrame]:
-        frame_idx = 0
-        while True:
-            try:
-                yield self.frame(frame_idx)
-                frame_idx += 1
-            except EOFError:  # noqa: PERF203
-                break
+        for frame_idx in range(len(self.index)):
+            yield self.frame(frame_idx)
 
     def checkpoints(self) -> list[WALCheckpoint]:
         if not self._checkpoints:
             checkpoints = []
             frames = []
 
-            for frame in self.frames():
+            for frame_idx, frame in enumerate(self.frames()):
                 frames.append(frame)
 
                 if frame.page_count != 0:
-                    checkpoints.append(WALCheckpoint(self, frames))
+                    checkpoints.append(WALCheckpoint(self, frames, frame_idx))
                     frames = []
 
             self._checkpoints = checkpoints
@@ -484,15 +1720,17 @@ class WAL:
 
 
 class WALFrame:
-    def __init__(self, wal: WAL, offset: int):
+    def __init__(self, wal: WAL, offset: int, header: c_sqlite3.wal_frame | None = None):
         self.wal = wal
         self.offset = offset
 
         self.fh = wal.fh
+        self.reader = wal.reader
         self._data = None
 
-        self.fh.seek(offset)
-        self.header = c_sqlite3.wal_frame(self.fh)
+        if header is None:
+            header = c_sqlite3.wal_frame(self.reader.read(offset, len(c_sqlite3.wal_frame)))
+        self.header = header
 
     def __repr__(self) -> str:
         return f"<WALFrame page_number={self.page_number} page_count={self.page_count}>"
@@ -507,10 +1745,13 @@ class WALFrame:
     @property
     def data(self) -> bytes:
         if not self._data:
-            self.fh.seek(self.offset + len(c_sqlite3.wal_frame))
-            self._data = self.fh.read(self.wal.header.page_size)
+            self._data = self.read_data()
         return self._data
 
+    def read_data(self) -> bytes:
+        """Read the page data of this frame, without caching it."""
+        return self.reader.read(self.offset + len(c_sqlite3.wal_frame), self.wal.header.page_size)
+
     @property
     def page_number(self) -> int:
         return self.header.page_number
@@ -521,9 +1762,11 @@ class WALFrame:
 
 
 class WALCheckpoint:
-    def __init__(self, wal: WAL, frames: list[WALFrame]):
+    def __init__(self, wal: WAL, frames: list[WALFrame], commit_idx: int | None = None):
         self.wal = wal
         self.frames = frames
+        # The index of the commit frame of this checkpoint in the WAL
+        self.commit_idx = commit_idx if commit_idx is not None else wal.frame_idx(frames[-1].offset)
         self._page_map = None
 
     def __contains__(self, page: int) -> bool:
@@ -545,80 +1788,966 @@ class WALCheckpoint:
     def get(self, page: int, default: Any = None) -> WALFrame:
         return self.page_map.get(page, default)
 
+    @property
+    def page_count(self) -> int:
+        """The size of the database in pages after this commit."""
+        return self.frames[-1].page_count
+
+
+class WALIndex:
+    """Compact index of the frame headers in a WAL.
+
+    The WAL is read sequentially in chunks of multiple frames. The frame headers are stored in arrays and
+    the cumulative checksum chain is verified per chunk, using NumPy if it is available.
+
+    Args:
+        wal: The WAL to index.
+        chunk_size: The (approximate) number of bytes to read at once.
+    """
+
+    def __init__(self, wal: WAL, chunk_size: int = 8 * 1024 * 1024):
+        self.wal = wal
+
+        self.page_numbers = array("I")
+        self.commit_sizes = array("I")
+        self.salt1 = array("I")
+        self.salt2 = array("I")
+        self.checksum1 = array("I")
+        self.checksum2 = array("I")
+
+        # The number of leading frames that have valid salts and checksums
+        self.valid_count = 0
+
+        self._build(chunk_size)
+
+    def __len__(self) -> int:
+        return len(self.page_numbers)
+
+    def __repr__(self) -> str:
+        return f"<WALIndex frames={len(self)} valid={self.valid_count}>"
+
+    def frame_header(self, frame_idx: int) -> c_sqlite3.wal_frame:
+        """Return the header of the frame with the given index."""
+        return c_sqlite3.wal_frame(
+            page_number=self.page_numbers[frame_idx],
+            page_count=self.commit_sizes[frame_idx],
+            salt1=self.salt1[frame_idx],
+            salt2=self.salt2[frame_idx],
+            checksum1=self.checksum1[frame_idx],
+            checksum2=self.checksum2[frame_idx],
+        )
+
+    def _build(self, chunk_size: int) -> None:
+        wal = self.wal
+        header = wal.header
+
+        page_size = header.page_size
+        frame_size = len(c_sqlite3.wal_frame) + page_size
+        frames_per_chunk = max(1, chunk_size // frame_size)
+
+        # Verification stops at the first invalid frame, and so does SQLite
+        checksum = (header.checksum1, header.checksum2) if wal.valid else None
+
+        offset = len(c_sqlite3.wal_header)
+        while True:
+            buf = wal.reader.read(offset, frames_per_chunk * frame_size)
+
+            num_frames = len(buf) // frame_size
+            if num_frames == 0:
+                break
+
+            buf = memoryview(buf)[: num_frames * frame_size]
+            first_idx = len(self)
+
+            # Unpack all frame headers at once, skipping the page data
+            page_numbers, commit_sizes, salt1, salt2, checksum1, checksum2 = zip(
+                *struct.iter_unpack(f">6I{page_size}x", buf), strict=True
+            )
+            self.page_numbers.extend(page_numbers)
+            self.commit_sizes.extend(commit_sizes)
+            self.salt1.extend(salt1)
+            self.salt2.extend(salt2)
+            self.checksum1.extend(checksum1)
+            self.checksum2.extend(checksum2)
+
+            if checksum is not None:
+                checksum = self._verify(buf, first_idx, num_frames, checksum)
+
+            if num_frames < frames_per_chunk:
+                break
+            offset += num_frames * frame_size
+
+    def _verify(
+        self, buf: memoryview, first_idx: int, num_frames: int, checksum: tuple[int, int]
+    ) -> tuple[int, int] | None:
+        """Verify the salts and checksums of a chunk of frames, starting at frame ``first_idx``.
+
+        Returns the checksum to continue the chain with, or ``None`` if an invalid frame is found.
+        """
+        wal_header = self.wal.header
+        frame_size = len(c_sqlite3.wal_frame) + wal_header.page_size
+
+        # The checksum of a frame covers the first 8 bytes of the frame header and the page data
+        checksums = wal_frame_checksums(buf, num_frames, frame_size, self.wal.checksum_endian)
+        next_checksum = wal_checksum_step((frame_size - 16) // 4)
+
+        s0, s1 = checksum
+        for frame_idx, (d0, d1) in enumerate(checksums, first_idx):
+            if self.salt1[frame_idx] != wal_header.salt1 or self.salt2[frame_idx] != wal_header.salt2:
+                return None
+
+            s0, s1 = next_checksum(s0, s1, d0, d1)
+            if s0 != self.checksum1[frame_idx] or s1 != self.checksum2[frame_idx]:
+                return None
+
+            self.valid_count += 1
+
+        return s0, s1
+
+
+def wal_frame_checksums(buf: memoryview, num_frames: int, frame_size: int, endian: str) -> list[tuple[int, int]]:
+    """Calculate the checksum contribution of each frame in ``buf``, as if the checksum chain started at zero.
+
+    The WAL checksum is linear in its input, so the contributions of all frames can be calculated independently
+    and combined with the running checksum afterwards (see :func:`wal_checksum_step`).
+    """
+    if HAS_NUMPY:
+        words = np.frombuffer(buf, dtype=f"{endian}u4").reshape(num_frames, frame_size // 4).astype(np.uint64)
+        # Skip the salts and checksums in the frame header
+        words = np.concatenate((words[:, :2], words[:, 6:]), axis=1)
+
+        coefficients0, coefficients1 = _wal_checksum_coefficients(words.shape[1])
+        # Integer overflow wraps around modulo 2**64, which is a multiple of 2**32
+        sums0 = (words @ np.array(coefficients0, dtype=np.uint64)) & 0xFFFFFFFF
+        sums1 = (words @ np.array(coefficients1, dtype=np.uint64)) & 0xFFFFFFFF
+        return list(zip(sums0.tolist(), sums1.tolist(), strict=True))
+
+    result = []
+    for frame_idx in range(num_frames):
+        offset = frame_idx * frame_size
+        frame = buf[offset : offset + frame_size]
+        s0, s1 = wal_checksum(frame[:8], endian)
+        result.append(wal_checksum(frame[24:], endian, s0, s1))
+    return result
+
+
+@lru_cache(8)
+def _wal_checksum_coefficients(num_words: int) -> tuple[list[int], list[int]]:
+    """Return the coefficients of every word in the closed form of the WAL checksum of ``num_words`` words.
+
+    Every pair of words ``(a, b)`` updates the checksum as ``s0 += a + s1; s1 += b + s0``. Unrolling this
+    gives ``s0 = sum(w[i] * F(n - 1 - i))`` and ``s1 = sum(w[i] * F(n - i))``, with ``F`` the Fibonacci
+    sequence modulo 2**32.
+    """
+    fib = _fibonacci(num_words + 1)
+    return [fib[num_words - 1 - i] for i in range(num_words)], [fib[num_words - i] for i in range(num_words)]
+
+
+def _fibonacci(n: int) -> list[int]:
+    fib = [0, 1]
+    while len(fib) <= n:
+        fib.append((fib[-1] + fib[-2]) & 0xFFFFFFFF)
+    return fib
+
+
+def wal_checksum_step(num_words: int) -> Callable[[int, int, int, int], tuple[int, int]]:
+    """Return a function that continues a checksum chain ``(s0, s1)`` with the checksum contribution
+    ``(d0, d1)`` of ``num_words`` words (see :func:`wal_frame_checksums`).
+    """
+    # Continuing from (s0, s1) adds M**(num_words / 2) @ (s0, s1), with M = [[1, 1], [1, 2]]
+    fib = _fibonacci(num_words + 1)
+    m00, m01, m11 = fib[num_words - 1], fib[num_words], fib[num_words + 1]
+
+    def step(s0: int, s1: int, d0: int, d1: int) -> tuple[int, int]:
+        return (m00 * s0 + m01 * s1 + d0) & 0xFFFFFFFF, (m01 * s0 + m11 * s1 + d1) & 0xFFFFFFFF
+
+    return step
+
 
-def wal_checksum(buf: bytes, endian: str = ">") -> tuple[int, int]:
-    """For future use, will be used when WAL is fully implemented"""
+def wal_checksum(buf: bytes, endian: str = ">", s0: int = 0, s1: int = 0) -> tuple[int, int]:
+    """Calculate the WAL checksum of ``buf``, continuing from the checksum ``(s0, s1)``."""
 
-    s0 = s1 = 0
     num_ints = len(buf) // 4
     arr = struct.unpack(f"{endian}{num_ints}I", buf)
 
-    for int_num in range(0, num_ints, 2):
-        s0 = (s0 + (arr[int_num] + s1)) & 0xFFFFFFFF
-        s1 = (s1 + (arr[int_num + 1] + s0)) & 0xFFFFFFFF
+    for a, b in zip(arr[0::2], arr[1::2], strict=True):
+        s0 = (s0 + a + s1) & 0xFFFFFFFF
+        s1 = (s1 + b + s0) & 0xFFFFFFFF
 
     return s0, s1
 
 
-def walk_tree(sqlite: SQLite3, page: Page) -> Iterator[Cell]:
-    if page.header.flags in (
-        c_sqlite3.PAGE_TYPE_LEAF_TABLE,
-        c_sqlite3.PAGE_TYPE_LEAF_INDEX,
-    ):
-        for cell in page.cells():
-            yield cell
+def walk_tree(
+    sqlite: SQLite3,
+    page: Page,
+    min_key: int | None = None,
+    max_key: int | None = None,
+    reverse: bool = False,
+    physical: bool = False,
+) -> Iterator[Cell]:
+    """Walk the B-tree starting at ``page`` and yield all leaf cells.
+
+    For table B-trees, ``min_key`` and ``max_key`` limit the walk to the (inclusive) rowid range. Only the
+    subtrees that can hold rowids in that range are visited. If ``reverse`` is set, the cells of a table
+    B-tree are yielded in descending rowid order.
+
+    The walk is iterative. The child pages of an interior page are read in batches in file offset order, see
+    :meth:`SQLite3.read_pages`. The first batch is a single page and every next batch is twice as large, up to
+    ``WALK_BATCH_SIZE`` pages, so a walk that is stopped early only reads the pages it needs. If ``physical``
+    is set, the children in a batch are also visited in file offset order instead of key order, so the cells
+    are not yielded in key order. A cycle in a corrupt database raises :class:`InvalidDatabase`. Only the pages
+    on the path from ``page`` to the current page are tracked for this, as a cycle has to pass through one of
+    them, so the memory used by the walk only depends on the depth of the B-tree.
+    """
+    # The interior pages on the path from the root to the current page
+    path = set()
+    # Every level of the walk is the parent page and an iterator of the pages to descend into and the cells to
+    # yield, in order
+    stack = [(None, iter((page,)))]
+
+    while stack:
+        parent, items = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            path.discard(parent)
+            continue
+
+        if isinstance(item, Cell):
+            yield item
+            continue
+
+        page = item
+        flags = page.header.flags
+        if flags == c_sqlite3.PAGE_TYPE_LEAF_TABLE:
+            start = 0 if min_key is None else _bisect_cells(page, min_key)
+            end = page.header.cell_count if max_key is None else _bisect_cells(page, max_key + 1)
+
+            indices = range(start, end)
+            for idx in reversed(indices) if reverse else indices:
+                yield page.cell(idx)
+        elif flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE:
+            # Child idx holds the rowids up to and including the key of cell idx,
+            # the right page (idx == cell_count) holds everything beyond the last key
+            start = 0 if min_key is None else _bisect_cells(page, min_key)
+            end = page.header.cell_count if max_key is None else _bisect_cells(page, max_key)
+
+            indices = range(start, end + 1)
+            children = [
+                page.cell(idx).left_page if idx < page.header.cell_count else page.right_page
+                for idx in (reversed(indices) if reverse else indices)
+            ]
+            path.add(page.num)
+            stack.append((page.num, _walk_children(sqlite, page, children, path, physical)))
+        elif flags == c_sqlite3.PAGE_TYPE_LEAF_INDEX:
+            yield from page.cells()
+        elif flags == c_sqlite3.PAGE_TYPE_INTERIOR_INDEX:
+            # Contrary to table B-trees, the cells on interior index pages are entries of the index themselves,
+            # they are yielded after the subtree of their left page
+            cells = list(page.cells())
+            children = [cell.left_page for cell in cells] + [page.right_page]
+            path.add(page.num)
+            stack.append((page.num, _walk_children(sqlite, page, children, path, physical, cells)))
+        else:
+            raise InvalidPageType("Not a B-tree page")
+
+
+def _walk_children(
+    sqlite: SQLite3,
+    parent: Page,
+    children: list[int],
+    path: set[int],
+    physical: bool,
+    cells: list[Cell] | None = None,
+) -> Iterator[Page | Cell]:
+    """Yield the child pages of ``parent`` for :func:`walk_tree`, reading them in batches in file offset order.
+
+    ``path`` are the pages from the root up to and including ``parent``, a child that is one of them is part
+    of a cycle. For interior index pages, ``cells`` are the cells of the parent page, which are yielded after
+    their child.
+    """
+    batch_start = 0
+    batch_size = 1
+    while batch_start < len(children):
+        batch = children[batch_start : batch_start + batch_size]
+
+        for num in batch:
+            if num in path:
+                raise InvalidDatabase(f"Page {num} is referenced more than once in the B-tree (parent {parent.num})")
+
+        data = sqlite.read_pages(batch)
+        order = sorted(range(len(batch)), key=batch.__getitem__) if physical else range(len(batch))
+
+        for idx in order:
+            num = batch[idx]
+            # Pages beyond the end of the database are not returned, reading them again raises the error
+            yield Page(sqlite, num, data.get(num))
+
+            if cells is not None and batch_start + idx < len(cells):
+                yield cells[batch_start + idx]
+
+        batch_start += len(batch)
+        batch_size = min(batch_size * 2, WALK_BATCH_SIZE)
+
+
+def partition_tree(sqlite: SQLite3, root: int, count: int) -> list[int]:
+    """Split the table B-tree at ``root`` into at least ``count`` subtrees, if the tree is deep enough.
+
+    The B-tree is split level by level at the child pointers of the interior pages, so the returned subtrees
+    are in rowid order and together contain all leaf cells. Index B-trees also hold entries on their interior
+    pages, so these are not split.
+    """
+    pages = [root]
+    visited = {root}
+    while len(pages) < count:
+        children = []
+        for num in pages:
+            page = sqlite.page(num)
+            if page.header.flags != c_sqlite3.PAGE_TYPE_INTERIOR_TABLE:
+                # All leaves of a B-tree are at the same depth
+                return pages
+
+            children.extend(cell.left_page for cell in page.cells())
+            children.append(page.right_page)
+
+        if not visited.isdisjoint(children) or len(set(children)) != len(children):
+            raise InvalidDatabase(f"A page is referenced more than once in the B-tree at page {root}")
+        visited.update(children)
+        pages = children
+
+    return pages
+
+
+# The databases opened by the workers of Table.scan, shared by the threads of a thread based executor
+_scan_databases = OpenDatabases(SCAN_MAX_OPEN_DATABASES)
+
+
+def _scan_subtree(
+    task: tuple[tuple[str, str | None, bool], int | None, str, int, int | None, int | None, bool, list | None, list],
+) -> list[tuple[Any, ...]]:
+    database, commit_idx, table_name, page, min_rowid, max_rowid, reverse, columns, where = task
+
+    path, wal_path, mmap = database
+    with _scan_databases.open(database, lambda: SQLite3.from_path(path, wal_path, mmap=mmap)) as sqlite:
+        if sqlite._commit_idx != commit_idx:
+            sqlite = sqlite._view(commit_idx)
+
+        table = sqlite.table(table_name)
+        return list(table._rows(page, min_rowid, max_rowid, reverse, columns, where, raw=True))
+
+
+def diff_tree(
+    old_sqlite: SQLite3 | None,
+    old_root: int | None,
+    new_sqlite: SQLite3 | None,
+    new_root: int | None,
+    context: _DiffContext | None = None,
+) -> Iterator[tuple[Cell | None, Cell | None]]:
+    """Yield the ``(old, new)`` pairs of cells that differ between two versions of a B-tree.
+
+    The pages with cells that both versions of the B-tree have in common, and that were not written by the
+    commits between the two views, hold the same cells and are skipped. Only the cells on these pages of
+    which an overflow page was written are decoded, see :meth:`_DiffContext.overflow_owners`. The
+    ``context`` of the two views can be shared by the diffs of all B-trees in them.
+
+    Cells of table B-trees are aligned by rowid and yielded in rowid order. The cells of index B-trees are
+    aligned by their complete record, so they are only ever inserted (``(None, new)``) or deleted
+    (``(old, None)``).
+    """
+    if context is None and old_sqlite is not None and new_sqlite is not None:
+        context = _DiffContext(old_sqlite, new_sqlite)
+
+    def content(sqlite: SQLite3, root: int | None) -> list[int]:
+        if not root:
+            return []
+        return context.tree(sqlite, root)[0] if context else _tree_pages(sqlite, root, leaves=False)[0]
+
+    old_content = content(old_sqlite, old_root)
+    new_content = content(new_sqlite, new_root)
+
+    owners = {}
+    unchanged = set()
+    if old_content and new_content:
+        unchanged = set(old_content).intersection(new_content) - context.touched
+        owners = context.overflow_owners()
+
+    old_cells = {_diff_key(cell): cell for cell in _changed_cells(old_sqlite, old_content, unchanged, owners)}
+    new_cells = {_diff_key(cell): cell for cell in _changed_cells(new_sqlite, new_content, unchanged, owners)}
+
+    keys = old_cells.keys() | new_cells.keys()
+    if all(isinstance(key, int) for key in keys):
+        keys = sorted(keys)
     else:
-        for cell in page.cells():
-            left_page = sqlite.page(cell.left_page)
-            for cell in walk_tree(sqlite, left_page):
-                yield cell
+        keys = [key for key in old_cells if key not in new_cells] + [key for key in new_cells if key not in old_cells]
+
+    for key in keys:
+        old_cell = old_cells.get(key)
+        new_cell = new_cells.get(key)
+        if old_cell is None or new_cell is None or _cell_changed(old_cell, new_cell, owners):
+            yield old_cell, new_cell
+
+
+class _DiffContext:
+    """The state of a diff between two views of the same database, shared by the diffs of all B-trees in it.
+
+    The pages written by the commits between the views are read from the WAL index once. The pages of every
+    B-tree are collected once per view, and the cells that own the written overflow pages are found once
+    for all B-trees.
+    """
+
+    def __init__(self, old: SQLite3, new: SQLite3):
+        self.old = old
+        self.new = new
+        self.touched = old._touched_pages(new)
+
+        self._trees: dict[tuple[bool, int], tuple[list[int], set[int]]] = {}
+        self._owners = None
+
+    def tree(self, sqlite: SQLite3, root: int) -> tuple[list[int], set[int]]:
+        """Return the pages with cells and all pages of the B-tree at ``root`` in either view."""
+        key = (sqlite is self.new, root)
+        if (pages := self._trees.get(key)) is None:
+            pages = self._trees[key] = _tree_pages(sqlite, root, leaves=False)
+        return pages
+
+    def overflow_owners(self) -> dict[int, set[int]]:
+        """Return the offsets of the cells of which an overflow page was written, by page number.
+
+        Written pages that are not part of a B-tree, the freelist or the pointer map of either view are
+        overflow pages. The overflow chains of the cells of all B-trees are followed until all of these pages
+        are accounted for, starting with the chains of which the first page was written. As long as no page
+        outside of the B-trees was written, no overflow chain is followed at all.
+        """
+        if self._owners is not None:
+            return self._owners
+
+        self._owners = owners = {}
+
+        old_content = []
+        new_content = []
+        remaining = set(self.touched)
+        for sqlite, content in ((self.old, old_content), (self.new, new_content)):
+            # Page 1 is the root of sqlite_master
+            roots = [1] + [tree.page for tree in itertools.chain(sqlite.tables(), sqlite.indices()) if tree.page]
+            for root in roots:
+                tree_content, tree_pages = self.tree(sqlite, root)
+                content.extend(tree_content)
+                remaining -= tree_pages
+            remaining -= _freelist_pages(sqlite)
+            remaining = {num for num in remaining if not _is_ptrmap_page(sqlite, num)}
+
+        if not remaining:
+            return owners
+
+        # Pages that are not written hold the same cells in both views
+        unchanged = set(old_content).intersection(new_content) - self.touched
+        pages = [(self.old, num) for num in old_content if num not in unchanged]
+        pages += [(self.new, num) for num in new_content if num not in unchanged]
+        pages += [(self.new, num) for num in unchanged]
+
+        def follow(sqlite: SQLite3, num: int, offset: int, first: int) -> None:
+            chain = set(_overflow_chain(sqlite, first))
+            if not remaining.isdisjoint(chain):
+                owners.setdefault(num, set()).add(offset)
+                remaining.difference_update(chain)
+
+        # The chains of which the first page was written are followed right away, the others are remembered by
+        # their first page and the number of pages in the chain
+        candidates = []
+        overflow_size = self.new.usable_page_size - 4
+        for sqlite, num in pages:
+            for cell in _content_page(sqlite, num).cells():
+                if not cell.overflow_page:
+                    continue
+
+                if cell.overflow_page in remaining:
+                    follow(sqlite, num, cell.offset, cell.overflow_page)
+                    if not remaining:
+                        return owners
+                else:
+                    count = -(-(cell.size - cell.local_size) // overflow_size)
+                    candidates.append((sqlite, num, cell.offset, cell.overflow_page, count))
+
+        # Overflow pages are usually allocated consecutively, so first follow the chains that would hold a written
+        # page if they were, then all others
+        written = sorted(remaining)
+
+        def covers(candidate: tuple[SQLite3, int, int, int, int]) -> bool:
+            first, count = candidate[3:]
+            idx = bisect_left(written, first)
+            return idx < len(written) and written[idx] < first + count
+
+        candidates.sort(key=covers, reverse=True)
+        for sqlite, num, offset, first, _ in candidates:
+            follow(sqlite, num, offset, first)
+            if not remaining:
+                break
+
+        return owners
+
+
+def _tree_pages(sqlite: SQLite3, root: int, leaves: bool = True) -> tuple[list[int], set[int]]:
+    """Return the numbers of the pages with cells and of all pages of the B-tree starting at ``root``.
+
+    Only interior pages are parsed, the cells on the leaf pages are not. If ``leaves`` is not set, the leaf
+    pages are not read either: all leaf pages of a B-tree are at the same depth, so all children of an
+    interior page are leaf pages if its first child is one.
+    """
+    content = []
+    pages = set()
+
+    stack = [root]
+    while stack:
+        num = stack.pop()
+        if num in pages:
+            continue
+        pages.add(num)
+
+        page = sqlite.page(num)
+        flags = page.header.flags
+        if flags in (c_sqlite3.PAGE_TYPE_LEAF_TABLE, c_sqlite3.PAGE_TYPE_LEAF_INDEX):
+            content.append(num)
+            continue
+
+        if flags == c_sqlite3.PAGE_TYPE_INTERIOR_INDEX:
+            content.append(num)
+
+        children = [cell.left_page for cell in page.cells()] + [page.right_page]
+        if (
+            not leaves
+            and children[0] not in pages
+            and sqlite.page(children[0]).header.flags
+            in (
+                c_sqlite3.PAGE_TYPE_LEAF_TABLE,
+                c_sqlite3.PAGE_TYPE_LEAF_INDEX,
+            )
+        ):
+            for child in children:
+                if child not in pages:
+                    pages.add(child)
+                    content.append(child)
+            continue
+
+        stack.extend(reversed(children))
+
+    return content, pages
+
+
+def _content_page(sqlite: SQLite3, num: int) -> Page:
+    """Return a page with cells found by :func:`_tree_pages`, which must not be an interior table page."""
+    page = sqlite.page(num)
+    if page.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE:
+        raise InvalidDatabase(f"Page {num} is not a leaf page, the B-tree is not balanced")
+    return page
+
+
+def _changed_cells(
+    sqlite: SQLite3 | None, content: list[int], unchanged: set[int], owners: dict[int, set[int]]
+) -> Iterator[Cell]:
+    for num in content:
+        if num not in unchanged:
+            yield from _content_page(sqlite, num).cells()
+        elif num in owners:
+            # The content of an overflow chain can be overwritten without writing the page of the cell itself
+            offsets = owners[num]
+            for cell in _content_page(sqlite, num).cells():
+                if cell.offset in offsets:
+                    yield cell
+
+
+def _cell_changed(old: Cell, new: Cell, owners: dict[int, set[int]]) -> bool:
+    """Return whether the payload of two versions of a cell differs.
+
+    The overflow pages of a cell are only read if the cell owns a written overflow page, or if the cells
+    point to a different overflow chain.
+    """
+    if old.size != new.size:
+        return True
+
+    old_local = _local_payload(old)
+    new_local = _local_payload(new)
+    if not old.overflow_page:
+        return old_local != new_local
+
+    # The last 4 bytes are the number of the first overflow page
+    if old_local[:-4] != new_local[:-4]:
+        return True
+
+    if (
+        old.overflow_page == new.overflow_page
+        and old.offset not in owners.get(old.page.num, ())
+        and new.offset not in owners.get(new.page.num, ())
+    ):
+        return False
+
+    return old.data != new.data
+
+
+def _local_payload(cell: Cell) -> memoryview:
+    """Return the payload stored on the page of ``cell``, including the number of its first overflow page."""
+    offset = cell._offset + cell._record_offset
+    size = cell.local_size + (4 if cell.overflow_page else 0)
+    return cell.page.buf[offset : offset + size]
+
 
-        right_page = sqlite.page(page.right_page)
-        for cell in walk_tree(sqlite, right_page):
-            yield cell
+def _overflow_chain(sqlite: SQLite3, num: int) -> Iterator[int]:
+    """Yield the numbers of the pages of the overflow chain starting at page ``num``, through the page cache."""
+    seen = set()
+    while 0 < num <= sqlite.page_count and num not in seen:
+        seen.add(num)
+        yield num
+        num = int.from_bytes(sqlite.page_data(num)[:4], "big")
 
 
-def read_record(fh: BinaryIO, encoding: str) -> tuple[list[int], list[int | float | str | bytes | None]]:
+def _freelist_pages(sqlite: SQLite3) -> set[int]:
+    """Return the numbers of the trunk and leaf pages of the freelist, only the trunk pages are read."""
+    pages = set()
+
+    trunk = sqlite.header.first_freelist_page
+    while 1 < trunk <= sqlite.page_count and trunk not in pages:
+        pages.add(trunk)
+        data = sqlite.page_data(trunk)
+
+        leaf_count = min(int.from_bytes(data[4:8], "big"), (sqlite.usable_page_size - 8) // 4)
+        pages.update(int.from_bytes(data[8 + idx * 4 : 12 + idx * 4], "big") for idx in range(leaf_count))
+        trunk = int.from_bytes(data[0:4], "big")
+
+    return pages
+
+
+def _is_ptrmap_page(sqlite: SQLite3, num: int) -> bool:
+    """Return whether page ``num`` is a pointer map page of an auto-vacuum database."""
+    if not sqlite.header.largest_root_btree_page:
+        return False
+    # Every pointer map page is followed by the pages it holds a 5 byte entry for
+    return num >= 2 and (num - 2) % (sqlite.usable_page_size // 5 + 1) == 0
+
+
+def _diff_key(cell: Cell) -> int | bytes:
+    return cell.key if cell.key is not None else cell.data
+
+
+def walk_index(
+    sqlite: SQLite3,
+    page: Page,
+    lo: list[Any] | None,
+    hi: list[Any] | None,
+    collations: list[str] | None = None,
+    descending: list[bool] | None = None,
+) -> Iterator[Cell]:
+    """Walk the index B-tree starting at ``page`` and yield the cells with a record between ``lo`` and ``hi``.
+
+    Records are compared to the bounds on the number of values in the bound, so a bound can be a prefix of
+    the indexed values. A bound of ``None`` means the range is unbounded on that side. The bounds are in
+    index order, i.e. using the ``collations`` and ``descending`` sort order of the columns, see
+    :func:`compare_record`.
+
+    Like :func:`walk_tree`, the B-tree is walked with an explicit stack and the child pages within the range
+    are read in batches. A cycle in a corrupt database raises an :class:`InvalidDatabase` error.
+    """
+    encoding = sqlite.encoding
+    # The interior pages on the path from the root to the current page
+    path = set()
+    # Every level of the walk is the parent page and an iterator of the pages to descend into and the cells to
+    # yield, in order
+    stack = [(None, iter((page,)))]
+
+    while stack:
+        parent, items = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            path.discard(parent)
+            continue
+
+        if isinstance(item, Cell):
+            yield item
+            continue
+
+        page = item
+        is_leaf = page.header.flags == c_sqlite3.PAGE_TYPE_LEAF_INDEX
+        if not is_leaf and page.header.flags != c_sqlite3.PAGE_TYPE_INTERIOR_INDEX:
+            raise InvalidPageType("Not an index page")
+
+        cell_count = page.header.cell_count
+        start = 0 if lo is None else _bisect_index_cells(page, lo, 0, encoding, collations, descending)
+        end = cell_count if hi is None else _bisect_index_cells(page, hi, start, encoding, collations, descending, True)
+
+        if is_leaf:
+            for idx in range(start, end):
+                yield page.cell(idx)
+            continue
+
+        # The left page of the first cell beyond ``hi`` can still hold records up to and including ``hi``
+        cells = [page.cell(idx) for idx in range(start, end)]
+        children = [cell.left_page for cell in cells]
+        children.append(page.cell(end).left_page if end < cell_count else page.right_page)
+        path.add(page.num)
+        stack.append((page.num, _walk_children(sqlite, page, children, path, False, cells)))
+
+
+def _bisect_index_cells(
+    page: Page,
+    record: list[Any],
+    start: int,
+    encoding: str,
+    collations: list[str] | None,
+    descending: list[bool] | None,
+    after: bool = False,
+) -> int:
+    """Return the index of the first cell from ``start`` that does not sort before ``record`` on the index page.
+
+    If ``after`` is set, return the index of the first cell that sorts after ``record`` instead.
+    """
+    end = page.header.cell_count
+    while start < end:
+        mid = (start + end) // 2
+        result = compare_record(page.cell(mid).values, record, encoding, collations, descending)
+        if result < 0 or (after and result == 0):
+            start = mid + 1
+        else:
+            end = mid
+    return start
+
+
+def compare_record(
+    a: list[Any],
+    b: list[Any],
+    encoding: str,
+    collations: list[str] | None = None,
+    descending: list[bool] | None = None,
+) -> int:
+    """Compare two records using the SQLite sort order.
+
+    ``collations`` and ``descending`` are the collation and sort order of the values by position, values
+    beyond their length use the ``BINARY`` collation and are sorted in ascending order. Only the values up to
+    the length of the shortest record are compared, so a record always compares equal to its prefix. Returns
+    a negative number, zero or a positive number if ``a`` sorts before, equal to or after ``b``.
+    """
+    for idx, (value_a, value_b) in enumerate(zip(a, b, strict=False)):
+        collation = collations[idx] if collations and idx < len(collations) else "BINARY"
+        result = compare_value(value_a, value_b, encoding, collation)
+        if result:
+            return -result if descending and idx < len(descending) and descending[idx] else result
+    return 0
+
+
+def compare_value(a: Any, b: Any, encoding: str, collation: str = "BINARY") -> int:
+    """Compare two values using the SQLite sort order and the given built-in collation.
+
+    ``NULL`` values sort first, followed by INTEGER and REAL values in numerical order, TEXT values in
+    the order of their collation (the encoded bytes for ``BINARY``) and finally BLOB values in ``memcmp()``
+    order.
+    """
+    class_a = _sort_class(a)
+    class_b = _sort_class(b)
+    if class_a != class_b:
+        return class_a - class_b
+
+    if class_a == 0:
+        return 0
+
+    if class_a == 2:
+        key = COLLATIONS[collation]
+        a = key(a, encoding)
+        b = key(b, encoding)
+
+    return (a > b) - (a < b)
+
+
+def _sort_class(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    return 3
+
+
+def _normalize_key(key: Any) -> list[Any] | None:
+    if key is None:
+        return None
+    if isinstance(key, (list, tuple)):
+        return list(key)
+    return [key]
+
+
+def find_rowid(sqlite: SQLite3, page: Page, rowid: int) -> Cell | None:
+    """Find the cell with the given rowid in the table B-tree starting at ``page``.
+
+    Each cell on an interior table page holds the largest rowid of its left child, so the child page that can
+    hold ``rowid`` is found with a binary search over the cell keys of every interior page on the way down.
+    A page that is reached twice, e.g. because of a cycle in a corrupt database, raises :class:`InvalidDatabase`.
+    """
+    visited = {page.num}
+    while page.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE:
+        idx = _bisect_cells(page, rowid)
+        child = page.cell(idx).left_page if idx < page.header.cell_count else page.right_page
+        if child in visited:
+            raise InvalidDatabase(f"Page {child} is referenced more than once in the B-tree (parent {page.num})")
+        visited.add(child)
+        page = sqlite.page(child)
+
+    if page.header.flags != c_sqlite3.PAGE_TYPE_LEAF_TABLE:
+        return None
+
+    idx = _bisect_cells(page, rowid)
+    if idx < page.header.cell_count:
+        cell = page.cell(idx)
+        if cell.key == rowid:
+            return cell
+    return None
+
+
+def _bisect_cells(page: Page, key: int) -> int:
+    """Return the index of the first cell on a table B-tree page with a key that is not less than ``key``."""
+    lo = 0
+    hi = page.header.cell_count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if page.cell(mid).key < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def read_record(
+    fh: BinaryIO, encoding: str, use_cstruct: bool = False
+) -> tuple[list[int], list[int | float | str | bytes | None]]:
+    """Read the record at the current offset of ``fh``.
+
+    Only the record itself is read: first the header, then the values of the sizes its serial types call for.
+    ``fh`` is left at the offset directly following the record.
+    """
     start = fh.tell()
     size = varint(fh)
-    end = start + size
+
+    fh.seek(start)
+    header = fh.read(size)
+    _, _, end = decode_record_header(header, 0)
+
+    buf = header + fh.read(end - size) if end > size else header
+    types, values, _ = _decode_record(memoryview(buf), 0, encoding, use_cstruct)
+
+    return types, values
+
+
+def decode_record(
+    buf: bytes | memoryview, offset: int, encoding: str, use_cstruct: bool = False
+) -> tuple[list[int], list[int | float | str | bytes | None]]:
+    """Decode the record starting at ``offset`` in ``buf``.
+
+    ``buf`` is usually a ``memoryview`` of a page or payload buffer, so the record is decoded without
+    copying anything other than the resulting values. If ``use_cstruct`` is set, the fixed size serial
+    types are decoded using the (slower) ``dissect.cstruct`` reference implementation.
+    """
+    types, values, _ = _decode_record(memoryview(buf), offset, encoding, use_cstruct)
+    return types, values
+
+
+def decode_record_header(buf: bytes | memoryview, offset: int) -> tuple[list[int], list[int], int]:
+    """Decode the header of the record starting at ``offset`` in ``buf``.
+
+    Returns a tuple of the serial types of the values, the offsets of the values in ``buf`` and the offset
+    directly following the last value.
+    """
+    size, header_offset = decode_varint(buf, offset)
+    end = offset + size
 
     types = []
-    while fh.tell() < end:
-        types.append(varint(fh))
+    offsets = []
+    offset = end
+    while header_offset < end:
+        type_ = buf[header_offset]
+        if type_ < 0x80:
+            header_offset += 1
+        else:
+            type_, header_offset = decode_varint(buf, header_offset)
+
+        types.append(type_)
+        offsets.append(offset)
+        offset += serial_type_size(type_)
+
+    return types, offsets, offset
+
+
+def serial_type_size(type_: int) -> int:
+    """Return the size in bytes of a value with the given serial type."""
+    if type_ >= 12:
+        return (type_ - 12) >> 1
+    # Serial types 10 and 11 are reserved and should not occur, treat them as having no content
+    return SERIAL_TYPE_SIZES.get(type_, 0)
+
+
+def decode_value(buf: bytes | memoryview, offset: int, type_: int, encoding: str) -> int | float | str | bytes | None:
+    """Decode a single value with the given serial type at ``offset`` in ``buf``."""
+    if type_ >= 12:
+        size = (type_ - 12) >> 1
+        if type_ & 1:
+            try:
+                return str(buf[offset : offset + size], encoding)
+            except UnicodeDecodeError as e:
+                return e.object
+        return bytes(buf[offset : offset + size])
+
+    if type_ in SERIAL_TYPE_DECODERS:
+        return SERIAL_TYPE_DECODERS[type_](buf, offset)
+    return None
+
+
+def _decode_record(
+    buf: memoryview, offset: int, encoding: str, use_cstruct: bool = False
+) -> tuple[list[int], list[int | float | str | bytes | None], int]:
+    types, offsets, end = decode_record_header(buf, offset)
 
     values = []
-    for type_ in types:
-        if type_ in SERIAL_TYPES:
-            val = SERIAL_TYPES[type_](fh)
-        else:
-            if type_ % 2 == 0:
-                val = fh.read((type_ - 12) // 2)
-            else:
+    for type_, offset in zip(types, offsets, strict=True):
+        if type_ >= 12:
+            size = (type_ - 12) >> 1
+            if type_ & 1:
                 try:
-                    val = fh.read((type_ - 13) // 2).decode(encoding)
+                    val = str(buf[offset : offset + size], encoding)
                 except UnicodeDecodeError as e:
                     val = e.object
+            else:
+                val = bytes(buf[offset : offset + size])
+        elif use_cstruct and type_ in SERIAL_TYPES:
+            size = SERIAL_TYPE_SIZES[type_]
+            val = SERIAL_TYPES[type_](buf[offset : offset + size] if size else None)
+        elif type_ in SERIAL_TYPE_DECODERS:
+            val = SERIAL_TYPE_DECODERS[type_](buf, offset)
+        else:
+            val = None
 
         values.append(val)
 
-    return types, values
+    return types, values, end
 
 
 def varint(fh: BinaryIO) -> int:
-    byte_num = 0
-    value = 0
+    start = fh.tell()
+    value, size = decode_varint(fh.read(9), 0)
+    fh.seek(start + size)
+    return value
 
-    while True:
-        val = ord(fh.read(1))
 
-        if byte_num == 8:
-            value |= val
-            return value
+def decode_varint(buf: bytes | memoryview, offset: int) -> tuple[int, int]:
+    """Decode the varint at ``offset`` in ``buf``.
 
-        value |= val & 0x7F
-        if val & 0x80:
-            value = value << 7
-            byte_num += 1
-        else:
-            return value
+    Returns a tuple of the decoded value and the offset directly following the varint.
+    """
+    value = buf[offset]
+    if not value & 0x80:
+        return value, offset + 1
+
+    value = 0
+    for byte_num in range(8):
+        val = buf[offset + byte_num]
+        value = (value << 7) | (val & 0x7F)
+        if not val & 0x80:
+            return value, offset + byte_num + 1
+
+    # The ninth byte contributes all of its 8 bits
+    return (value << 8) | buf[offset + 8], offset + 9
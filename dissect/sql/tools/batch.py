@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from dissect.sql.batch import DEFAULT_BATCH_SIZE, DEFAULT_CACHE_SIZE, process
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+def parse_table_spec(specs: list[str]) -> dict[str, list[str] | None] | None:
+    """Parse ``TABLE`` or ``TABLE:COLUMN,COLUMN`` table specifications."""
+    if not specs:
+        return None
+
+    tables = {}
+    for spec in specs:
+        name, _, columns = spec.partition(":")
+        tables[name] = [column.strip() for column in columns.split(",")] if columns else None
+    return tables
+
+
+def positive_int(value: str) -> int:
+    """Parse a positive integer command line argument."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def iter_paths(paths: list[Path]) -> Iterator[Path]:
+    """Yield the given files, and all files in the given directories except WAL and journal files."""
+    for path in paths:
+        if path.is_dir():
+            for file in sorted(path.rglob("*")):
+                if file.is_file() and not file.name.endswith(("-wal", "-shm", "-journal")):
+                    yield file
+        else:
+            yield path
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Read tables from many SQLite3 databases in parallel and write the rows as JSON lines.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("paths", metavar="PATH", type=Path, nargs="+", help="databases or directories of databases")
+    parser.add_argument(
+        "-t",
+        "--table",
+        dest="tables",
+        metavar="TABLE[:COLUMN,...]",
+        action="append",
+        help="table (and columns) to read, can be given multiple times, all tables by default",
+    )
+    parser.add_argument("-w", "--workers", type=int, help="number of worker processes, the number of CPUs by default")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="page cache size per worker")
+    parser.add_argument(
+        "--batch-size", type=positive_int, default=DEFAULT_BATCH_SIZE, help="maximum number of rows per batch"
+    )
+    parser.add_argument("--no-wal", action="store_true", help="do not read the WAL files of the databases")
+    args = parser.parse_args()
+
+    errors = 0
+    results = process(
+        iter_paths(args.paths),
+        parse_table_spec(args.tables),
+        workers=args.workers,
+        cache_size=args.cache_size,
+        batch_size=args.batch_size,
+        wal=not args.no_wal,
+    )
+
+    for result in results:
+        if result.error is not None:
+            errors += 1
+            record = {"path": str(result.path), "table": result.table, "error": repr(result.error)}
+            print(json.dumps(record), file=sys.stderr)
+            continue
+
+        for row in result.rows:
+            record = {
+                "path": str(result.path),
+                "table": result.table,
+                "row": dict(zip(result.columns, row, strict=True)),
+            }
+            print(json.dumps(record, default=_json_default))
+
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,56 +1,119 @@
 from __future__ import annotations
 
 import re
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
 
 from dissect.sql.exceptions import InvalidSQL
 
 if TYPE_CHECKING:
     from collections.abc import Iterator
 
+TOKEN_WHITESPACE = "whitespace"
+TOKEN_COMMENT = "comment"
+TOKEN_STRING = "string"
+TOKEN_BLOB = "blob"
+TOKEN_IDENTIFIER = "identifier"
+TOKEN_NUMBER = "number"
+TOKEN_WORD = "word"
+TOKEN_PUNCTUATION = "punctuation"
+
+TOKENIZER_EXPRESSION = re.compile(
+    r"""
+    (?P<whitespace>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<blob>[xX]'[0-9a-fA-F]*')
+    | (?P<string>'(?:[^']|'')*'?)
+    | (?P<identifier>"(?:[^"]|"")*"?|`(?:[^`]|``)*`?|\[[^\]]*\]?)
+    | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<word>[^\W\d][\w$]*)
+    | (?P<punctuation>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# The keywords that start a table constraint, if followed by a parenthesized list or expression
+TABLE_CONSTRAINTS = ("CONSTRAINT", "UNIQUE", "CHECK", "FOREIGN", "PRIMARY")
+
+# The keywords that end the declared type of a column definition
+COLUMN_CONSTRAINTS = (
+    "CONSTRAINT",
+    "PRIMARY",
+    "NOT",
+    "NULL",
+    "UNIQUE",
+    "CHECK",
+    "DEFAULT",
+    "COLLATE",
+    "REFERENCES",
+    "GENERATED",
+    "AS",
+)
+
+
+class Token(NamedTuple):
+    type: str
+    value: str
+    start: int
+    end: int
+
+
+class ColumnDefinition(NamedTuple):
+    """A column definition of a ``CREATE TABLE`` statement."""
+
+    name: str
+    #: The declared type, or an empty string if the column has no type
+    type: str
+    #: The declared type and constraints, as in the SQL statement
+    description: str
+    #: The default value, if it is a literal, otherwise ``None``
+    default: bool | int | float | str | bytes | None
+    primary_key: bool
+    #: The name of the collation of the column, or ``None`` if it has no ``COLLATE`` clause
+    collation: str | None
+
+
+class TableDefinition(NamedTuple):
+    """A parsed ``CREATE TABLE`` statement."""
+
+    name: str | None
+    columns: tuple[ColumnDefinition, ...]
+    #: The table constraints, as in the SQL statement
+    constraints: tuple[str, ...]
+    #: The names of the primary key columns, in the order of the key
+    primary_key: tuple[str, ...]
+    without_rowid: bool
+
+
+class IndexDefinition(NamedTuple):
+    """A parsed ``CREATE INDEX`` statement."""
+
+    name: str | None
+    table: str | None
+    #: The indexed column names, or the SQL of the expressions
+    columns: tuple[str, ...]
+    unique: bool
+    #: The SQL of the ``WHERE`` clause of a partial index
+    where: str | None
+    #: The name of the collation of every indexed column, or ``None`` if it has no ``COLLATE`` clause
+    collations: tuple[str | None, ...]
+    #: Whether every indexed column is sorted in descending order
+    descending: tuple[bool, ...]
+
+
+def tokenize(sql: str) -> Iterator[Token]:
+    """Tokenize a SQL statement in a single pass, including whitespace and comments."""
+    for match in TOKENIZER_EXPRESSION.finditer(sql):
+        yield Token(match.lastgroup, match.group(), match.start(), match.end())
+
 
 def split_sql_list(sql: str) -> Iterator[str]:
     """Split a string on comma's (``,``) while ignoring any comma's contained
-    within an arbitrary level of nested braces (``( )``)
+    within an arbitrary level of nested braces (``( )``), strings and comments
     """
-    level = 0
-    comment = 0
-    quote = None
-    line_buf = ""
-
-    for char in sql:
-        if not quote and char == "-" and comment != 2:
-            comment += 1
-        elif comment == 2 and char == "\n":
-            comment = 0
-        elif comment != 2:
-            if comment == 1:
-                line_buf += "-"
-                comment = 0
-
-            if char == "(":
-                level += 1
-                line_buf += char
-            elif char == ")":
-                level -= 1
-                line_buf += char
-            elif char == "," and level == 0:
-                yield line_buf.strip()
-                line_buf = ""
-            else:
-                if char in ('"', "'", "`"):
-                    if not quote:
-                        quote = char
-                    elif char == quote:
-                        quote = None
-                line_buf += char
-
-    if level != 0:
-        bracket_type = "(" if level < 0 else ")"
-        raise InvalidSQL(f"Not a valid SQL list definition: {sql!r} missing {level} {bracket_type}'s")
+    tokens = _significant_tokens(sql)
 
-    if line_buf:
-        yield line_buf.strip()
+    yield from (item for item in (_text(sql, part) for part in _split_list(sql, tokens)) if item)
 
 
 def parse_table_columns_constraints(sql: str) -> tuple[str | None, list[str], list[str]]:
@@ -62,84 +125,306 @@ def parse_table_columns_constraints(sql: str) -> tuple[str | None, list[str], li
     (primary_key, [column, ...], [table_constraint, ...])
     where column is a tuple of:
     (column_name, column_type_constraint)
+
+    The primary key is only returned if it consists of a single column, see
+    :func:`parse_create_table` for compound primary keys.
     """
-    primary_key = None
-    columns = []
-    table_constraints = []
-
-    # The column definitions and table constraints are a comma separated list
-    # of definitions between the outer most `(...)' in the CREATE TABLE
-    # statement, e.g.:
-    # CREATE TABLE foo (col1, col2, CONSTRAINT)
-    #
-    # See https://sqlite.org/lang_createtable.html and
-    # https://sqlite.org/syntax/create-table-stmt.html
-    #
-    # re.DOTALL is needed since the SQL statement may be formatted using
-    # `\n' and we want the newline to be regarded as any other character.
-    column_sql = re.search(r"\((.+)\)", sql, flags=re.DOTALL)
-    if not column_sql:
+    table = parse_create_table(sql)
+
+    primary_key = table.primary_key[0] if len(table.primary_key) == 1 else None
+    columns = [(column.name, column.description) for column in table.columns]
+    return primary_key, columns, list(table.constraints)
+
+
+def split_column_def(sql: str, column_def: str) -> tuple[str, str]:
+    """Splits the column definition to name and constraint."""
+    tokens = _significant_tokens(column_def)
+    if not tokens:
+        raise InvalidSQL(f"Not a valid CREATE TABLE definition: empty column definition in {sql!r}")
+
+    return _unquote(tokens[0]), _text(column_def, tokens[1:])
+
+
+def get_primary_key_from_constraint(column_type_constraint: str, column_def: str, sql: str) -> str | None:
+    """Finds a primary key from sql string.
+
+    Only a primary key of a single column is returned, not compound keys or expressions.
+    """
+    tokens = _significant_tokens(column_type_constraint)
+
+    start = next((idx for idx, token in enumerate(tokens) if token.value == "("), None)
+    end = _matching_paren(column_type_constraint, tokens, start) if start is not None else None
+    if end is None or end == start + 1:
+        raise InvalidSQL(
+            f"Not a valid CREATE TABLE definition: invalid PRIMARY KEY table constraint {column_def!r} in {sql!r}"
+        )
+
+    key_columns = _split_list(column_type_constraint, tokens[start + 1 : end])
+    if len(key_columns) == 1 and len(key_columns[0]) == 1:
+        return _unquote(key_columns[0][0])
+    return None
+
+
+@lru_cache(maxsize=4096)
+def parse_create_table(sql: str) -> TableDefinition:
+    """Parse a ``CREATE TABLE`` statement.
+
+    Identical statements are only parsed once, the result is immutable and shared.
+    """
+    tokens = _significant_tokens(sql)
+
+    start = next((idx for idx, token in enumerate(tokens) if token.value == "("), None)
+    if start is None:
         raise InvalidSQL(
             f"Not a valid CREATE TABLE definition: no column definitions or table constraints found in {sql!r}"
         )
 
-    for column_def in split_sql_list(column_sql.groups()[0]):
-        column_name, column_type_constraint = split_column_def(sql, column_def)
-
-        if column_name.upper() == "PRIMARY":
-            primary_key = get_primary_key_from_constraint(column_type_constraint, column_def, sql)
-        elif "PRIMARY KEY" in column_type_constraint.upper():
-            primary_key = column_name
-
-        if "(" in column_def and column_name.upper().startswith(
-            (
-                "CONSTRAINT",
-                "UNIQUE",
-                "CHECK",
-                "FOREIGN",
-                "PRIMARY",
-            )
+    end = _matching_paren(sql, tokens, start)
+    name = _unquote(tokens[start - 1]) if start > 0 else None
+
+    columns = []
+    constraints = []
+    primary_key = []
+
+    definitions = _split_list(sql, tokens[start + 1 : end])
+    for idx, definition in enumerate(definitions):
+        if not definition:
+            if idx == len(definitions) - 1:
+                # Trailing comma
+                continue
+            raise InvalidSQL(f"Not a valid CREATE TABLE definition: empty column definition in {sql!r}")
+
+        first = definition[0]
+        if (
+            first.type == TOKEN_WORD
+            and first.value.upper() in TABLE_CONSTRAINTS
+            and any(token.value == "(" for token in definition)
         ):
-            table_constraints.append(column_def)
+            constraints.append(_text(sql, definition))
+
+            if (key := _find_keywords(definition, "PRIMARY", "KEY")) is not None:
+                key_start = next((i for i in range(key, len(definition)) if definition[i].value == "("), None)
+                if key_start is not None:
+                    key_end = _matching_paren(sql, definition, key_start)
+                    key_columns = _split_list(sql, definition[key_start + 1 : key_end])
+                    primary_key = [_unquote(column[0]) for column in key_columns if column]
+            continue
+
+        column = _parse_column(sql, definition)
+        if column.primary_key:
+            primary_key = [column.name]
+        columns.append(column)
+
+    without_rowid = _find_keywords(tokens, "WITHOUT", "ROWID", start=end + 1) is not None
+
+    return TableDefinition(name, tuple(columns), tuple(constraints), tuple(primary_key), without_rowid)
+
 
+@lru_cache(maxsize=4096)
+def parse_create_index(sql: str) -> IndexDefinition:
+    """Parse a ``CREATE INDEX`` statement.
+
+    Identical statements are only parsed once, the result is immutable and shared.
+    """
+    tokens = _significant_tokens(sql)
+
+    on = next((idx for idx, token in enumerate(tokens) if _is_keyword(token, "ON")), None)
+    if on is None or on + 2 >= len(tokens) or tokens[on + 2].value != "(":
+        raise InvalidSQL(f"Not a valid CREATE INDEX definition: {sql!r}")
+
+    start = on + 2
+    end = _matching_paren(sql, tokens, start)
+
+    unique = any(_is_keyword(token, "UNIQUE") for token in tokens[:on])
+    name = _unquote(tokens[on - 1]) if on > 0 and not _is_keyword(tokens[on - 1], "INDEX") else None
+
+    columns = []
+    collations = []
+    descending = []
+    for column in _split_list(sql, tokens[start + 1 : end]):
+        order = None
+        if len(column) > 1 and (_is_keyword(column[-1], "ASC") or _is_keyword(column[-1], "DESC")):
+            order = column[-1].value.upper()
+            column = column[:-1]
+
+        collation = None
+        if len(column) > 2 and _is_keyword(column[-2], "COLLATE"):
+            collation = _unquote(column[-1])
+            column = column[:-2]
+
+        if column:
+            columns.append(_unquote(column[0]) if len(column) == 1 else _text(sql, column))
+            collations.append(collation)
+            descending.append(order == "DESC")
+
+    where = None
+    if end + 1 < len(tokens) and _is_keyword(tokens[end + 1], "WHERE"):
+        where = _text(sql, tokens[end + 2 :]) or None
+
+    return IndexDefinition(
+        name, _unquote(tokens[on + 1]), tuple(columns), unique, where, tuple(collations), tuple(descending)
+    )
+
+
+@lru_cache(maxsize=4096)
+def parse_column_description(description: str) -> tuple[str, bool | int | float | str | bytes | None, bool]:
+    """Parse the type and constraints of a column definition, i.e. without the column name.
+
+    Returns a tuple of the declared type, the default value if it is a literal and whether the column is
+    (part of) the primary key.
+    """
+    return _parse_column_description(description)[:3]
+
+
+@lru_cache(maxsize=4096)
+def _parse_column_description(
+    description: str,
+) -> tuple[str, bool | int | float | str | bytes | None, bool, str | None]:
+    tokens = _significant_tokens(description)
+
+    type_end = 0
+    while type_end < len(tokens):
+        token = tokens[type_end]
+        if token.type == TOKEN_WORD and token.value.upper() in COLUMN_CONSTRAINTS:
+            break
+
+        if token.value == "(":
+            type_end = _matching_paren(description, tokens, type_end)
+        type_end += 1
+
+    type_ = _text(description, tokens[:type_end])
+    primary_key = _find_keywords(tokens, "PRIMARY", "KEY", start=type_end) is not None
+
+    default = None
+    if (idx := _find_keywords(tokens, "DEFAULT", start=type_end)) is not None and idx + 1 < len(tokens):
+        value_start = idx + 1
+        if tokens[value_start].value == "(":
+            value_end = _matching_paren(description, tokens, value_start) + 1
+        elif tokens[value_start].value in ("+", "-"):
+            value_end = value_start + 2
         else:
-            columns.append((column_name, column_type_constraint))
+            value_end = value_start + 1
+        default = _literal(tokens[value_start:value_end])
 
-    return primary_key, columns, table_constraints
+    collation = None
+    if (idx := _find_keywords(tokens, "COLLATE", start=type_end)) is not None and idx + 1 < len(tokens):
+        collation = _unquote(tokens[idx + 1])
 
+    return type_, default, primary_key, collation
 
-def split_column_def(sql: str, column_def: str) -> tuple[str, str]:
-    """Splits the column definition to name and constraint."""
 
-    column_parts = column_def.split(maxsplit=1)
-    if not column_parts:
-        raise InvalidSQL(f"Not a valid CREATE TABLE definition: empty column definition in {sql!r}")
+def _parse_column(sql: str, definition: list[Token]) -> ColumnDefinition:
+    name = _unquote(definition[0])
+    description = _text(sql, definition[1:])
+    type_, default, primary_key, collation = _parse_column_description(description)
+    return ColumnDefinition(name, type_, description, default, primary_key, collation)
 
-    column_name = column_parts[0]
-    column_type_constraint = column_parts[1] if len(column_parts) > 1 else ""
 
-    if column_name[0] in ('"', "'", "`"):
-        column_name = column_name[1:-1]
+def _significant_tokens(sql: str) -> list[Token]:
+    return [token for token in tokenize(sql) if token.type not in (TOKEN_WHITESPACE, TOKEN_COMMENT)]
 
-    return column_name, column_type_constraint
 
+def _split_list(sql: str, tokens: list[Token]) -> list[list[Token]]:
+    """Split ``tokens`` on the comma's outside of any parentheses."""
+    level = 0
+    parts = [[]]
 
-def get_primary_key_from_constraint(column_type_constraint: str, column_def: str, sql: str) -> str | None:
-    """Finds a primary key from sql string."""
-    primary_key = None
+    for token in tokens:
+        if token.value == "(":
+            level += 1
+        elif token.value == ")":
+            level -= 1
+        elif token.value == "," and level == 0:
+            parts.append([])
+            continue
+        parts[-1].append(token)
 
-    primary_key_sql = re.search(r"\((.+)\)", column_type_constraint, flags=re.DOTALL)
-    if not primary_key_sql:
-        raise InvalidSQL(
-            f"Not a valid CREATE TABLE definition: invalid PRIMARY KEY table constraint {column_def!r} in {sql!r}"
-        )
-    matched_group = primary_key_sql.groups()[0]
-    primary_key_defs = list(split_sql_list(matched_group))
-    # We only handle single primary keys, no compound keys or
-    # expressions, so a single entry in the list consisting of a single
-    # part.
-    if len(primary_key_defs) == 1:
-        primary_key_parts = primary_key_defs[0].split(maxsplit=1)
-        if len(primary_key_parts) == 1:
-            primary_key = primary_key_parts[0]
-    return primary_key
+    if level != 0:
+        bracket_type = "(" if level < 0 else ")"
+        raise InvalidSQL(f"Not a valid SQL list definition: {sql!r} missing {abs(level)} {bracket_type}'s")
+
+    return parts
+
+
+def _matching_paren(sql: str, tokens: list[Token], start: int) -> int:
+    """Return the index of the closing parenthesis matching the opening parenthesis at ``start``."""
+    level = 0
+    for idx in range(start, len(tokens)):
+        if tokens[idx].value == "(":
+            level += 1
+        elif tokens[idx].value == ")":
+            level -= 1
+            if level == 0:
+                return idx
+
+    raise InvalidSQL(f"Not a valid SQL list definition: {sql!r} missing {level} )'s")
+
+
+def _text(sql: str, tokens: list[Token]) -> str:
+    """Return the SQL of the given tokens, without any comments between them."""
+    if not tokens:
+        return ""
+
+    text = sql[tokens[0].start : tokens[-1].end]
+    if "--" in text or "/*" in text:
+        text = "".join(token.value for token in tokenize(text) if token.type != TOKEN_COMMENT)
+    return text.strip()
+
+
+def _is_keyword(token: Token, keyword: str) -> bool:
+    return token.type == TOKEN_WORD and token.value.upper() == keyword
+
+
+def _find_keywords(tokens: list[Token], *keywords: str, start: int = 0) -> int | None:
+    """Return the index of the first occurrence of the sequence of ``keywords`` in ``tokens``."""
+    for idx in range(start, len(tokens) - len(keywords) + 1):
+        if all(_is_keyword(tokens[idx + i], keyword) for i, keyword in enumerate(keywords)):
+            return idx
+    return None
+
+
+def _unquote(token: Token) -> str:
+    value = token.value
+    if token.type in (TOKEN_IDENTIFIER, TOKEN_STRING) and len(value) >= 2:
+        if value[0] == "[":
+            return value[1:-1]
+        quote = value[0]
+        return value[1:-1].replace(quote * 2, quote)
+    return value
+
+
+def _literal(tokens: list[Token]) -> bool | int | float | str | bytes | None:
+    """Return the value of a literal, or ``None`` if ``tokens`` are not a literal."""
+    # Strip any parentheses around the literal
+    while len(tokens) >= 2 and tokens[0].value == "(" and tokens[-1].value == ")":
+        tokens = tokens[1:-1]
+
+    sign = 1
+    if len(tokens) == 2 and tokens[0].value in ("+", "-") and tokens[1].type == TOKEN_NUMBER:
+        sign = -1 if tokens[0].value == "-" else 1
+        tokens = tokens[1:]
+
+    if len(tokens) != 1:
+        return None
+
+    token = tokens[0]
+    if token.type == TOKEN_NUMBER:
+        value = token.value
+        if value[:2].lower() == "0x":
+            return sign * int(value, 16)
+        try:
+            return sign * int(value)
+        except ValueError:
+            return sign * float(value)
+
+    if token.type in (TOKEN_STRING, TOKEN_IDENTIFIER) and token.value[0] in ("'", '"'):
+        # SQLite accepts double quoted strings as string literals if they are not an identifier
+        return _unquote(token)
+
+    if token.type == TOKEN_BLOB:
+        return bytes.fromhex(token.value[2:-1])
+
+    if token.type == TOKEN_WORD and token.value.upper() in ("TRUE", "FALSE"):
+        return token.value.upper() == "TRUE"
+
+    return None
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from tests.benchmark.generate import generate_profile
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "benchmark: benchmarks, only run when selected with -m benchmark")
+
+
+def pytest_collection_modifyitems(config: pytest.Config, items: list[pytest.Item]) -> None:
+    # Generating the databases takes a while, so benchmarks only run when explicitly selected
+    if "benchmark" in (config.option.markexpr or ""):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks only run with -m benchmark")
+    for item in items:
+        if item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def database(tmp_path_factory: pytest.TempPathFactory) -> Callable[[str], tuple[Path, Path | None]]:
+    """Return a function that generates the database of a profile, see :data:`PROFILES`.
+
+    Set ``DISSECT_SQL_BENCHMARK_DATA`` to a directory to keep the generated databases between runs.
+    """
+    if directory := os.getenv("DISSECT_SQL_BENCHMARK_DATA"):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+    else:
+        directory = tmp_path_factory.mktemp("benchmark")
+
+    return lambda name: generate_profile(directory, name)
@@ -0,0 +1,164 @@
+"""Generate synthetic SQLite3 databases for the benchmarks with the ``sqlite3`` module of the standard library.
+
+The databases are generated from a fixed seed, so the same profile always results in the same data. The
+generator can also be used to create a database to benchmark or profile by hand::
+
+    python -m tests.benchmark.generate deep.sqlite --rows 1000000 --page-size 512
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+# Multiplies the number of rows, tables and WAL transactions of all profiles
+SCALE = float(os.getenv("DISSECT_SQL_BENCHMARK_SCALE", "1"))
+
+# The databases the benchmarks run on, scaled by ``SCALE``
+PROFILES: dict[str, dict[str, Any]] = {
+    # A typical database
+    "default": {"rows": 100_000},
+    # A small page size results in a deep B-tree
+    "deep": {"rows": 100_000, "page_size": 512},
+    # Every row has a payload that spans a number of overflow pages
+    "overflow": {"rows": 2_000, "page_size": 1024, "payload_size": 20_000},
+    "utf16le": {"rows": 50_000, "encoding": "UTF-16le"},
+    "utf16be": {"rows": 50_000, "encoding": "UTF-16be"},
+    # A large schema, with many tables and indices
+    "schema": {"rows": 10, "tables": 500},
+    # A WAL with many transactions that are not checkpointed yet
+    "wal": {"rows": 10_000, "wal_transactions": 500},
+}
+
+
+def generate(
+    path: Path,
+    rows: int = 10_000,
+    page_size: int = 4096,
+    encoding: str = "UTF-8",
+    payload_size: int = 16,
+    tables: int = 1,
+    wal_transactions: int = 0,
+    wal_rows: int = 20,
+    seed: int = 1337,
+) -> tuple[Path, Path | None]:
+    """Generate a database at ``path`` and return the paths of the database and its WAL, if any.
+
+    Every table has an ``INTEGER PRIMARY KEY``, TEXT, INTEGER, REAL and BLOB column, and an index on the
+    INTEGER column.
+
+    Args:
+        path: The path of the database, an existing database is replaced.
+        rows: The number of rows per table.
+        page_size: The page size of the database.
+        encoding: The text encoding of the database.
+        payload_size: The average size of the BLOB value of a row.
+        tables: The number of tables.
+        wal_transactions: The number of transactions to leave in the WAL, each updating and inserting rows of the
+                          first table. The WAL is only created if this is not 0.
+        wal_rows: The number of rows every WAL transaction inserts and updates.
+        seed: The seed of the generated values.
+    """
+    rng = random.Random(seed)
+
+    path = Path(path)
+    wal_path = path.with_name(path.name + "-wal")
+    for file in (path, wal_path):
+        file.unlink(missing_ok=True)
+
+    con = sqlite3.connect(path, isolation_level=None)
+    con.execute(f"PRAGMA page_size = {page_size}")
+    con.execute(f"PRAGMA encoding = '{encoding}'")
+
+    with con:
+        con.execute("BEGIN")
+        for table in range(tables):
+            columns = "id INTEGER PRIMARY KEY, name TEXT, value INTEGER, score REAL, payload BLOB"
+            con.execute(f"CREATE TABLE data_{table} ({columns})")
+            con.execute(f"CREATE INDEX data_{table}_value ON data_{table} (value)")
+            con.executemany(f"INSERT INTO data_{table} VALUES (?, ?, ?, ?, ?)", _rows(rng, 1, rows, payload_size))
+
+    if not wal_transactions:
+        con.close()
+        return path, None
+
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA wal_autocheckpoint = 0")
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    next_id = rows + 1
+    for _ in range(wal_transactions):
+        with con:
+            con.execute("BEGIN")
+            con.executemany(
+                "UPDATE data_0 SET value = ? WHERE id = ?",
+                ((rng.getrandbits(32), rng.randint(1, next_id - 1)) for _ in range(wal_rows)),
+            )
+            con.executemany("INSERT INTO data_0 VALUES (?, ?, ?, ?, ?)", _rows(rng, next_id, wal_rows, payload_size))
+            next_id += wal_rows
+
+    # Copy the WAL while the connection is still open, closing it checkpoints the WAL
+    wal_data = wal_path.read_bytes()
+    db_data = path.read_bytes()
+    con.close()
+
+    path.write_bytes(db_data)
+    wal_path.write_bytes(wal_data)
+    return path, wal_path
+
+
+def generate_profile(directory: Path, name: str) -> tuple[Path, Path | None]:
+    """Generate the database of the profile ``name`` in ``directory``, unless it already exists."""
+    kwargs = dict(PROFILES[name])
+    for key in ("rows", "tables", "wal_transactions"):
+        if key in kwargs:
+            kwargs[key] = max(1, int(kwargs[key] * SCALE))
+
+    path = Path(directory) / f"{name}-{SCALE:g}.sqlite"
+    wal_path = path.with_name(path.name + "-wal")
+    if path.exists():
+        return path, wal_path if kwargs.get("wal_transactions") else None
+
+    return generate(path, **kwargs)
+
+
+def _rows(rng: random.Random, start: int, count: int, payload_size: int) -> Any:
+    for rowid in range(start, start + count):
+        size = rng.randint(payload_size // 2, payload_size * 3 // 2)
+        yield (
+            rowid,
+            f"row {rowid} {rng.getrandbits(64):x}",
+            rng.getrandbits(rng.choice((8, 16, 32, 63))),
+            rng.random() * 1000,
+            rng.randbytes(size),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic SQLite3 database.")
+    parser.add_argument("path", type=Path, help="path of the database")
+    parser.add_argument("--rows", type=int, default=10_000, help="number of rows per table")
+    parser.add_argument("--page-size", type=int, default=4096, help="page size")
+    parser.add_argument("--encoding", default="UTF-8", help="text encoding, UTF-8, UTF-16le or UTF-16be")
+    parser.add_argument("--payload-size", type=int, default=16, help="average size of the BLOB of a row")
+    parser.add_argument("--tables", type=int, default=1, help="number of tables")
+    parser.add_argument("--wal-transactions", type=int, default=0, help="number of transactions in the WAL")
+    args = parser.parse_args()
+
+    generate(
+        args.path,
+        rows=args.rows,
+        page_size=args.page_size,
+        encoding=args.encoding,
+        payload_size=args.payload_size,
+        tables=args.tables,
+        wal_transactions=args.wal_transactions,
+    )
+
+
+if __name__ == "__main__":
+    main()
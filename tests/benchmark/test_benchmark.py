@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import random
+import struct
+import tracemalloc
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from dissect.sql import sqlite3
+from tests.benchmark.generate import generate
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark
+
+
+def run(benchmark: Any, func: Callable[[], Any]) -> Any:
+    """Benchmark ``func`` and record the peak memory usage of a single run in the results."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    benchmark.extra_info["peak_memory"] = peak
+    return benchmark(func)
+
+
+def test_tables(benchmark: Any, database: Callable) -> None:
+    path, _ = database("schema")
+
+    def tables() -> int:
+        with sqlite3.SQLite3.from_path(path) as s:
+            return sum(len(table.columns) for table in s.tables())
+
+    assert run(benchmark, tables) > 0
+
+
+@pytest.mark.parametrize("profile", ["default", "deep", "overflow", "utf16le", "utf16be"])
+def test_rows(benchmark: Any, database: Callable, profile: str) -> None:
+    path, _ = database(profile)
+
+    def rows() -> int:
+        with sqlite3.SQLite3.from_path(path) as s:
+            return sum(1 for _ in s.table("data_0").rows())
+
+    assert run(benchmark, rows) > 0
+
+
+@pytest.mark.parametrize("mode", ["raw", "lazy", "columns"])
+def test_rows_mode(benchmark: Any, database: Callable, mode: str) -> None:
+    path, _ = database("default")
+    kwargs = {"raw": {"raw": True}, "lazy": {"lazy": True}, "columns": {"columns": ["id", "value"]}}[mode]
+
+    def rows() -> int:
+        with sqlite3.SQLite3.from_path(path) as s:
+            return sum(1 for _ in s.table("data_0").rows(**kwargs))
+
+    assert run(benchmark, rows) > 0
+
+
+@pytest.mark.parametrize("profile", ["default", "deep"])
+def test_get_by_rowid(benchmark: Any, database: Callable, profile: str) -> None:
+    path, _ = database(profile)
+
+    with sqlite3.SQLite3.from_path(path) as s:
+        table = s.table("data_0")
+        max_rowid = next(table.rows(reverse=True)).id
+        rng = random.Random(1337)
+        rowids = [rng.randint(1, max_rowid) for _ in range(1000)]
+
+        def lookup() -> int:
+            return sum(1 for rowid in rowids if table.get_by_rowid(rowid) is not None)
+
+        assert run(benchmark, lookup) == len(rowids)
+
+
+def _integer_records(count: int) -> list[memoryview]:
+    """Return ``count`` records of 16 values, of all INTEGER serial types and REAL values."""
+    rng = random.Random(1337)
+    # The sizes of the INTEGER serial types, 8 and 9 are the constants 0 and 1 and have no body
+    sizes = {1: 1, 2: 2, 3: 3, 4: 4, 5: 6, 6: 8, 8: 0, 9: 0}
+
+    records = []
+    for _ in range(count):
+        types = []
+        body = b""
+        for _ in range(16):
+            type_ = rng.randint(1, 9)
+            if type_ == 7:
+                body += struct.pack(">d", rng.random())
+            elif size := sizes[type_]:
+                body += rng.randrange(-(1 << (size * 8 - 1)), 1 << (size * 8 - 1)).to_bytes(size, "big", signed=True)
+            types.append(type_)
+
+        # The serial types are all below 128, so every varint of the header is a single byte
+        records.append(memoryview(bytes([len(types) + 1, *types]) + body))
+    return records
+
+
+@pytest.mark.parametrize("decoder", ["struct", "cstruct"])
+def test_decode_record_integers(benchmark: Any, decoder: str) -> None:
+    records = _integer_records(10_000)
+    use_cstruct = decoder == "cstruct"
+
+    expected = [sqlite3._decode_record(record, 0, "utf-8", use_cstruct=False)[1] for record in records]
+    assert [sqlite3._decode_record(record, 0, "utf-8", use_cstruct=True)[1] for record in records] == expected
+
+    def decode() -> int:
+        return sum(len(sqlite3._decode_record(record, 0, "utf-8", use_cstruct)[1]) for record in records)
+
+    benchmark.group = "decode_record_integers"
+    assert run(benchmark, decode) == 16 * len(records)
+
+
+def test_wal_checkpoints(benchmark: Any, database: Callable) -> None:
+    _, wal_path = database("wal")
+
+    def checkpoints() -> int:
+        with wal_path.open("rb") as fh:
+            return len(sqlite3.WAL(fh).checkpoints())
+
+    assert run(benchmark, checkpoints) > 0
+
+
+def test_wal_rows(benchmark: Any, database: Callable) -> None:
+    path, wal_path = database("wal")
+
+    def rows() -> int:
+        with sqlite3.SQLite3.from_path(path, wal_path) as s:
+            return sum(1 for _ in s.table("data_0").rows())
+
+    assert run(benchmark, rows) > 0
+
+
+def test_cell_data(benchmark: Any, database: Callable) -> None:
+    path, _ = database("overflow")
+
+    def data() -> int:
+        with sqlite3.SQLite3.from_path(path) as s:
+            root = s.page(s.table("data_0").page)
+            return sum(len(cell.data) for cell in sqlite3.walk_tree(s, root))
+
+    assert run(benchmark, data) > 0
+
+
+def test_cell_open(benchmark: Any, database: Callable) -> None:
+    path, _ = database("overflow")
+
+    def stream() -> int:
+        size = 0
+        with sqlite3.SQLite3.from_path(path) as s:
+            for row in s.table("data_0").rows(lazy=True):
+                fh = row.open("payload")
+                while buf := fh.read(8192):
+                    size += len(buf)
+        return size
+
+    assert run(benchmark, stream) > 0
+
+
+def test_generate(tmp_path: Path) -> None:
+    path, wal_path = generate(tmp_path / "test.sqlite", rows=100, encoding="UTF-16le", wal_transactions=2)
+
+    with sqlite3.SQLite3.from_path(path, wal_path) as s:
+        assert s.encoding == "utf-16-le"
+        assert len(list(s.table("data_0").rows())) == 140
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import sqlite3
 from pathlib import Path
 from typing import TYPE_CHECKING, BinaryIO
 
@@ -22,3 +23,84 @@ def sqlite_db() -> Iterator[BinaryIO]:
 @pytest.fixture
 def empty_db() -> Iterator[BinaryIO]:
     yield from open_data("_data/empty.sqlite")
+
+
+@pytest.fixture(scope="session")
+def large_db_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A database with a small page size and enough rows to get a B-tree that is a few levels deep."""
+    path = tmp_path_factory.mktemp("data") / "large.sqlite"
+
+    con = sqlite3.connect(path)
+    con.execute("PRAGMA page_size = 512")
+    con.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT, value INTEGER, data BLOB)")
+    con.executemany(
+        "INSERT INTO test VALUES (?, ?, ?, ?)",
+        ((i * 2, f"row {i}", i % 100, None if i % 7 == 0 else bytes([i % 256]) * (i % 50)) for i in range(1, 5001)),
+    )
+    con.execute("CREATE INDEX test_value ON test (value, name)")
+    con.commit()
+    con.close()
+
+    return path
+
+
+@pytest.fixture
+def large_db(large_db_path: Path) -> Iterator[BinaryIO]:
+    with large_db_path.open("rb") as fh:
+        yield fh
+
+
+@pytest.fixture(scope="session")
+def wal_db_path(tmp_path_factory: pytest.TempPathFactory) -> tuple[Path, Path]:
+    """A database with a number of committed transactions in its WAL that have not been checkpointed yet.
+
+    The database file itself contains the ``test`` table with rowids 1 to 100. The WAL contains the following
+    transactions: insert of rowids 101 to 200, update of rowid 5, delete of rowid 10 and the creation of the
+    ``second`` table.
+    """
+    tmp_path = tmp_path_factory.mktemp("wal")
+    path = tmp_path / "wal.sqlite"
+
+    con = sqlite3.connect(path, isolation_level=None)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA wal_autocheckpoint = 0")
+    con.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT)")
+    con.executemany("INSERT INTO test VALUES (?, ?)", ((i, f"row {i}") for i in range(1, 101)))
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    with con:
+        con.execute("BEGIN")
+        con.executemany("INSERT INTO test VALUES (?, ?)", ((i, f"row {i}") for i in range(101, 201)))
+    con.execute("UPDATE test SET name = 'updated' WHERE id = 5")
+    con.execute("DELETE FROM test WHERE id = 10")
+    con.execute("CREATE TABLE second (id INTEGER PRIMARY KEY, value)")
+
+    # Copy the files while the connection is still open, closing it checkpoints the WAL
+    db_path = tmp_path / "copy.sqlite"
+    wal_path = tmp_path / "copy.sqlite-wal"
+    db_path.write_bytes(path.read_bytes())
+    wal_path.write_bytes((tmp_path / "wal.sqlite-wal").read_bytes())
+    con.close()
+
+    return db_path, wal_path
+
+
+@pytest.fixture(scope="session")
+def deleted_db_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A database with deleted rows, both on pages that moved to the freelist and in freeblocks.
+
+    The ``test`` table had rowids 1 to 500, rowids above 300 and all multiples of 10 are deleted.
+    """
+    path = tmp_path_factory.mktemp("deleted") / "deleted.sqlite"
+
+    con = sqlite3.connect(path, isolation_level=None)
+    con.execute("PRAGMA page_size = 1024")
+    # Some builds of SQLite enable secure_delete by default, which zeroes deleted content
+    con.execute("PRAGMA secure_delete = OFF")
+    con.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT, value INTEGER)")
+    con.executemany("INSERT INTO test VALUES (?, ?, ?)", ((i, f"name {i}", i * 3) for i in range(1, 501)))
+    con.execute("DELETE FROM test WHERE id > 300")
+    con.execute("DELETE FROM test WHERE id % 10 = 0")
+    con.close()
+
+    return path
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from dissect.sql import InvalidDatabase, batch
+from dissect.sql.batch import process
+from dissect.sql.sqlite3 import SQLite3
+from dissect.sql.tools import batch as batch_tool
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from dissect.sql.cache import PageCache
+
+
+def test_process(large_db_path: Path, wal_db_path: tuple[Path, Path], tmp_path: Path) -> None:
+    db_path, _ = wal_db_path
+    invalid_path = tmp_path / "invalid.sqlite"
+    invalid_path.write_bytes(b"\x00" * 1024)
+    missing_path = tmp_path / "missing.sqlite"
+
+    paths = [large_db_path, invalid_path, db_path, missing_path]
+    results = list(process(paths, {"test": ["id", "name"], "missing": None}, workers=2, batch_size=1000))
+
+    rows = {}
+    errors = {}
+    for result in results:
+        if result.error is not None:
+            errors[(result.path, result.table)] = result.error
+        else:
+            assert len(result.rows) <= 1000
+            assert result.columns == ["id", "name"]
+            rows.setdefault(result.path, []).extend(result.rows)
+
+    # The batches of a database are yielded in order
+    assert rows[large_db_path] == [(i * 2, f"row {i}") for i in range(1, 5001)]
+    # The WAL next to the database is read as well
+    assert len(rows[db_path]) == 199
+
+    assert isinstance(errors.pop((invalid_path, None)), InvalidDatabase)
+    assert isinstance(errors.pop((missing_path, None)), FileNotFoundError)
+    assert str(errors.pop((large_db_path, "missing"))) == "Unknown table 'missing'"
+    assert str(errors.pop((db_path, "missing"))) == "Unknown table 'missing'"
+    assert not errors
+
+
+def test_process_all_tables(wal_db_path: tuple[Path, Path]) -> None:
+    db_path, _ = wal_db_path
+
+    results = list(process([db_path], workers=1, wal=False))
+    assert [(result.table, len(result.rows), result.columns) for result in results] == [("test", 100, ["id", "name"])]
+
+
+def test_process_batch_size(wal_db_path: tuple[Path, Path]) -> None:
+    db_path, _ = wal_db_path
+
+    with pytest.raises(ValueError, match="Invalid batch size 0"):
+        list(process([db_path], batch_size=0))
+
+    results = list(process([db_path], workers=1, batch_size=1, wal=False))
+    assert [result.rows for result in results] == [[(i, f"row {i}")] for i in range(1, 101)]
+
+
+def test_process_threads(large_db_path: Path, tmp_path: Path) -> None:
+    paths = []
+    for idx in range(8):
+        path = tmp_path / f"{idx}.sqlite"
+        path.write_bytes(large_db_path.read_bytes())
+        paths.append(path)
+
+    caches = {}
+    from_path = SQLite3.from_path
+
+    def record_cache(*args, cache: PageCache, **kwargs) -> SQLite3:
+        caches.setdefault(threading.get_ident(), set()).add(cache)
+        return from_path(*args, cache=cache, **kwargs)
+
+    # Every thread is a separate worker, a thread never closes the databases another thread is reading
+    with (
+        patch.object(batch._databases, "size", 1),
+        patch.object(SQLite3, "from_path", side_effect=record_cache),
+        ThreadPoolExecutor(max_workers=4) as executor,
+    ):
+        results = list(process(paths, {"test": ["id"]}, executor=executor, cache_size=1024 * 1024, batch_size=100))
+
+    assert [result.error for result in results if result.error is not None] == []
+    for path in paths:
+        rows = [row for result in results if result.path == path for row in result.rows]
+        assert rows == [(i * 2,) for i in range(1, 5001)]
+
+    # The databases opened by a worker share a single page cache with the budget of the worker
+    assert caches
+    assert all(len(thread_caches) == 1 for thread_caches in caches.values())
+    assert all(cache.max_size == 1024 * 1024 for thread_caches in caches.values() for cache in thread_caches)
+
+
+def test_batch_tool(
+    large_db_path: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    invalid_path = tmp_path / "invalid.sqlite"
+    invalid_path.write_bytes(b"\x00" * 1024)
+
+    argv = ["sqlite-batch", str(large_db_path), str(invalid_path), "-t", "test:id,data", "-w", "1"]
+    monkeypatch.setattr("sys.argv", argv)
+
+    assert batch_tool.main() == 1
+
+    out, err = capsys.readouterr()
+    records = [json.loads(line) for line in out.splitlines()]
+    assert len(records) == 5000
+    assert records[0] == {"path": str(large_db_path), "table": "test", "row": {"id": 2, "data": "AQ=="}}
+
+    (error,) = [json.loads(line) for line in err.splitlines()]
+    assert error["path"] == str(invalid_path)
+    assert "InvalidDatabase" in error["error"]
+
+
+def test_batch_tool_batch_size(
+    large_db_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture
+) -> None:
+    monkeypatch.setattr("sys.argv", ["sqlite-batch", str(large_db_path), "--batch-size", "0"])
+
+    with pytest.raises(SystemExit):
+        batch_tool.main()
+    assert "must be at least 1, not 0" in capsys.readouterr().err
+
+
+def test_parse_table_spec() -> None:
+    assert batch_tool.parse_table_spec([]) is None
+    assert batch_tool.parse_table_spec(["a", "b:x, y"]) == {"a": None, "b": ["x", "y"]}
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, BinaryIO
+
+from dissect.sql import sqlite3
+from dissect.sql.cache import OpenDatabases, PageCache, cache_token
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_page_cache() -> None:
+    cache = PageCache(10)
+
+    cache.put("a", b"aaaa", 4)
+    cache.put("b", b"bbbb", 4)
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") is None
+    assert cache.get("c", b"") == b""
+
+    # Evicts the least recently used value, which is b
+    cache.put("c", b"cccc", 4)
+    assert "b" not in cache
+    assert "a" in cache
+    assert "c" in cache
+    assert cache.size == 8
+
+    # Too large to be cached at all
+    cache.put("d", b"d" * 11, 11)
+    assert "d" not in cache
+
+    # Replacing a value updates the size
+    cache.put("a", b"aa", 2)
+    assert cache.size == 6
+
+    assert cache.stats() == {
+        "size": 6,
+        "max_size": 10,
+        "entries": 2,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 1,
+    }
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_open_databases(tmp_path: Path, large_db_path: Path) -> None:
+    paths = []
+    for idx in range(3):
+        path = tmp_path / f"{idx}.sqlite"
+        path.write_bytes(large_db_path.read_bytes())
+        paths.append(path)
+
+    databases = OpenDatabases(2)
+
+    def open_database(path: Path) -> sqlite3.SQLite3:
+        return databases.open(path, lambda: sqlite3.SQLite3.from_path(path))
+
+    with open_database(paths[0]) as first:
+        opened = []
+        for path in paths[1:]:
+            with open_database(path) as sqlite:
+                assert sqlite.table("test") is not None
+                opened.append(sqlite)
+
+        # The first database is evicted, but stays open until it is no longer used
+        assert databases.keys() == paths[1:]
+        assert first.table("test").row(0) is not None
+        assert first._owned_fhs
+
+    assert not first._owned_fhs
+
+    # Evicting a database that is not used closes it
+    with open_database(paths[0]) as sqlite:
+        assert sqlite is not first
+        with open_database(paths[0]) as again:
+            assert again is sqlite
+
+        # Closing a database that is in use closes it once it is no longer used
+        databases.close(paths[0])
+        assert sqlite._owned_fhs
+
+    assert not sqlite._owned_fhs
+    assert databases.keys() == [paths[2]]
+    assert not opened[0]._owned_fhs
+    assert opened[1]._owned_fhs
+
+    databases.close(paths[2])
+    assert not opened[1]._owned_fhs
+    assert len(databases) == 0
+
+
+def test_open_databases_per_thread(large_db_path: Path) -> None:
+    databases = OpenDatabases(2, per_thread=True)
+
+    def open_database() -> sqlite3.SQLite3:
+        with databases.open(large_db_path, lambda: sqlite3.SQLite3.from_path(large_db_path)) as sqlite:
+            return sqlite
+
+    first = open_database()
+    assert open_database() is first
+
+    # Every thread has its own open databases
+    results = []
+    thread = threading.Thread(target=lambda: results.extend((open_database(), len(databases))))
+    thread.start()
+    thread.join()
+
+    assert results[0] is not first
+    assert results[1] == 1
+    assert large_db_path in databases
+    first.close()
+
+
+def test_cache_token() -> None:
+    assert cache_token() != cache_token()
+
+
+def test_shared_page_cache(large_db_path: Path) -> None:
+    cache = PageCache(64 * 1024)
+
+    with large_db_path.open("rb") as fh1, large_db_path.open("rb") as fh2:
+        s1 = sqlite3.SQLite3(fh1, cache=cache)
+        s2 = sqlite3.SQLite3(fh2, cache=cache)
+
+        assert len(list(s1.table("test").rows())) == 5000
+        assert cache.size <= 64 * 1024
+        assert cache.evictions > 0
+        misses = cache.misses
+
+        # Both databases have their own entries in the shared cache
+        assert s2.table("test").get_by_rowid(2).name == "row 1"
+        assert cache.misses > misses
+
+        hits = cache.hits
+        assert s2.table("test").get_by_rowid(2).name == "row 1"
+        assert cache.hits > hits
+
+
+def test_default_page_cache(sqlite_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(sqlite_db)
+    assert s.cache.max_size == 256 * s.page_size
+
+    list(s.table("test").rows())
+    list(s.table("test").rows())
+    assert s.cache.hits > 0
+    assert len(s.cache) == 2
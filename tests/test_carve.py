@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import random
+import sqlite3 as stdlib_sqlite3
+from typing import TYPE_CHECKING, BinaryIO
+
+from dissect.sql import sqlite3
+from dissect.sql.carve import (
+    AFFINITY_BLOB,
+    AFFINITY_INTEGER,
+    AFFINITY_NUMERIC,
+    AFFINITY_REAL,
+    AFFINITY_TEXT,
+    SOURCE_FREEBLOCK,
+    SOURCE_FREELIST,
+    _freelist_pages,
+    carve,
+    column_affinity,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_carve(deleted_db_path: Path) -> None:
+    with sqlite3.SQLite3.from_path(deleted_db_path) as s:
+        assert s.header.freelist_page_count > 0
+
+        records = list(carve(s))
+        assert all(record.table.name == "test" for record in records)
+        # The values of carved records are consistent with how the rows were inserted
+        assert all(record.values["name"] == f"name {record.values['value'] // 3}" for record in records)
+
+        # Records on freelist pages still have their cell header, and thus their rowid
+        freelist = [record for record in records if record.source == SOURCE_FREELIST]
+        assert freelist
+        assert all(record.rowid > 300 and record.values["id"] == record.rowid for record in freelist)
+
+        # Freeblocks overwrite the cell header, but the rest of the record can be recovered
+        freeblock = [record for record in records if record.source == SOURCE_FREEBLOCK]
+        assert freeblock
+        assert all(record.rowid is None for record in freeblock)
+        assert {record.values["value"] // 3 for record in freeblock} <= set(range(10, 301, 10))
+
+        # Carving reads through the page cache of the database
+        assert s.cache.hits > 0
+
+
+def test_carve_random(tmp_path: Path) -> None:
+    path = tmp_path / "random.sqlite"
+
+    con = stdlib_sqlite3.connect(path, isolation_level=None)
+    con.execute("PRAGMA page_size = 4096")
+    con.execute("PRAGMA encoding = 'UTF-16be'")
+    con.execute("PRAGMA secure_delete = OFF")
+    con.execute("CREATE TABLE a (id INTEGER PRIMARY KEY, name TEXT, value INTEGER)")
+    con.execute("CREATE TABLE b (x, y, z)")
+    con.execute("CREATE TABLE c (x TEXT, y REAL)")
+    con.executemany("INSERT INTO c VALUES (?, ?)", ((f"text {i}", i / 3) for i in range(5000)))
+    con.execute("DELETE FROM c")
+    con.close()
+
+    with sqlite3.SQLite3.from_path(path) as s:
+        assert s.header.freelist_page_count > 20
+        assert any(record.table.name == "c" for record in carve(s))
+        freelist = [num for num, _, start in _freelist_pages(s) if start == 0]
+
+    # Overwrite the freelist leaf pages with random data and zeroes
+    rng = random.Random(1337)
+    data = bytearray(path.read_bytes())
+    for idx, num in enumerate(freelist):
+        offset = (num - 1) * 4096
+        data[offset : offset + 4096] = rng.randbytes(4096) if idx % 2 else bytes(4096)
+    path.write_bytes(data)
+
+    with sqlite3.SQLite3.from_path(path) as s:
+        assert [record for record in carve(s) if record.page in freelist] == []
+
+
+def test_carve_empty(empty_db: BinaryIO) -> None:
+    assert list(carve(sqlite3.SQLite3(empty_db))) == []
+
+
+def test_column_affinity() -> None:
+    assert column_affinity("INTEGER PRIMARY KEY") == AFFINITY_INTEGER
+    assert column_affinity("BIGINT NOT NULL") == AFFINITY_INTEGER
+    assert column_affinity("VARCHAR(255) DEFAULT 'text'") == AFFINITY_TEXT
+    assert column_affinity("CLOB") == AFFINITY_TEXT
+    assert column_affinity("BLOB") == AFFINITY_BLOB
+    assert column_affinity("") == AFFINITY_BLOB
+    assert column_affinity("DEFAULT 1") == AFFINITY_BLOB
+    assert column_affinity("DOUBLE PRECISION") == AFFINITY_REAL
+    assert column_affinity("DECIMAL(10, 5)") == AFFINITY_NUMERIC
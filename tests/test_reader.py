@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import TYPE_CHECKING
+
+import pytest
+
+from dissect.sql import sqlite3
+from dissect.sql.reader import PositionalReader
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_positional_reader(tmp_path: Path) -> None:
+    path = tmp_path / "data"
+    path.write_bytes(bytes(range(256)) * 16)
+
+    with path.open("rb") as fh:
+        reader = PositionalReader(fh)
+        assert reader.fileno is not None
+
+        fh.seek(10)
+        assert reader.read(256, 4) == b"\x00\x01\x02\x03"
+        assert reader.read(4094, 4) == b"\xfe\xff"
+        assert reader.read(8192, 4) == b""
+        # The position of the file is not used or changed
+        assert fh.tell() == 10
+
+    reader = PositionalReader(BytesIO(bytes(range(256))))
+    assert reader.fileno is None
+    assert reader.read(254, 4) == b"\xfe\xff"
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_threaded_scan(wal_db_path: tuple[Path, Path], large_db_path: Path, in_memory: bool) -> None:
+    fh = BytesIO(large_db_path.read_bytes()) if in_memory else large_db_path.open("rb")
+    s = sqlite3.SQLite3(fh)
+
+    # A small cache makes the threads evict each other's pages
+    s.cache.max_size = 4 * s.page_size
+
+    expected = [(row.id, row.name, row.value, row.data) for row in s.table("test").rows()]
+    expected_index = list(s.index("test_value").range())
+
+    barrier = threading.Barrier(8)
+
+    def scan(idx: int) -> list:
+        barrier.wait()
+        if idx % 2:
+            return list(s.index("test_value").range())
+        return [(row.id, row.name, row.value, row.data) for row in s.table("test").rows()]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(scan, range(8)))
+
+    assert results == [expected_index if idx % 2 else expected for idx in range(8)]
+    fh.close()
+
+    db_path, wal_path = wal_db_path
+    with sqlite3.SQLite3.from_path(db_path, wal_path) as s, ThreadPoolExecutor(max_workers=4) as executor:
+        views = list(s.checkpoints())
+        expected = [[tuple(row) for row in view.table("test").rows()] for view in views]
+        s.cache.clear()
+
+        results = list(executor.map(lambda view: [tuple(row) for row in view.table("test").rows()], views))
+        assert results == expected
@@ -2,19 +2,18 @@ from __future__ import annotations
 
 from unittest.mock import Mock
 
-from dissect.sql.sqlite3 import Column, Row
+from dissect.sql.sqlite3 import Row, Table
+
+
+def _table(sql: str) -> Table:
+    return Table(sqlite=None, type_=None, name="test", table_name="test", page=None, sql=sql)
 
 
 def test_row_filled_with_defaults() -> None:
-    mocked_table = Mock()
-    mocked_table.columns = [
-        Column("test", "DEFAULT 1"),
-        Column("test2", "DEFAULT 2"),
-        Column("test3", "TEXT DEFAULT 'hello people'"),
-    ]
+    table = _table("CREATE TABLE test (test DEFAULT 1, test2 DEFAULT 2, test3 TEXT DEFAULT 'hello people')")
     mocked_cell = Mock()
     mocked_cell.values = [20]
-    result_row = Row(table=mocked_table, cell=mocked_cell)
+    result_row = Row(table=table, cell=mocked_cell)
 
     assert result_row.get("test") == 20
     assert result_row.get("test2") == 2
@@ -22,15 +21,63 @@ def test_row_filled_with_defaults() -> None:
 
 
 def test_row_more_cells() -> None:
-    mocked_table = Mock()
-    mocked_table.columns = [
-        Column("test", "DEFAULT 1"),
-    ]
-    mocked_table.primary_key = None
+    table = _table("CREATE TABLE test (test DEFAULT 1)")
+    assert table.primary_key is None
 
     mocked_cell = Mock()
     mocked_cell.values = [20, 22, 33]
-    result_row = Row(table=mocked_table, cell=mocked_cell)
+    result_row = Row(table=table, cell=mocked_cell)
 
     assert result_row.get("test") == 20
-    assert result_row._unknowns == [22, 33]
+    assert result_row._unknowns == (22, 33)
+
+
+def test_row_access() -> None:
+    table = _table("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT, value)")
+    mocked_cell = Mock()
+    mocked_cell.key = 5
+    mocked_cell.values = [None, "five", 5.5]
+
+    row = Row(table=table, cell=mocked_cell)
+    other = Row(table=table, cell=mocked_cell)
+
+    assert row.id == row["id"] == row[0] == 5
+    assert row.name == row["name"] == row[1] == "five"
+    assert row[-1] == 5.5
+    assert row.missing is None
+    assert row.get("missing", 1) == 1
+    assert list(row) == [("id", 5), ("name", "five"), ("value", 5.5)]
+    assert not hasattr(row, "__dict__")
+
+    # The column mapping is shared by all rows of a table
+    assert row._columns is other._columns is table._column_map
+
+    row = Row.from_values(table, (1, "one"), {"id": 0, "name": 1})
+    assert list(row) == [("id", 1), ("name", "one")]
+    assert row.value is None
+
+
+def test_values_decoder() -> None:
+    table = _table("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT, value DEFAULT 7)")
+
+    cells = []
+    for key, values in ((5, [None, "five", 5.5]), (6, [None, "six"]), (7, [None, "seven", 7.5, "unknown"])):
+        cell = Mock()
+        cell.key = key
+        cell.values = values
+        cell.types = [0] * len(values)
+        cell.value.side_effect = values.__getitem__
+        cells.append(cell)
+
+    # The raw values are the values of the rows, without creating them
+    decode = table._values_decoder(None)
+    for cell in cells:
+        assert decode(cell) == Row(table, cell)._values
+    assert [decode(cell) for cell in cells] == [(5, "five", 5.5), (6, "six", 7), (7, "seven", 7.5)]
+    assert cells[0].values == [None, "five", 5.5]
+
+    projection = table._projection(["value", "id"])
+    decode = table._values_decoder(projection)
+    for cell in cells:
+        assert decode(cell) == Row(table, cell, projection)._values
+    assert [decode(cell) for cell in cells] == [(5.5, 5), (7, 6), (7.5, 7)]
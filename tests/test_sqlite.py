@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import io
+import itertools
+import sqlite3 as stdlib_sqlite3
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from typing import Any, BinaryIO
+from typing import TYPE_CHECKING, Any, BinaryIO
+from unittest.mock import patch
 
 import pytest
 
 from dissect.sql import sqlite3
-from dissect.sql.c_sqlite3 import SQLITE3_HEADER_MAGIC
+from dissect.sql.c_sqlite3 import SQLITE3_HEADER_MAGIC, c_sqlite3
+from dissect.sql.exceptions import InvalidDatabase
+
+if TYPE_CHECKING:
+    from pathlib import Path
 
 
 def test_sqlite(sqlite_db: BinaryIO) -> None:
@@ -43,10 +52,441 @@ def test_sqlite(sqlite_db: BinaryIO) -> None:
     assert rows[4].value == -11644473429
 
     assert len(rows) == len(list(table))
-    assert table.row(0).__dict__ == rows[0].__dict__
+    assert list(table.row(0)) == list(rows[0])
     assert list(rows[0]) == [("id", 1), ("name", "testing"), ("value", 1337)]
 
 
+def test_get_by_rowid(sqlite_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(sqlite_db)
+    table = s.table("test")
+
+    assert table.get_by_rowid(3).name == "A" * 4100
+    assert table.get_by_rowid(5).value == -11644473429
+    assert table.get_by_rowid(0) is None
+    assert table.get_by_rowid(6) is None
+    assert 1 in table
+    assert 6 not in table
+
+
+def test_get_by_rowid_large(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+    table = s.table("test")
+
+    root = s.page(table.page)
+    assert root.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE
+    assert s.page(root.right_page).header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE
+
+    for rowid in (2, 4, 1000, 5000, 9998, 10000):
+        row = table.get_by_rowid(rowid)
+        assert row.id == rowid
+        assert row.name == f"row {rowid // 2}"
+
+    for rowid in (-1, 0, 1, 3, 9999, 10001, 2**63 - 1):
+        assert table.get_by_rowid(rowid) is None
+        assert rowid not in table
+
+
+@pytest.mark.parametrize(
+    ("min_rowid", "max_rowid", "reverse", "expected"),
+    [
+        (None, None, False, list(range(2, 10001, 2))),
+        (None, None, True, list(range(10000, 1, -2))),
+        (1000, 1010, False, [1000, 1002, 1004, 1006, 1008, 1010]),
+        (999, 1011, True, [1010, 1008, 1006, 1004, 1002, 1000]),
+        (None, 6, False, [2, 4, 6]),
+        (9995, None, False, [9996, 9998, 10000]),
+        (9995, None, True, [10000, 9998, 9996]),
+        (1001, 1001, False, []),
+        (20000, None, False, []),
+        (None, 0, False, []),
+        (10, 5, False, []),
+    ],
+)
+def test_rows_rowid_range(
+    large_db: BinaryIO, min_rowid: int | None, max_rowid: int | None, reverse: bool, expected: list[int]
+) -> None:
+    s = sqlite3.SQLite3(large_db)
+    table = s.table("test")
+
+    rows = table.rows(min_rowid=min_rowid, max_rowid=max_rowid, reverse=reverse)
+    assert [row.id for row in rows] == expected
+
+
+def test_rows_rowid_range_reads_few_pages(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+    table = s.table("test")
+
+    raw_page = s.raw_page
+    with patch.object(s, "raw_page", side_effect=raw_page) as mock_raw_page:
+        assert [row.id for row in table.rows(min_rowid=5000, max_rowid=5002)] == [5000, 5002]
+        assert mock_raw_page.call_count < 10
+
+
+def test_rows_first_row_reads_few_pages(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+    table = s.table("test")
+    depth = 1
+    page = s.page(table.page)
+    while page.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE:
+        page = s.page(page.right_page)
+        depth += 1
+    assert depth > 2
+
+    # Taking the first rows only reads a single page per level, the batches of child pages grow while the walk
+    # continues
+    for kwargs in ({"reverse": True}, {}, {"min_rowid": 5000}):
+        s.cache.clear()
+        with patch.object(s, "read_pages", wraps=s.read_pages) as mock_read_pages:
+            next(table.rows(**kwargs))
+            assert mock_read_pages.call_count == depth - 1
+            assert all(len(call.args[0]) == 1 for call in mock_read_pages.call_args_list)
+
+    assert next(table.rows(reverse=True)).id == 10000
+
+
+def test_index_seek(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+    index = s.index("test_value")
+
+    assert s.page(index.page).header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_INDEX
+
+    records = list(index.seek(42))
+    assert sorted(rowid for _, rowid in records) == [i * 2 for i in range(1, 5001) if i % 100 == 42]
+    assert all(values[0] == 42 for values, _ in records)
+    assert [values[1] for values, _ in records] == sorted(values[1] for values, _ in records)
+
+    assert list(index.seek([42, "row 1042"])) == [([42, "row 1042"], 2084)]
+    assert list(index.seek(100)) == []
+    assert list(index.seek("42")) == []
+
+
+def test_index_range(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+    index = s.index("test_value")
+
+    records = list(index.range())
+    assert len(records) == 5000
+    assert [values for values, _ in records] == sorted(
+        ([i % 100, f"row {i}"] for i in range(1, 5001)), key=lambda values: (values[0], values[1].encode())
+    )
+
+    assert {values[0] for values, _ in index.range(10, 12)} == {10, 11, 12}
+    assert {values[0] for values, _ in index.range(hi=1)} == {0, 1}
+    assert {values[0] for values, _ in index.range(lo=98.5)} == {99}
+    assert [values for values, _ in index.range([5, "row 4"], [5, "row 5"])] == sorted(
+        [5, f"row {i}"] for i in range(1, 5001) if i % 100 == 5 and "row 4" <= f"row {i}" <= "row 5"
+    )
+
+
+def test_index_mixed_types(tmp_path: Path) -> None:
+    path = tmp_path / "mixed.sqlite"
+    con = stdlib_sqlite3.connect(path)
+    con.execute("CREATE TABLE test (value)")
+    con.execute("CREATE INDEX test_value ON test (value)")
+    values = [None, 1, -1, 2.5, 0, "", "a", "B", "\u00e9", "ab", b"", b"\x00", b"\xff", 2**40, -(2**40), 1.0]
+    con.executemany("INSERT INTO test VALUES (?)", ((value,) for value in values * 20))
+    con.commit()
+    expected = con.execute("SELECT value, rowid FROM test ORDER BY value, rowid").fetchall()
+    con.close()
+
+    with path.open("rb") as fh:
+        index = sqlite3.SQLite3(fh).index("test_value")
+
+        assert [(values[0], rowid) for values, rowid in index.range()] == expected
+        assert [value for (value,), _ in index.seek([None])] == [None] * 20
+        assert {value for (value,), _ in index.range(1, 2.5)} == {1, 2.5}
+        assert {value for (value,), _ in index.range("a", "ab")} == {"a", "ab"}
+        assert {value for (value,), _ in index.range(lo=b"")} == {b"", b"\x00", b"\xff"}
+
+
+def test_index_descending(tmp_path: Path) -> None:
+    path = tmp_path / "descending.sqlite"
+    con = stdlib_sqlite3.connect(path)
+    con.execute("PRAGMA page_size = 512")
+    con.execute("CREATE TABLE test (a INTEGER, b TEXT)")
+    con.execute("CREATE INDEX test_a ON test (a DESC)")
+    con.execute("CREATE INDEX test_a_b ON test (a, b DESC)")
+    con.executemany("INSERT INTO test VALUES (?, ?)", ((i % 50, f"row {i % 7}") for i in range(2000)))
+    con.commit()
+
+    def query(sql: str, *params: Any) -> list[tuple[Any, ...]]:
+        return con.execute(sql, params).fetchall()
+
+    with path.open("rb") as fh:
+        s = sqlite3.SQLite3(fh)
+        index = s.index("test_a")
+        assert s.page(index.page).header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_INDEX
+        assert index.descending == [True]
+
+        assert [(values[0], rowid) for values, rowid in index.range()] == query(
+            "SELECT a, rowid FROM test INDEXED BY test_a ORDER BY a DESC"
+        )
+        assert sorted(rowid for _, rowid in index.range(10, 20)) == [
+            rowid for (rowid,) in query("SELECT rowid FROM test WHERE a BETWEEN 10 AND 20 ORDER BY rowid")
+        ]
+        assert {values[0] for values, _ in index.range(10, 20)} == set(range(10, 21))
+        assert {values[0] for values, _ in index.range(hi=1)} == {0, 1}
+        assert sorted(rowid for _, rowid in index.seek(42)) == [
+            rowid for (rowid,) in query("SELECT rowid FROM test WHERE a = 42 ORDER BY rowid")
+        ]
+
+        index = s.index("test_a_b")
+        assert [(*values, rowid) for values, rowid in index.range()] == query(
+            "SELECT a, b, rowid FROM test INDEXED BY test_a_b ORDER BY a, b DESC"
+        )
+        assert [(*values, rowid) for values, rowid in index.range([5, "row 2"], [6, "row 4"])] == query(
+            "SELECT a, b, rowid FROM test WHERE (a, b) BETWEEN (5, 'row 2') AND (6, 'row 4') ORDER BY a, b DESC"
+        )
+        assert [(*values, rowid) for values, rowid in index.seek([5, "row 5"])] == query(
+            "SELECT a, b, rowid FROM test WHERE a = 5 AND b = 'row 5' ORDER BY rowid"
+        )
+
+    con.close()
+
+
+def test_index_collation(tmp_path: Path) -> None:
+    path = tmp_path / "collation.sqlite"
+    con = stdlib_sqlite3.connect(path)
+    con.execute("PRAGMA page_size = 512")
+    con.execute("CREATE TABLE test (a TEXT, b TEXT COLLATE NOCASE, c TEXT)")
+    con.execute("CREATE INDEX test_a ON test (a COLLATE NOCASE)")
+    con.execute("CREATE INDEX test_b ON test (b)")
+    con.execute("CREATE INDEX test_c ON test (c COLLATE RTRIM DESC)")
+    con.execute("CREATE INDEX test_a_b ON test (a COLLATE BINARY, b COLLATE BINARY)")
+    words = ["apple", "Apple", "APPLE", "banana", "Banana", "_under", "\u00e9clair", "\u00c9clair", "zebra", "Zebra"]
+    con.executemany(
+        "INSERT INTO test VALUES (?, ?, ?)",
+        ((words[i % 10], words[i % 7], words[i % 10] + " " * (i % 3)) for i in range(1000)),
+    )
+    con.commit()
+
+    def rowids(sql: str, *params: Any) -> list[int]:
+        return [rowid for (rowid,) in con.execute(sql, params).fetchall()]
+
+    with path.open("rb") as fh:
+        s = sqlite3.SQLite3(fh)
+
+        index = s.index("test_a")
+        assert [values[0] for values, _ in index.range()] == [
+            value for (value,) in con.execute("SELECT a FROM test INDEXED BY test_a ORDER BY a COLLATE NOCASE")
+        ]
+        for key in ("apple", "APPLE", "\u00e9clair", "_UNDER"):
+            assert sorted(rowid for _, rowid in index.seek(key)) == rowids(
+                "SELECT rowid FROM test WHERE a = ? COLLATE NOCASE ORDER BY rowid", key
+            )
+        assert sorted(rowid for _, rowid in index.range("B", "Z")) == rowids(
+            "SELECT rowid FROM test WHERE a COLLATE NOCASE BETWEEN 'B' AND 'Z' ORDER BY rowid"
+        )
+
+        # The collation of the table column is used if the index does not have one
+        index = s.index("test_b")
+        assert sorted(rowid for _, rowid in index.seek("BANANA")) == rowids(
+            "SELECT rowid FROM test WHERE b = 'BANANA' ORDER BY rowid"
+        )
+
+        index = s.index("test_c")
+        assert sorted(rowid for _, rowid in index.seek("zebra")) == rowids(
+            "SELECT rowid FROM test WHERE c = 'zebra' COLLATE RTRIM ORDER BY rowid"
+        )
+        assert [values[0] for values, _ in index.range()] == [
+            value for (value,) in con.execute("SELECT c FROM test INDEXED BY test_c ORDER BY c COLLATE RTRIM DESC")
+        ]
+
+        index = s.index("test_a_b")
+        assert sorted(rowid for _, rowid in index.seek(["apple", "Apple"])) == rowids(
+            "SELECT rowid FROM test WHERE a = 'apple' AND b = 'Apple' COLLATE BINARY ORDER BY rowid"
+        )
+
+    con.close()
+
+
+def test_index_collation_unsupported(tmp_path: Path) -> None:
+    path = tmp_path / "collation.sqlite"
+    con = stdlib_sqlite3.connect(path)
+    con.create_collation("REVERSE", lambda a, b: (a < b) - (a > b))
+    con.execute("CREATE TABLE test (a TEXT UNIQUE COLLATE NOCASE, b TEXT)")
+    con.execute("CREATE INDEX test_b ON test (b COLLATE REVERSE)")
+    con.executemany("INSERT INTO test VALUES (?, ?)", ((f"a {i}", f"b {i}") for i in range(100)))
+    con.commit()
+    con.close()
+
+    with path.open("rb") as fh:
+        s = sqlite3.SQLite3(fh)
+
+        with pytest.raises(ValueError, match="Unsupported collation 'REVERSE'"):
+            list(s.index("test_b").seek("b 1"))
+        with pytest.raises(ValueError, match="Cannot determine the collations"):
+            list(s.index("sqlite_autoindex_test_1").seek("a 1"))
+
+
+def test_without_rowid_rows(tmp_path: Path) -> None:
+    path = tmp_path / "without_rowid.sqlite"
+    con = stdlib_sqlite3.connect(path)
+    con.execute("PRAGMA page_size = 512")
+    con.execute("CREATE TABLE test (key TEXT PRIMARY KEY, value) WITHOUT ROWID")
+    con.executemany("INSERT INTO test VALUES (?, ?)", ((f"key {i:05}", i) for i in range(3000)))
+    con.commit()
+    con.close()
+
+    with path.open("rb") as fh:
+        table = sqlite3.SQLite3(fh).table("test")
+
+        # Interior index pages hold entries themselves, which must be yielded in order
+        assert [row.value for row in table.rows()] == list(range(3000))
+
+
+def test_compare_record() -> None:
+    assert sqlite3.compare_record([None], [-(2**63)], "utf-8") < 0
+    assert sqlite3.compare_record([1], [1.0], "utf-8") == 0
+    assert sqlite3.compare_record([2**40], ["1"], "utf-8") < 0
+    assert sqlite3.compare_record(["z"], [b"a"], "utf-8") < 0
+    assert sqlite3.compare_record(["a", 1], ["a"], "utf-8") == 0
+    assert sqlite3.compare_record(["\uffff"], ["\U0001f600"], "utf-8") < 0
+    assert sqlite3.compare_record(["\uffff"], ["\U0001f600"], "utf-16-le") > 0
+
+
+def test_rows_columns(sqlite_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(sqlite_db)
+    table = s.table("test")
+
+    raw_page = s.raw_page
+    with patch.object(s, "raw_page", side_effect=raw_page) as mock_raw_page:
+        rows = list(table.rows(columns=["ID"]))
+        # Only the table page itself is read, the overflow pages holding the names are skipped
+        assert mock_raw_page.call_count == 1
+
+    assert [list(row) for row in rows] == [[("id", idx)] for idx in range(1, 6)]
+
+    rows = list(table.rows(columns=["value", "ID"]))
+    assert [list(row) for row in rows] == [
+        [("value", 1337), ("id", 1)],
+        [("value", 7331), ("id", 2)],
+        [("value", 4100), ("id", 3)],
+        [("value", 4100), ("id", 4)],
+        [("value", -11644473429), ("id", 5)],
+    ]
+    assert rows[0].name is None
+
+    rows = list(table.rows(columns=["name"]))
+    assert [row.name for row in rows] == ["testing", "omg", "A" * 4100, "B" * 4100, "negative"]
+    assert list(rows[0]) == [("name", "testing")]
+
+    with pytest.raises(ValueError, match="Unknown column 'foo' in table 'test'"):
+        list(table.rows(columns=["foo"]))
+
+
+def test_rows_raw(sqlite_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(sqlite_db)
+    table = s.table("test")
+
+    # Raw rows are decoded without creating Row objects
+    with patch.object(sqlite3, "Row", side_effect=AssertionError):
+        rows = list(table.rows(raw=True))
+        projected = list(table.rows(columns=["value", "id"], raw=True, max_rowid=2))
+
+    assert rows[0] == (1, "testing", 1337)
+    assert rows == [tuple(value for _, value in row) for row in table.rows()]
+    assert projected == [(1337, 1), (7331, 2)]
+
+
+def test_rows_lazy(sqlite_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(sqlite_db)
+    table = s.table("test")
+
+    raw_page = s.raw_page
+    with patch.object(s, "raw_page", side_effect=raw_page) as mock_raw_page:
+        row = table.get_by_rowid(3, lazy=True)
+        assert row.id == 3
+        # Only the table page itself is read, the overflow pages holding the name and value are not read yet
+        assert mock_raw_page.call_count == 1
+
+        assert row.name == "A" * 4100
+        assert row.value == 4100
+        assert mock_raw_page.call_count > 1
+
+    assert [list(row) for row in table.rows(lazy=True)] == [list(row) for row in table.rows()]
+    assert [row[0] for row in table.rows(columns=["value", "id"], lazy=True)] == [1337, 7331, 4100, 4100, -11644473429]
+
+
+def test_rows_columns_missing_value(tmp_path: Path) -> None:
+    path = tmp_path / "alter.sqlite"
+    con = stdlib_sqlite3.connect(path)
+    con.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT)")
+    con.execute("INSERT INTO test VALUES (1, 'one')")
+    con.execute("ALTER TABLE test ADD COLUMN value INTEGER DEFAULT 42")
+    con.commit()
+    con.close()
+
+    with path.open("rb") as fh:
+        table = sqlite3.SQLite3(fh).table("test")
+        assert [list(row) for row in table.rows(columns=["value", "id"])] == [[("value", 42), ("id", 1)]]
+
+
+@pytest.mark.parametrize(
+    ("where", "sql"),
+    [
+        (("value", "=", 42), "value = 42"),
+        (("value", "==", 42.0), "value = 42"),
+        (("value", "!=", 42), "value != 42"),
+        (("value", "<", 3), "value < 3"),
+        (("value", ">=", 97), "value >= 97"),
+        (("id", "<=", 20), "id <= 20"),
+        (("id", "in", [4, 8, 15, 16]), "id IN (4, 8, 15, 16)"),
+        (("value", "not in", [0, 1, 2]), "value NOT IN (0, 1, 2)"),
+        (("name", "=", "row 1337"), "name = 'row 1337'"),
+        (("name", "<", "row 11"), "name < 'row 11'"),
+        (("name", ">", "row 995"), "name > 'row 995'"),
+        (("name", "PREFIX", "row 42"), "substr(name, 1, 6) = 'row 42'"),
+        (("data", "PREFIX", b"\x07\x07"), "substr(data, 1, 2) = x'0707'"),
+        (("data", "=", b""), "data = x''"),
+        (("data", "is null"), "data IS NULL"),
+        (("data", "is not null"), "data IS NOT NULL"),
+        (
+            [("value", ">", 10), ("value", "<", 13), ("name", "PREFIX", "row 1")],
+            "value > 10 AND value < 13 AND name LIKE 'row 1%'",
+        ),
+    ],
+)
+def test_rows_where(large_db_path: Path, where: tuple | list[tuple], sql: str) -> None:
+    con = stdlib_sqlite3.connect(large_db_path)
+    expected = [rowid for (rowid,) in con.execute(f"SELECT id FROM test WHERE {sql} ORDER BY id")]
+    con.close()
+    assert expected
+
+    with large_db_path.open("rb") as fh:
+        table = sqlite3.SQLite3(fh).table("test")
+        assert [row.id for row in table.rows(where=where)] == expected
+
+
+def test_rows_where_sort_order(sqlite_db: BinaryIO) -> None:
+    table = sqlite3.SQLite3(sqlite_db).table("test")
+
+    assert [row.id for row in table.rows(where=("name", ">", 10))] == [1, 2, 3, 4, 5]
+    assert [row.id for row in table.rows(where=("name", "<", b""))] == [1, 2, 3, 4, 5]
+    assert [row.id for row in table.rows(where=("value", "<", "1"))] == [1, 2, 3, 4, 5]
+    assert [row.id for row in table.rows(where=("value", "=", None))] == []
+    assert [row.id for row in table.rows(where=("value", "<", None))] == []
+    assert [row.id for row in table.rows(where=("name", "PREFIX", b"A"))] == []
+    assert [row.id for row in table.rows(where=("id", "IS NOT NULL"))] == [1, 2, 3, 4, 5]
+
+    with pytest.raises(ValueError, match="Unsupported operator 'LIKE'"):
+        list(table.rows(where=("name", "like", "%")))
+
+
+def test_rows_where_overflow(sqlite_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(sqlite_db)
+    table = s.table("test")
+
+    raw_page = s.raw_page
+    with patch.object(s, "raw_page", side_effect=raw_page) as mock_raw_page:
+        # The prefix is stored on the page itself and the size of the values differs, so only the table page is read
+        assert [row.id for row in table.rows(columns=["id"], where=("name", "PREFIX", "AAAA"))] == [3]
+        assert [row.id for row in table.rows(columns=["id"], where=("name", "=", "A" * 4099))] == []
+        assert mock_raw_page.call_count == 1
+
+        assert [row.id for row in table.rows(columns=["id"], where=("name", "=", "B" * 4100))] == [4]
+
+
 @pytest.mark.parametrize(
     ("input", "encoding", "expected_output"),
     [
@@ -58,8 +498,347 @@ def test_sqlite_read_record(input: bytes, encoding: str, expected_output: tuple[
     assert sqlite3.read_record(BytesIO(input), encoding) == expected_output
 
 
+def test_sqlite_read_record_embedded() -> None:
+    fh = BytesIO(b"garbage\x04\x00\x1b\x02testing\x059" + b"trailing" * 1024)
+    fh.seek(7)
+
+    with patch.object(fh, "read", wraps=fh.read) as mock_read:
+        assert sqlite3.read_record(fh, "utf-8") == ([0, 27, 2], [None, "testing", 1337])
+        # Only the record is read, not the remainder of the file
+        assert all(call.args and 0 <= call.args[0] <= 16 for call in mock_read.call_args_list)
+    assert fh.tell() == 7 + 13
+
+
+def test_sqlite_decode_record() -> None:
+    buf = memoryview(b"garbage\x04\x00\x1b\x02testing\x059")
+    assert sqlite3.decode_record(buf, 7, "utf-8") == ([0, 27, 2], [None, "testing", 1337])
+
+
+@pytest.mark.parametrize("use_cstruct", [False, True])
+def test_sqlite_decode_record_serial_types(use_cstruct: bool) -> None:
+    types = [0, 1, 1, 2, 3, 3, 4, 5, 5, 6, 6, 7, 8, 9, 10, 14, 15]
+    data = (
+        b"\x7f"
+        b"\x80"
+        b"\x7f\xff"
+        b"\x7f\xff\xff"
+        b"\x80\x00\x00"
+        b"\xff\xff\xff\xfe"
+        b"\x7f\xff\xff\xff\xff\xff"
+        b"\x80\x00\x00\x00\x00\x01"
+        b"\x7f\xff\xff\xff\xff\xff\xff\xff"
+        b"\x80\x00\x00\x00\x00\x00\x00\x00"
+        b"\x3f\xf8\x00\x00\x00\x00\x00\x00"
+        b"\x00"
+        b"a"
+    )
+    buf = bytes([len(types) + 1, *types]) + data
+
+    assert sqlite3.decode_record(buf, 0, "utf-8", use_cstruct=use_cstruct) == (
+        types,
+        [
+            None,
+            127,
+            -128,
+            32767,
+            2**23 - 1,
+            -(2**23),
+            -2,
+            2**47 - 1,
+            -(2**47) + 1,
+            2**63 - 1,
+            -(2**63),
+            1.5,
+            0,
+            1,
+            None,
+            b"\x00",
+            "a",
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    ("input", "expected_output"),
+    [
+        (b"\x00", 0),
+        (b"\x7f", 127),
+        (b"\x81\x00", 128),
+        (b"\x82\x2c", 300),
+        (b"\xff\xff\xff\xff\xff\xff\xff\x7f", 2**56 - 1),
+        (b"\xff\xff\xff\xff\xff\xff\xff\xff\xff", 2**64 - 1),
+    ],
+)
+def test_sqlite_varint(input: bytes, expected_output: int) -> None:
+    assert sqlite3.decode_varint(b"\x00" + input + b"\x00", 1) == (expected_output, len(input) + 1)
+
+    fh = BytesIO(input + b"\x00")
+    assert sqlite3.varint(fh) == expected_output
+    assert fh.tell() == len(input)
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_from_path(large_db_path: Path, mmap: bool) -> None:
+    with sqlite3.SQLite3.from_path(large_db_path, mmap=mmap) as s:
+        table = s.table("test")
+
+        assert isinstance(s.raw_page(table.page), memoryview if mmap else bytes)
+        assert isinstance(s.page(1).cell(0).data, bytes)
+        assert len(list(table.rows())) == 5000
+        assert table.get_by_rowid(5000).name == "row 2500"
+
+    assert s.fh.closed
+
+
+def test_partition_tree(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+    table = s.table("test")
+
+    subtrees = sqlite3.partition_tree(s, table.page, 16)
+    assert len(subtrees) >= 16
+
+    rowids = [cell.key for page in subtrees for cell in sqlite3.walk_tree(s, s.page(page))]
+    assert rowids == [row.id for row in table.rows()]
+
+    # Index B-trees are not split
+    index = s.index("test_value")
+    assert sqlite3.partition_tree(s, index.page, 16) == [index.page]
+
+
+def test_walk_tree(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+    table = s.table("test")
+    root = s.page(table.page)
+
+    rowids = [cell.key for cell in sqlite3.walk_tree(s, root)]
+    assert rowids == list(range(2, 10001, 2))
+    assert [cell.key for cell in sqlite3.walk_tree(s, root, 100, 200, reverse=True)] == list(range(200, 99, -2))
+
+    # In physical order all cells are yielded, but not in rowid order
+    physical = [cell.key for cell in sqlite3.walk_tree(s, root, physical=True)]
+    assert sorted(physical) == rowids
+
+    index = s.index("test_value")
+    entries = [cell.values for cell in sqlite3.walk_tree(s, s.page(index.page))]
+    assert entries == sorted(entries)
+    assert len(entries) == 5000
+
+    # Child pages are read in batches
+    with patch.object(s, "read_pages", wraps=s.read_pages) as mock_read_pages:
+        assert sum(1 for _ in sqlite3.walk_tree(s, root)) == 5000
+        assert mock_read_pages.call_count < len({cell.page.num for cell in sqlite3.walk_tree(s, root)})
+
+
+def test_walk_tree_cycle(large_db_path: Path, tmp_path: Path) -> None:
+    with sqlite3.SQLite3.from_path(large_db_path) as s:
+        root = s.page(s.table("test").page)
+        child = s.page(root.right_page)
+        assert child.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_TABLE
+
+        # Point the right page of the child back to the root page
+        offset = (child.num - 1) * s.page_size + 8
+
+    data = bytearray(large_db_path.read_bytes())
+    data[offset : offset + 4] = root.num.to_bytes(4, "big")
+    path = tmp_path / "cycle.sqlite"
+    path.write_bytes(data)
+
+    with sqlite3.SQLite3.from_path(path) as s:
+        table = s.table("test")
+        with pytest.raises(InvalidDatabase, match="referenced more than once"):
+            list(table.rows())
+        with pytest.raises(InvalidDatabase, match="referenced more than once"):
+            sqlite3.partition_tree(s, table.page, 10000)
+        with pytest.raises(InvalidDatabase, match="referenced more than once"):
+            table.get_by_rowid(10000)
+        with pytest.raises(InvalidDatabase, match="referenced more than once"):
+            assert 10000 in table
+
+
+def test_walk_index_cycle(large_db_path: Path, tmp_path: Path) -> None:
+    with sqlite3.SQLite3.from_path(large_db_path) as s:
+        index = s.index("test_value")
+        root = s.page(index.page)
+        child = s.page(root.right_page)
+        assert child.header.flags == c_sqlite3.PAGE_TYPE_INTERIOR_INDEX
+
+        # The child pages within the range are read in batches, the others are not read at all
+        s.cache.clear()
+        with patch.object(sqlite3.SQLite3, "raw_pages", autospec=True, side_effect=sqlite3.SQLite3.raw_pages) as mock:
+            assert len(list(index.seek(42))) == 50
+            assert sum(call.args[2] for call in mock.call_args_list) < 20
+
+        # Point the right page of the child back to the root page
+        offset = (child.num - 1) * s.page_size + 8
+
+    data = bytearray(large_db_path.read_bytes())
+    data[offset : offset + 4] = root.num.to_bytes(4, "big")
+    path = tmp_path / "cycle.sqlite"
+    path.write_bytes(data)
+
+    with sqlite3.SQLite3.from_path(path) as s:
+        index = s.index("test_value")
+        with pytest.raises(InvalidDatabase, match="referenced more than once"):
+            list(index.range())
+        with pytest.raises(InvalidDatabase, match="referenced more than once"):
+            list(index.seek(99))
+
+
+def test_scan_parallel(large_db_path: Path, large_db: BinaryIO) -> None:
+    with sqlite3.SQLite3.from_path(large_db_path) as s, ProcessPoolExecutor(max_workers=2) as executor:
+        table = s.table("test")
+        expected = [(row.id, row.name, row.value, row.data) for row in table.rows()]
+
+        assert list(table.scan_parallel(executor, workers=2)) == expected
+        assert sorted(table.scan_parallel(executor, workers=2, ordered=False)) == sorted(expected, key=lambda r: r[0])
+        assert list(table.scan_parallel(executor, workers=2, reverse=True)) == expected[::-1]
+
+        result = table.scan_parallel(
+            executor, workers=2, min_rowid=100, max_rowid=2000, columns=["name", "id"], where=("value", "<", 10)
+        )
+        assert list(result) == [
+            (name, rowid) for rowid, name, value, _ in expected if 100 <= rowid <= 2000 and value < 10
+        ]
+
+        rows = list(table.rows(workers=2, columns=["id", "name"]))
+        assert [(row.id, row.name) for row in rows] == [(rowid, name) for rowid, name, _, _ in expected]
+
+    s = sqlite3.SQLite3(large_db)
+    with pytest.raises(ValueError, match="from_path"):
+        list(s.table("test").scan_parallel(workers=2))
+
+
+def test_schema(large_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(large_db)
+
+    table = s.table("test")
+    assert s.table("TEST") is table
+    assert list(s.tables()) == [table]
+    assert s.index("Test_Value") is s.index("test_value")
+    assert s.table("missing") is None
+    assert s.index("missing") is None
+
+    with patch.object(sqlite3, "walk_tree", wraps=sqlite3.walk_tree) as mock_walk_tree:
+        for _ in range(10):
+            s.table("test")
+        assert mock_walk_tree.call_count == 0
+
+    # A changed schema cookie invalidates the catalog
+    s.header.schema_cookie += 1
+    assert s.table("test") is not table
+
+
+def test_mmap(sqlite_db: BinaryIO) -> None:
+    s = sqlite3.SQLite3(sqlite_db, mmap=True)
+    rows = list(s.table("test").rows())
+
+    assert [row.name for row in rows] == ["testing", "omg", "A" * 4100, "B" * 4100, "negative"]
+    assert rows[4].value == -11644473429
+
+    s.close()
+    assert not sqlite_db.closed
+
+
 def test_empty(empty_db: BinaryIO) -> None:
     s = sqlite3.SQLite3(empty_db)
 
     assert s.encoding == "utf-8"
     assert len(list(s.tables())) == 0
+
+
+def _overflow_db(path: Path, blob: bytes, reserved_size: int = 0) -> Path:
+    db = stdlib_sqlite3.connect(path)
+    db.execute("PRAGMA page_size = 1024")
+    db.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, data BLOB, value INTEGER)")
+    db.commit()
+    db.close()
+
+    if reserved_size:
+        # Reserve bytes at the end of every page, VACUUM rewrites the database with the reserved space
+        with path.open("r+b") as fh:
+            fh.seek(20)
+            fh.write(bytes([reserved_size]))
+
+    db = stdlib_sqlite3.connect(path)
+    db.execute("VACUUM")
+    db.execute("INSERT INTO test VALUES (1, ?, 1337)", (blob,))
+    db.commit()
+    db.close()
+    return path
+
+
+@pytest.mark.parametrize("reserved_size", [0, 32])
+def test_cell_open(tmp_path: Path, reserved_size: int) -> None:
+    blob = bytes(range(256)) * 40
+    path = _overflow_db(tmp_path / "overflow.sqlite", blob, reserved_size)
+
+    with path.open("rb") as fh:
+        s = sqlite3.SQLite3(fh)
+        assert s.usable_page_size == 1024 - reserved_size
+
+        row = s.table("test").get_by_rowid(1)
+        assert row.data == blob
+        assert row.value == 1337
+
+        cell = row._cell
+        assert cell.overflow_page is not None
+        assert cell.open().read() == cell.data
+        assert len(cell.data) == cell.size
+
+        read = s.reader.read
+        with patch.object(s.reader, "read", side_effect=read) as mock_read:
+            fh = row.open("data")
+            fh.seek(5000)
+            buf = bytearray(100)
+            assert fh.readinto(buf) == 100
+            assert buf == blob[5000:5100]
+            # The overflow chain is stored on consecutive pages, so the chain is followed with a single read
+            assert mock_read.call_count == 1
+
+            # Seeking back does not follow the overflow chain again
+            fh.seek(0)
+            assert fh.read() == blob
+            assert mock_read.call_count <= 2
+
+            assert fh.seek(0, io.SEEK_END) == len(blob)
+            assert fh.read() == b""
+
+        assert row.open("id").read() == b""
+        assert row.open("value").read() == (1337).to_bytes(2, "big")
+
+
+def test_cell_open_fragmented(tmp_path: Path) -> None:
+    path = tmp_path / "fragmented.sqlite"
+    db = stdlib_sqlite3.connect(path)
+    db.execute("PRAGMA page_size = 1024")
+    db.execute("PRAGMA secure_delete = OFF")
+    db.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, data BLOB)")
+    db.execute("INSERT INTO test VALUES (1, ?)", (b"a" * 5000,))
+    db.execute("INSERT INTO test VALUES (2, ?)", (b"b" * 5000,))
+    db.execute("DELETE FROM test WHERE id = 1")
+    # The overflow chain of this row reuses the freed pages and continues at the end of the database
+    blob = bytes(range(256)) * 60
+    db.execute("INSERT INTO test VALUES (3, ?)", (blob,))
+    db.commit()
+    db.close()
+
+    with path.open("rb") as fh:
+        s = sqlite3.SQLite3(fh)
+        table = s.table("test")
+
+        for readahead in (1, 4, 1000):
+            cell = table.get_by_rowid(3)._cell
+            stream = cell.open(readahead)
+            assert stream.read()[-len(blob) :] == blob
+
+            chain = stream.chain
+            assert len(chain) == stream.num_pages
+            assert any(page + 1 != next_page for page, next_page in itertools.pairwise(chain))
+
+            stream.seek(0)
+            parts = []
+            while buf := stream.read(777):
+                parts.append(buf)
+            assert b"".join(parts) == cell.data
+
+        assert table.get_by_rowid(2).data[-5000:] == b"b" * 5000
@@ -2,7 +2,14 @@ from __future__ import annotations
 
 import pytest
 
-from dissect.sql.utils import parse_table_columns_constraints
+from dissect.sql.exceptions import InvalidSQL
+from dissect.sql.utils import (
+    get_primary_key_from_constraint,
+    parse_create_index,
+    parse_create_table,
+    parse_table_columns_constraints,
+    split_column_def,
+)
 
 testdata = [
     pytest.param(
@@ -161,3 +168,106 @@ testdata = [
 @pytest.mark.parametrize(("sql", "result"), testdata)
 def test_parse_table_columns_constraints(sql: str, result: tuple) -> None:
     assert parse_table_columns_constraints(sql) == result
+
+
+def test_parse_create_table() -> None:
+    sql = """
+        CREATE TABLE IF NOT EXISTS "main"."my table" (
+            a INTEGER NOT NULL,
+            "b,c" VARCHAR(10, 2) DEFAULT 'it''s' /* comment, with a comma */,
+            [d] DOUBLE PRECISION DEFAULT -1.5e3,
+            `e` BLOB DEFAULT x'cafe',
+            f DEFAULT (CURRENT_TIMESTAMP),
+            CONSTRAINT pk PRIMARY KEY (a, "b,c" DESC)
+        ) WITHOUT ROWID
+    """
+    table = parse_create_table(sql)
+
+    assert table.name == "my table"
+    assert [column.name for column in table.columns] == ["a", "b,c", "d", "e", "f"]
+    assert [column.type for column in table.columns] == ["INTEGER", "VARCHAR(10, 2)", "DOUBLE PRECISION", "BLOB", ""]
+    assert [column.default for column in table.columns] == [None, "it's", -1500.0, b"\xca\xfe", None]
+    assert table.columns[1].description == "VARCHAR(10, 2) DEFAULT 'it''s'"
+    assert [column.collation for column in table.columns] == [None, None, None, None, None]
+    assert parse_create_table("CREATE TABLE t (a TEXT COLLATE NOCASE NOT NULL)").columns[0].collation == "NOCASE"
+    assert table.constraints == ('CONSTRAINT pk PRIMARY KEY (a, "b,c" DESC)',)
+    assert table.primary_key == ("a", "b,c")
+    assert table.without_rowid
+
+    assert parse_table_columns_constraints(sql)[0] is None
+    assert not parse_create_table("CREATE TABLE t (a INTEGER PRIMARY KEY, b) -- WITHOUT ROWID").without_rowid
+
+
+def test_parse_create_table_memoized() -> None:
+    sql = "CREATE TABLE t (a, b)"
+    assert parse_create_table(sql) is parse_create_table(sql)
+
+    # The lists of the compatibility function are not shared
+    result = parse_table_columns_constraints(sql)
+    result[1].append(("c", ""))
+    assert parse_table_columns_constraints(sql) == (None, [("a", ""), ("b", "")], [])
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "CREATE TABLE t",
+        "CREATE TABLE t (a, (b)",
+        "CREATE TABLE t (a, , b)",
+    ],
+)
+def test_parse_create_table_invalid(sql: str) -> None:
+    with pytest.raises(InvalidSQL):
+        parse_create_table(sql)
+
+
+def test_split_column_def() -> None:
+    sql = "CREATE TABLE t (...)"
+
+    assert split_column_def(sql, "a") == ("a", "")
+    assert split_column_def(sql, "a INTEGER NOT NULL") == ("a", "INTEGER NOT NULL")
+    assert split_column_def(sql, "  \"my column\"\tVARCHAR(10, 2) DEFAULT 'a b'") == (
+        "my column",
+        "VARCHAR(10, 2) DEFAULT 'a b'",
+    )
+    assert split_column_def(sql, "[a] /* comment */ TEXT") == ("a", "TEXT")
+
+    with pytest.raises(InvalidSQL, match="empty column definition"):
+        split_column_def(sql, " ")
+
+
+def test_get_primary_key_from_constraint() -> None:
+    sql = "CREATE TABLE t (...)"
+
+    assert get_primary_key_from_constraint("KEY (a)", "PRIMARY KEY (a)", sql) == "a"
+    assert get_primary_key_from_constraint('KEY ( "my column" )', 'PRIMARY KEY ( "my column" )', sql) == "my column"
+    assert get_primary_key_from_constraint("KEY (a, b)", "PRIMARY KEY (a, b)", sql) is None
+    assert get_primary_key_from_constraint("KEY (a DESC)", "PRIMARY KEY (a DESC)", sql) is None
+    assert get_primary_key_from_constraint("KEY (lower(a))", "PRIMARY KEY (lower(a))", sql) is None
+
+    for constraint in ("KEY", "KEY ()", "KEY (a"):
+        with pytest.raises(InvalidSQL):
+            get_primary_key_from_constraint(constraint, f"PRIMARY {constraint}", sql)
+
+
+def test_parse_create_index() -> None:
+    index = parse_create_index('CREATE UNIQUE INDEX "idx" ON t (a COLLATE NOCASE, "b" DESC, lower(c)) WHERE a > 1')
+
+    assert index.name == "idx"
+    assert index.table == "t"
+    assert index.columns == ("a", "b", "lower(c)")
+    assert index.collations == ("NOCASE", None, None)
+    assert index.descending == (False, True, False)
+    assert index.unique
+    assert index.where == "a > 1"
+
+    index = parse_create_index('CREATE INDEX idx ON t (a COLLATE "rtrim" DESC, b ASC, c COLLATE nocase)')
+    assert index.columns == ("a", "b", "c")
+    assert index.collations == ("rtrim", None, "nocase")
+    assert index.descending == (True, False, False)
+
+    index = parse_create_index("CREATE INDEX IF NOT EXISTS main.idx ON t(a)")
+    assert index.name == "idx"
+    assert index.columns == ("a",)
+    assert not index.unique
+    assert index.where is None
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import os
+import sqlite3 as stdlib_sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+from unittest.mock import patch
+
+import pytest
+
+from dissect.sql import sqlite3
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_wal_page_map(wal_db_path: tuple[Path, Path]) -> None:
+    _, wal_path = wal_db_path
+
+    with wal_path.open("rb") as fh:
+        wal = sqlite3.WAL(fh)
+
+        assert wal.valid
+        assert len(wal.checkpoints()) == 4
+        assert wal.page_count == wal.checkpoints()[-1].frames[-1].page_count
+        assert 1 in wal.page_map
+        # Every page maps to its most recent frame
+        for checkpoint in wal.checkpoints():
+            for page, frame in checkpoint.page_map.items():
+                assert wal.page_map[page].offset >= frame.offset
+
+
+def test_wal_overlay(wal_db_path: tuple[Path, Path]) -> None:
+    db_path, wal_path = wal_db_path
+
+    with db_path.open("rb") as fh:
+        s = sqlite3.SQLite3(fh)
+        assert [table.name for table in s.tables()] == ["test"]
+        assert [row.id for row in s.table("test").rows()] == list(range(1, 101))
+
+    with sqlite3.SQLite3.from_path(db_path, wal_path) as s:
+        assert [table.name for table in s.tables()] == ["test", "second"]
+        assert s.page_count > s.db_header.page_count
+
+        table = s.table("test")
+        assert [row.id for row in table.rows()] == [i for i in range(1, 201) if i != 10]
+        assert table.get_by_rowid(5).name == "updated"
+        assert table.get_by_rowid(200).name == "row 200"
+
+        # Runs of pages are read from the database file, pages in the WAL from their frame
+        pages = s.raw_pages(2, s.page_count)
+        assert len(pages) == s.page_count - 1
+        assert [bytes(page) for page in pages] == [bytes(s.raw_page(num)) for num in range(2, s.page_count + 1)]
+
+
+def test_wal_invalid_checksum(wal_db_path: tuple[Path, Path], tmp_path: Path) -> None:
+    db_path, wal_path = wal_db_path
+
+    # Corrupt the data of the last frame, which invalidates the last commit
+    wal_data = bytearray(wal_path.read_bytes())
+    wal_data[-1] ^= 0xFF
+    corrupt_wal_path = tmp_path / "corrupt.sqlite-wal"
+    corrupt_wal_path.write_bytes(wal_data)
+
+    with sqlite3.SQLite3.from_path(db_path, corrupt_wal_path) as s:
+        assert len(s.wal.checkpoints()) == 4
+        assert [table.name for table in s.tables()] == ["test"]
+        assert [row.id for row in s.table("test").rows()] == [i for i in range(1, 201) if i != 10]
+
+    # Corrupt the WAL header, which invalidates all frames
+    wal_data = bytearray(wal_path.read_bytes())
+    wal_data[16] ^= 0xFF
+    corrupt_wal_path.write_bytes(wal_data)
+
+    with sqlite3.SQLite3.from_path(db_path, corrupt_wal_path) as s:
+        assert not s.wal.valid
+        assert s.wal.page_map == {}
+        assert [row.id for row in s.table("test").rows()] == list(range(1, 101))
+
+
+def test_open_wal(wal_db_path: tuple[Path, Path]) -> None:
+    db_path, wal_path = wal_db_path
+
+    with db_path.open("rb") as fh, wal_path.open("rb") as wal_fh:
+        s = sqlite3.SQLite3(fh)
+        assert len(list(s.table("test").rows())) == 100
+        assert s.table("second") is None
+
+        s.open_wal(wal_fh)
+        assert len(list(s.table("test").rows())) == 199
+        assert s.table("second") is not None
+
+
+@pytest.mark.parametrize("has_numpy", [pytest.param(True, id="numpy"), pytest.param(False, id="python")])
+def test_wal_index(wal_db_path: tuple[Path, Path], tmp_path: Path, has_numpy: bool) -> None:
+    _, wal_path = wal_db_path
+
+    if has_numpy:
+        pytest.importorskip("numpy")
+
+    with patch.object(sqlite3, "HAS_NUMPY", has_numpy), wal_path.open("rb") as fh:
+        wal = sqlite3.WAL(fh)
+        frames = list(wal.frames())
+
+        # Use a chunk size that is not a multiple of the frame size
+        index = sqlite3.WALIndex(wal, chunk_size=3 * 4096)
+        assert len(index) == len(frames) == index.valid_count
+        assert list(index.page_numbers) == [frame.page_number for frame in frames]
+        assert list(index.commit_sizes) == [frame.page_count for frame in frames]
+        assert index.frame_header(2) == frames[2].header
+
+    # Corrupt the data of the third frame, frames 0 and 1 remain valid
+    wal_data = bytearray(wal_path.read_bytes())
+    wal_data[32 + 2 * (24 + 4096) + 24 + 100] ^= 0xFF
+    corrupt_wal_path = tmp_path / "corrupt.sqlite-wal"
+    corrupt_wal_path.write_bytes(wal_data)
+
+    with patch.object(sqlite3, "HAS_NUMPY", has_numpy), corrupt_wal_path.open("rb") as fh:
+        index = sqlite3.WALIndex(sqlite3.WAL(fh), chunk_size=4096)
+        assert len(index) == len(frames)
+        assert index.valid_count == 2
+
+
+def test_wal_checksum_step() -> None:
+    buf = os.urandom(4096)
+    s0, s1 = sqlite3.wal_checksum(buf[:16])
+
+    step = sqlite3.wal_checksum_step((len(buf) - 16) // 4)
+    assert step(s0, s1, *sqlite3.wal_checksum(buf[16:])) == sqlite3.wal_checksum(buf)
+    assert step(s0, s1, *sqlite3.wal_checksum(buf[16:], "<")) == sqlite3.wal_checksum(buf[16:], "<", s0, s1)
+
+
+def test_at_checkpoint(wal_db_path: tuple[Path, Path]) -> None:
+    db_path, wal_path = wal_db_path
+
+    with sqlite3.SQLite3.from_path(db_path, wal_path) as s:
+        views = list(s.checkpoints())
+        assert len(views) == 4
+        assert all(view.cache is s.cache for view in views)
+
+        first, second, third, fourth = views
+        assert [row.id for row in first.table("test").rows()] == list(range(1, 201))
+        assert first.table("test").get_by_rowid(5).name == "row 5"
+        assert second.table("test").get_by_rowid(5).name == "updated"
+        assert 10 in second.table("test")
+        assert 10 not in third.table("test")
+        assert [table.name for table in third.tables()] == ["test"]
+        assert [table.name for table in fourth.tables()] == ["test", "second"]
+        assert fourth.page_count == s.page_count
+        assert first.page_count <= fourth.page_count
+
+        view = s.at_checkpoint(1)
+        assert view.checkpoint is s.wal.checkpoints()[1]
+        assert view.table("test").sqlite is view
+        assert s.at_checkpoint(-1).table("test") is not s.table("test")
+        assert view.table("test").get_by_rowid(5).name == "updated"
+
+        # Closing a view leaves the database usable
+        view.close()
+        assert s.table("test").get_by_rowid(5).name == "updated"
+
+        with pytest.raises(IndexError):
+            s.at_checkpoint(4)
+
+    with db_path.open("rb") as fh:
+        s = sqlite3.SQLite3(fh)
+        assert list(s.checkpoints()) == []
+        with pytest.raises(sqlite3.NoWriteAheadLog):
+            s.at_checkpoint(0)
+
+
+def test_at_checkpoint_scan_parallel(wal_db_path: tuple[Path, Path]) -> None:
+    db_path, wal_path = wal_db_path
+
+    with sqlite3.SQLite3.from_path(db_path, wal_path) as s, ProcessPoolExecutor(max_workers=2) as executor:
+        view = s.at_checkpoint(1)
+        rows = list(view.table("test").scan_parallel(executor, workers=2))
+        assert rows == [(row.id, row.name) for row in view.table("test").rows()]
+        assert (10, "row 10") in rows
+
+        base = s.at_checkpoint(None)
+        assert len(list(base.table("test").scan_parallel(executor, workers=2))) == 100
+
+
+def test_wal_find_frame(wal_db_path: tuple[Path, Path]) -> None:
+    _, wal_path = wal_db_path
+
+    with wal_path.open("rb") as fh:
+        wal = sqlite3.WAL(fh)
+
+        for checkpoint in wal.checkpoints():
+            for page, frame in checkpoint.page_map.items():
+                assert wal.find_frame(page, checkpoint.commit_idx) == wal.frame_idx(frame.offset)
+
+        assert wal.find_frame(1, wal.commit_idx) == wal.frame_idx(wal.page_map[1].offset)
+        assert wal.find_frame(2**31, wal.commit_idx) is None
+
+
+def test_diff(wal_db_path: tuple[Path, Path]) -> None:
+    db_path, wal_path = wal_db_path
+
+    with sqlite3.SQLite3.from_path(db_path, wal_path) as s:
+        base = s.at_checkpoint(None)
+        first, second, third, fourth = s.checkpoints()
+
+        changes = list(base.diff(first))
+        assert [change.key for change in changes] == list(range(101, 201))
+        assert all(change.type == sqlite3.RowChange.INSERT for change in changes)
+        assert changes[0].new.name == "row 101"
+
+        (change,) = first.diff(second)
+        assert (change.type, change.key) == (sqlite3.RowChange.UPDATE, 5)
+        assert (change.old.name, change.new.name) == ("row 5", "updated")
+
+        (change,) = second.diff(third)
+        assert (change.type, change.key, change.old.name) == (sqlite3.RowChange.DELETE, 10, "row 10")
+
+        # Creating an empty table does not change any rows
+        assert list(third.diff(fourth)) == []
+        assert list(fourth.diff(fourth)) == []
+
+        changes = {(change.type, change.key) for change in base.diff(fourth)}
+        assert changes == {("insert", i) for i in range(101, 201)} | {("update", 5), ("delete", 10)}
+
+        # Going back in time reverses the changes
+        (change,) = third.diff(second)
+        assert (change.type, change.key) == (sqlite3.RowChange.INSERT, 10)
+
+        (change,) = first.table("test").diff(second.table("test"))
+        assert change.new.name == "updated"
+
+    with db_path.open("rb") as fh:
+        other = sqlite3.SQLite3(fh)
+        with pytest.raises(ValueError, match="not views of the same database"):
+            list(other.diff(base))
+
+
+def test_diff_overflow(tmp_path: Path) -> None:
+    path = tmp_path / "overflow.sqlite"
+
+    con = stdlib_sqlite3.connect(path, isolation_level=None)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA wal_autocheckpoint = 0")
+    con.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, data BLOB)")
+    con.executemany("INSERT INTO test VALUES (?, ?)", ((i, bytes(20000)) for i in range(1, 6)))
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    # Overwriting a value of the same size only writes the last overflow page
+    con.execute("UPDATE test SET data = ? WHERE id = 3", (bytes(19999) + b"x",))
+
+    db_path = tmp_path / "copy.sqlite"
+    wal_path = tmp_path / "copy.sqlite-wal"
+    db_path.write_bytes(path.read_bytes())
+    wal_path.write_bytes((tmp_path / "overflow.sqlite-wal").read_bytes())
+    con.close()
+
+    with sqlite3.SQLite3.from_path(db_path, wal_path) as s:
+        assert 1 not in s.wal.page_map
+        assert s.table("test").page not in s.wal.page_map
+
+        (change,) = s.at_checkpoint(None).diff(s)
+        assert (change.type, change.key) == (sqlite3.RowChange.UPDATE, 3)
+        assert change.new.data.endswith(b"x")
+
+
+def test_diff_page_reads(tmp_path: Path) -> None:
+    path = tmp_path / "overflow.sqlite"
+
+    con = stdlib_sqlite3.connect(path, isolation_level=None)
+    con.execute("PRAGMA page_size = 1024")
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA wal_autocheckpoint = 0")
+    con.execute("CREATE TABLE test (id INTEGER PRIMARY KEY, data BLOB)")
+    with con:
+        con.execute("BEGIN")
+        con.executemany("INSERT INTO test VALUES (?, ?)", ((i, os.urandom(10000)) for i in range(1, 501)))
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    # A value of a different size gets a new overflow chain, a value of the same size is overwritten in place
+    con.execute("UPDATE test SET data = ? WHERE id = 250", (os.urandom(10001),))
+    con.execute("UPDATE test SET data = ? WHERE id = 100", (os.urandom(10000),))
+    con.execute("DELETE FROM test WHERE id = 400")
+
+    db_path = tmp_path / "copy.sqlite"
+    wal_path = tmp_path / "copy.sqlite-wal"
+    db_path.write_bytes(path.read_bytes())
+    wal_path.write_bytes((tmp_path / "overflow.sqlite-wal").read_bytes())
+    con.close()
+
+    reads = []
+    raw_page = sqlite3.SQLite3.raw_page
+    raw_pages = sqlite3.SQLite3.raw_pages
+
+    def count_raw_page(self: sqlite3.SQLite3, num: int) -> bytes:
+        reads.append(num)
+        return raw_page(self, num)
+
+    def count_raw_pages(self: sqlite3.SQLite3, num: int, count: int) -> list[bytes]:
+        result = raw_pages(self, num, count)
+        reads.extend(range(num, num + len(result)))
+        return result
+
+    with (
+        sqlite3.SQLite3.from_path(db_path, wal_path) as s,
+        patch.object(sqlite3.SQLite3, "raw_page", count_raw_page),
+        patch.object(sqlite3.SQLite3, "raw_pages", count_raw_pages),
+    ):
+        base = s.at_checkpoint(None)
+        first = s.at_checkpoint(0)
+        table_pages = len(sqlite3._tree_pages(s, s.table("test").page)[1])
+        reads.clear()
+
+        changes = list(base.diff(s))
+        assert [(change.type, change.key) for change in changes] == [
+            (sqlite3.RowChange.UPDATE, 100),
+            (sqlite3.RowChange.UPDATE, 250),
+            (sqlite3.RowChange.DELETE, 400),
+        ]
+        # Neither the leaf pages of the table nor the overflow chains of the unchanged rows are read
+        assert len(reads) < table_pages / 4
+
+        reads.clear()
+        (change,) = base.diff(first)
+        assert (change.type, change.key) == (sqlite3.RowChange.UPDATE, 250)
+        assert len(reads) < 100